@@ -1,28 +1,214 @@
 from __future__ import annotations
+from data_structures.hash_table import LinearProbeTable
+from data_structures.linked_list import LinkedList
 from data_structures.referential_array import ArrayR
+from data_structures.top_k_heap import TopKHeap
 from constants import PlayerStats
-from season import Season
+from player import Player
+from season import Season, SeasonSubscriber
+from typing import Collection, Union
 
 
-class Awards:
+class Awards(SeasonSubscriber):
     def __init__(self, season: Season, player_stat: PlayerStats, num_top_players: int) -> None:
         """
         Initializes the awards based on the provided teams, player stat and top players.
+        The awards subscribe to the season, so the top players stay up to date while the season is simulated.
 
         Args:
             season (season): The season we are generating the awards for.
             player_stat (PlayerStat): The player stat to order the awards by (in descending order)
-            num_top_players (int): The number of players from each team to track.
+            num_top_players (int): The number of players to track on the leaderboard.
+
+        Raises:
+            ValueError: When num_top_players is not positive.
+
+        Complexity:
+            Best Case Complexity: O(P * (k + log(k) * hash)) where P is the number of players in the season and k is num_top_players
+            Worst Case Complexity: O(P * (k + log(k) * hash)) where P is the number of players in the season and k is num_top_players
+        """
+        self._setup(season, player_stat, num_top_players)
+        self.group = ArrayR.from_list([self])
+        self.refresh()
+        season.subscribe(self)
+
+    def _setup(self, season: Season, player_stat: PlayerStats, num_top_players: int) -> None:
+        """
+        Initialises the attributes of the awards without looking at any players.
+
+        Complexity:
+            Best Case Complexity: O(k) where k is num_top_players
+            Worst Case Complexity: O(k) where k is num_top_players
+        """
+        self.season = season
+        self.player_stat = player_stat
+        self.num_top_players = num_top_players
+        self.top_players: TopKHeap[tuple[int, str], Player] = TopKHeap(num_top_players, Awards._compare_priorities)
+        #players in leaderboard order, None when the order has to be recomputed
+        self.ranking: Union[ArrayR[Player], None] = None
+        self.stale = False
+        self.epoch = season.stats_epoch.value
+        #awards built together, they are always rebuilt together in a single pass
+        self.group: ArrayR[Awards] = None
+
+    @classmethod
+    def for_stats(cls, season: Season, player_stats: Collection[PlayerStats], num_top_players: int) -> LinearProbeTable[str, Awards]:
+        """
+        Builds the awards for several player stats with a single pass over the players in the season.
+
+        Args:
+            season (Season): The season we are generating the awards for.
+            player_stats (Collection[PlayerStats]): The player stats to build awards for.
+            num_top_players (int): The number of players to track on each leaderboard.
+
+        Returns:
+            LinearProbeTable[str, Awards]: The awards keyed by the value of their player stat.
+
+        Raises:
+            ValueError: When num_top_players is not positive or no player stats are given.
+
+        Complexity:
+            Best Case Complexity: O(P * A * (k + log(k) * hash)) where P is the number of players in the season,
+                                  A is the number of awards and k is num_top_players
+            Worst Case Complexity: O(P * A * (k + log(k) * hash)) where P is the number of players in the season,
+                                   A is the number of awards and k is num_top_players
+        """
+        if len(player_stats) == 0:
+            raise ValueError("At least one player stat is needed to build awards.")
+
+        group = ArrayR(len(player_stats))
+        for i, player_stat in enumerate(player_stats):
+            awards = cls.__new__(cls)
+            awards._setup(season, player_stat, num_top_players)
+            group[i] = awards
+
+        res = LinearProbeTable()
+        for awards in group:
+            awards.group = group
+            res[awards.player_stat.value] = awards
+            season.subscribe(awards)
+        Awards._refresh_group(season, group)
+        return res
+
+    @staticmethod
+    def _compare_priorities(first: tuple[int, str], second: tuple[int, str]) -> int:
+        """
+        Orders (stat value, player name) priorities by stat value descending then name ascending.
+
+        Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(comp(str)) when the stat values are equal
+        """
+        if first[0] != second[0]:
+            return second[0] - first[0]
+        if first[1] < second[1]:
+            return -1
+        elif first[1] > second[1]:
+            return 1
+        return 0
+
+    def _offer(self, key: str, priority: tuple[int, str], player: Player) -> None:
+        """
+        Offers a player to the top players heap.
+
+        Complexity:
+            Best Case Complexity: O(1) when the player does not make the leaderboard
+            Worst Case Complexity: O(k + log(k) * hash) where k is num_top_players
+        """
+        if self.top_players.offer(key, priority, player):
+            self.ranking = None
+
+    def refresh(self) -> None:
+        """
+        Rebuilds the top players from every player in the season.
+        Awards built together with for_stats are rebuilt together.
+        Only needed after player stats are changed outside of simulate_season.
+
+        Complexity:
+            Best Case Complexity: O(P * A * (k + log(k) * hash)) where P is the number of players in the season
+                                  and A is the number of awards built together
+            Worst Case Complexity: O(P * A * (k + log(k) * hash)) where P is the number of players in the season
+                                   and A is the number of awards built together
+        """
+        Awards._refresh_group(self.season, self.group)
+
+    @staticmethod
+    def _refresh_group(season: Season, group: ArrayR[Awards]) -> None:
+        """
+        Rebuilds every awards in the group with one traversal of the season.
+        The heap key, the player name and the stats view are computed once per player
+        and shared between all the awards.
+
+        Complexity:
+            Best Case Complexity: O(P * A * (k + log(k) * hash)) where P is the number of players and A is len(group)
+            Worst Case Complexity: O(P * A * (k + log(k) * hash)) where P is the number of players and A is len(group)
+        """
+        stat_indices = ArrayR(len(group))
+        for i, awards in enumerate(group):
+            awards.top_players.clear()
+            awards.ranking = None
+            stat_indices[i] = awards.player_stat.index
+
+        for team in season.get_teams():
+            players = team.get_players()
+            if players is None:
+                continue
+            for player in players:
+                key = str(player.get_number())
+                name = player.get_name()
+                statistics = player.get_statistics()
+                for i, awards in enumerate(group):
+                    awards._offer(key, (statistics[stat_indices[i]], name), player)
+
+        for awards in group:
+            awards.stale = False
+            awards.epoch = season.stats_epoch.value
+
+    def on_stat_change(self, player: Player, stat: PlayerStats) -> None:
+        """
+        Called by the season whenever a player stat changes.
+        Stats only grow during a season, so a player can only move up the leaderboard.
+        If a tracked player ever drops, a player outside the heap may now belong in it,
+        so the leaderboard is rebuilt the next time it is requested.
+
+        Complexity:
+            Best Case Complexity: O(1) when the stat is not the awarded one
+            Worst Case Complexity: O(k + log(k) * hash) where k is num_top_players
+        """
+        if stat != self.player_stat or self.stale:
+            return
+        if self.epoch != self.season.stats_epoch.value:
+            self.stale = True
+            return
+
+        priority = (player[stat], player.get_name())
+        key = str(player.get_number())
+        if key in self.top_players and Awards._compare_priorities(priority, self.top_players.priority_of(key)) > 0:
+            self.stale = True
+            return
+        self._offer(key, priority, player)
+
+    def _ranked_players(self) -> Union[ArrayR[Player], None]:
+        """
+        Returns the top players best ranked first, or None if the season has no players.
+
+        Complexity:
+            Best Case Complexity: O(1) when the ranking has not changed since the last call
+            Worst Case Complexity: O(k) where k is num_top_players, or as refresh when the awards have to be rebuilt
         """
-        raise NotImplementedError
+        if self.stale or self.epoch != self.season.stats_epoch.value:
+            self.refresh()
+        if self.ranking is None:
+            self.ranking = self.top_players.sorted_items()
+        return self.ranking
 
-    def get_leaderboard(self) -> ArrayR[ArrayR[int | str]]:
+    def get_leaderboard(self) -> Union[ArrayR[ArrayR[Union[int, str]]], None]:
         """
         Generates the leaderboard of awards.
 
         Returns:
             ArrayR(ArrayR[ArrayR[int | str]]):
-                Outer array represents each team in the leaderboard
+                Outer array represents each player in the leaderboard, best ranked first
                 Inner array consists of 10 elements:
                     - Player Name (str)
                     - Games Played (int)
@@ -34,12 +220,26 @@ class Awards:
                     - Weak Foot Ability (int)
                     - Weight (int)
                     - Height (int)
+            or
+            None if the season has no players.
 
         Complexity:
-            Best Case Complexity:
-            Worst Case Complexity:
+            Best Case Complexity: O(k) where k is num_top_players, the heap keeps its entries in rank order
+            Worst Case Complexity: O(P * (k + log(k) * hash)) when the awards have to be rebuilt after a reset
+                                   or after a tracked player's stat dropped
         """
-        raise NotImplementedError
+        ranking = self._ranked_players()
+        if ranking is None:
+            return None
+
+        leaderboard = ArrayR(len(ranking))
+        for i in range(len(ranking)):
+            player = ranking[i]
+            row = ArrayR(len(PlayerStats) + 1)
+            row[0] = player.get_name()
+            player.get_statistics().copy_into(row, 1)
+            leaderboard[i] = row
+        return leaderboard
 
     def __str__(self) -> str:
         """
@@ -54,9 +254,132 @@ class Awards:
         Complexity:
             Analysis not required.
         """
-        raise NotImplementedError
+        leaderboard = self.get_leaderboard()
+        if leaderboard is None:
+            return f"{self.player_stat.value} Awards: no players"
+        stat_index = self.player_stat.index + 1
+        result = f"{self.player_stat.value} Awards\n"
+        for i, row in enumerate(leaderboard):
+            result += f"{i + 1}. {row[0]} ({row[stat_index]})\n"
+        return result
 
     def __repr__(self) -> str:
         """Returns a string representation of the Awards object.
         Useful for debugging or when the Awards are held in another data structure."""
         return str(self)
+
+
+class AwardHistory(SeasonSubscriber):
+    """
+    Records the leaderboard of an award at the end of every week of the season.
+
+    Only the (rank, player name, stat value) entries that changed since the previous week are stored,
+    so the history takes O(W + C) memory over W weeks and C changes. The leaderboard of a week is
+    rebuilt when it is queried, by replaying the changes of every week up to it.
+    """
+
+    def __init__(self, awards: Awards) -> None:
+        """
+        Args:
+            awards (Awards): The awards to record. The history follows the same season.
+
+        Complexity:
+            Best Case Complexity: O(W) where W is the number of weeks in the season
+            Worst Case Complexity: O(W) where W is the number of weeks in the season
+        """
+        self.awards = awards
+        #per recorded week, the leaderboard length and the changed entries or None if nothing changed
+        self.weeks: ArrayR[Union[tuple[int, Union[LinkedList[tuple[int, str, int]], None]], None]] = ArrayR(len(awards.season.schedule))
+        #entries of the last recorded week, to find the changes of the next one
+        self.latest: Union[ArrayR[tuple[str, int]], None] = None
+        self.last_week = 0
+        self.changes = 0
+        awards.season.subscribe(self)
+
+    def on_week_end(self, week: int) -> None:
+        """
+        Records the entries of the leaderboard that changed since the previous week.
+        A week that does not follow the last recorded one, as when a season is simulated again,
+        starts a new history: all its entries are recorded and later weeks are forgotten.
+
+        Complexity:
+            Best Case Complexity: O(k) where k is the number of players on the leaderboard
+            Worst Case Complexity: O(k) where k is the number of players on the leaderboard
+        """
+        if week != self.last_week + 1:
+            self.latest = None
+            for i in range(week, len(self.weeks)):
+                self.weeks[i] = None
+        self.last_week = week
+
+        ranking = self.awards._ranked_players()
+        if ranking is None:
+            self.latest = None
+            self.weeks[week - 1] = (0, None)
+            return
+
+        entries = ArrayR(len(ranking))
+        changed = None
+        for i, player in enumerate(ranking):
+            entries[i] = (player.get_name(), player[self.awards.player_stat])
+            if self.latest is None or i >= len(self.latest) or entries[i] != self.latest[i]:
+                if changed is None:
+                    changed = LinkedList()
+                changed.append((i, entries[i][0], entries[i][1]))
+        if changed is not None:
+            self.changes += len(changed)
+        self.latest = entries
+        self.weeks[week - 1] = (len(entries), changed)
+
+    def get_week(self, week: int) -> Union[ArrayR[ArrayR[Union[int, str]]], None]:
+        """
+        Returns the leaderboard as it was at the end of a week.
+
+        Args:
+            week (int): The week number, starting from 1.
+
+        Returns:
+            ArrayR[ArrayR[Union[int, str]]]:
+                Outer array represents each player in the leaderboard, best ranked first
+                Inner array consists of 2 elements:
+                    - Player Name (str)
+                    - The awarded stat (int)
+            or
+            None if the week has not been simulated yet or the season has no players.
+
+        Raises:
+            IndexError: When the week is not part of the season.
+
+        Complexity:
+            Best Case Complexity: O(1) when the week has not been recorded
+            Worst Case Complexity: O(week + C + k) where C is the number of changes recorded up to the week
+                                   and k is the number of players on the leaderboard
+        """
+        if not 1 <= week <= len(self.weeks):
+            raise IndexError(f"Week {week} is not part of the season")
+        if self.weeks[week - 1] is None or self.weeks[week - 1][0] == 0:
+            return None
+
+        length = self.weeks[week - 1][0]
+        entries = ArrayR(length)
+        for i in range(week):
+            if self.weeks[i] is None or self.weeks[i][1] is None:
+                continue
+            for rank, name, value in self.weeks[i][1]:
+                if rank < length:
+                    entries[rank] = (name, value)
+
+        res = ArrayR(length)
+        for i in range(length):
+            res[i] = ArrayR.from_list([entries[i][0], entries[i][1]])
+        return res
+
+    def __str__(self) -> str:
+        """
+        Complexity:
+            Analysis not required.
+        """
+        return f"{self.awards.player_stat.value} history ({self.changes} rank changes)"
+
+    def __repr__(self) -> str:
+        return str(self)
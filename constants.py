@@ -34,6 +34,10 @@ class PlayerStats(Enum):
     WEIGHT = "Weight"
     HEIGHT = "Height"
 
+    def __init__(self, value: str) -> None:
+        #position of the stat in PlayerStats order, members are created in order
+        self.index = len(self.__class__.__members__)
+
 
 class TeamStats(Enum):
     GAMES_PLAYED = "Games Played"
@@ -0,0 +1,252 @@
+""" Thread-safe Hash Table ADT
+
+Defines a Hash Table that can be shared between threads. Keys are spread
+over a fixed number of segments, each a LinearProbeTable with its own lock,
+so writers only block other writers of the same segment and every segment
+resizes on its own.
+
+Reads do not take the lock. Writers update the key, value and hash arrays
+of a segment's table in place, so a read can see a half-written entry. Each
+segment therefore keeps a version counter (a seqlock) that writers make odd while they change
+the segment and even again once they are done. A read that saw the same
+even version before and after probing cannot have overlapped a write, so
+its result is used; otherwise it is repeated under the segment lock.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Callable, Generic, Iterator, TypeVar, Union
+from data_structures.hash_functions import HashFunction
+from data_structures.hash_table import LinearProbeTable
+from data_structures.referential_array import ArrayR
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class _Segment(Generic[K, V]):
+    """ One lock stripe: a table, the lock guarding writes to it and its seqlock version. """
+
+    def __init__(self, table: LinearProbeTable[K, V]) -> None:
+        self.table = table
+        self.lock = threading.Lock()
+        self.version = 0
+
+
+class ConcurrentHashTable(Generic[K, V]):
+    """
+    Concurrent Hash Table.
+
+    Type Arguments:
+        - K:    Key Type. Has to be hashable, in most cases should be string.
+        - V:    Value Type.
+
+    Attributes:
+        segments: the lock stripes, a key always lives in segment `_segment_index(key)`
+
+    Single key operations are atomic. len and iteration are weakly consistent:
+    they see each segment at some point during the call, not all at once.
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    DEFAULT_SEGMENTS = 16
+
+    def __init__(self, segments: int = DEFAULT_SEGMENTS, hash_function: Union[HashFunction[K], None] = None) -> None:
+        """
+        :param segments: number of lock stripes, the most writers that can run at once
+        :param hash_function: hash strategy used within every segment, PolynomialHash by default
+        :complexity: O(S) where S is the number of segments
+        :raises ValueError: when segments is not positive
+        """
+        if segments <= 0:
+            raise ValueError("A concurrent table needs at least one segment.")
+        self.segments: ArrayR[_Segment[K, V]] = ArrayR(segments)
+        for i in range(segments):
+            self.segments[i] = _Segment(LinearProbeTable(hash_function=hash_function))
+
+    def _segment_index(self, key: K) -> int:
+        """
+        Segment of a key. Uses Python's built-in hash, which is cached for strings,
+        so choosing the segment does not hash the key a second time in Python.
+        """
+        return hash(key) % len(self.segments)
+
+    def _segment(self, key: K) -> _Segment[K, V]:
+        return self.segments[self._segment_index(key)]
+
+    def __len__(self) -> int:
+        """
+        :complexity: O(S) where S is the number of segments
+        """
+        return sum(len(segment.table) for segment in self.segments)
+
+    def is_empty(self) -> bool:
+        """
+        :complexity: O(S) where S is the number of segments
+        """
+        return len(self) == 0
+
+    def __getitem__(self, key: K) -> V:
+        """
+        Get the value at a certain key without locking, unless a write to the
+        segment overlapped the read.
+
+        :complexity: See LinearProbeTable.__getitem__.
+        :raises KeyError: when the key doesn't exist.
+        """
+        segment = self._segment(key)
+        version = segment.version
+        if version % 2 == 0:
+            try:
+                value = segment.table[key]
+            except KeyError:
+                if segment.version == version:
+                    raise
+            except (IndexError, TypeError):
+                # The probe ran into a cluster being shifted or an array being replaced.
+                pass
+            else:
+                if segment.version == version:
+                    return value
+        with segment.lock:
+            return segment.table[key]
+
+    def get(self, key: K, default: Union[V, None] = None) -> Union[V, None]:
+        """
+        Returns the value at key, or default when the key doesn't exist.
+
+        :complexity: See __getitem__.
+        """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: K) -> bool:
+        """
+        :complexity: See __getitem__.
+        """
+        try:
+            _ = self[key]
+        except KeyError:
+            return False
+        else:
+            return True
+
+    def __setitem__(self, key: K, data: V) -> None:
+        """
+        Set an (key, value) pair, blocking only writers to the same segment.
+
+        :complexity: See LinearProbeTable.__setitem__.
+        """
+        segment = self._segment(key)
+        with segment.lock:
+            segment.version += 1
+            try:
+                segment.table[key] = data
+            finally:
+                segment.version += 1
+
+    def __delitem__(self, key: K) -> None:
+        """
+        Deletes a (key, value) pair, blocking only writers to the same segment.
+
+        :complexity: See LinearProbeTable.__delitem__.
+        :raises KeyError: when the key doesn't exist.
+        """
+        segment = self._segment(key)
+        with segment.lock:
+            segment.version += 1
+            try:
+                del segment.table[key]
+            finally:
+                segment.version += 1
+
+    def compute(self, key: K, function: Callable[[Union[V, None]], V], default: Union[V, None] = None) -> V:
+        """
+        Atomically replaces the value at key with function(value), using default when
+        the key doesn't exist yet. Used for read-modify-write updates such as counters.
+        function runs under the segment lock, so it must not use this table.
+
+        :returns: the new value
+        :complexity: O(function) + See LinearProbeTable.__setitem__.
+        """
+        segment = self._segment(key)
+        with segment.lock:
+            try:
+                value = segment.table[key]
+            except KeyError:
+                value = default
+            value = function(value)
+            segment.version += 1
+            try:
+                segment.table[key] = value
+            finally:
+                segment.version += 1
+            return value
+
+    def _segment_items(self, segment: _Segment[K, V]) -> ArrayR[tuple[K, V]]:
+        """
+        Copies the entries of a segment under its lock, so iterating never holds a lock.
+
+        :complexity: O(M) where M is the segment's table size
+        """
+        with segment.lock:
+            res = ArrayR(max(1, len(segment.table)))
+            for i, item in enumerate(segment.table.items()):
+                res[i] = item
+            return res
+
+    def items(self) -> Iterator[tuple[K, V]]:
+        """
+        Yields every (key, value) pair, one segment at a time.
+        Other threads may write while iterating; a change is seen only if its
+        segment has not been copied yet.
+
+        :complexity: O(M) where M is the total table size, with O(m) extra memory
+        where m is the largest segment's size
+        """
+        for segment in self.segments:
+            entries = self._segment_items(segment)
+            for i in range(len(entries)):
+                if entries[i] is not None:
+                    yield entries[i]
+
+    def iter_keys(self) -> Iterator[K]:
+        """
+        :complexity: See items.
+        """
+        for key, _ in self.items():
+            yield key
+
+    def iter_values(self) -> Iterator[V]:
+        """
+        :complexity: See items.
+        """
+        for _, value in self.items():
+            yield value
+
+    def keys(self) -> list[K]:
+        """
+        Returns all keys in the hash table.
+
+        :complexity: See items.
+        """
+        return [key for key in self.iter_keys()]
+
+    def values(self) -> list[V]:
+        """
+        Returns all values in the hash table.
+
+        :complexity: See items.
+        """
+        return [value for value in self.iter_values()]
+
+    def __str__(self) -> str:
+        """
+        :complexity: O(M * (str(key) + str(value))) where M is the total table size
+        """
+        result = ""
+        for key, value in self.items():
+            result += "(" + str(key) + "," + str(value) + ")\n"
+        return result
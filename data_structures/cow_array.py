@@ -0,0 +1,191 @@
+""" Copy-on-write arrays and table snapshots.
+
+A CowArray stores its items in fixed-size segments, listed in a directory.
+Cloning an array shares the directory and every segment with the clone, so
+it takes O(1) time whatever the length. Each array carries an owner token,
+and a segment may only be written in place by the array whose token it
+carries. Cloning gives both arrays new tokens, so the first write to a
+shared segment copies just that segment (and, once, the directory).
+
+CowTable builds table snapshots on top of this. The first clone of a table
+that still has plain arrays moves them into CowArrays, which the table then
+keeps, so that clone costs O(M) once and every later clone of either table
+costs O(1). Each branch only copies the segments it writes to.
+"""
+from __future__ import annotations
+
+import copy
+from typing import Generic, TypeVar
+from data_structures.referential_array import ArrayR
+from data_structures.table_stats import InstrumentedTable
+
+T = TypeVar('T')
+
+
+class _Segment(Generic[T]):
+    """ A run of items and the token of the one array allowed to write to them in place. """
+    __slots__ = ('owner', 'items')
+
+    def __init__(self, owner: object, items: ArrayR[T]) -> None:
+        self.owner = owner
+        self.items = items
+
+
+class CowArray(Generic[T]):
+    """
+    Copy-on-write array of references, usable wherever an ArrayR is indexed.
+
+    Attributes:
+        length: number of items
+        segments: directory of the segments, all SEGMENT_SIZE long except possibly the last
+        owner: token marking the segments this array may write in place
+        owns_directory: whether the directory may be written in place
+    """
+
+    SEGMENT_SIZE = 32
+
+    def __init__(self, length: int) -> None:
+        """
+        Creates an array of the given length holding None.
+
+        :complexity: O(length)
+        :raises ValueError: when length is not positive
+        """
+        if length <= 0:
+            raise ValueError("Array length should be larger than 0.")
+        self.length = length
+        self.owner = object()
+        self.owns_directory = True
+        self.segments: ArrayR[_Segment[T]] = ArrayR((length + self.SEGMENT_SIZE - 1) // self.SEGMENT_SIZE)
+        for i in range(len(self.segments)):
+            self.segments[i] = _Segment(self.owner, ArrayR(min(self.SEGMENT_SIZE, length - i * self.SEGMENT_SIZE)))
+
+    @classmethod
+    def from_array(cls, array: ArrayR[T]) -> CowArray[T]:
+        """
+        Copies an ArrayR into a new CowArray.
+
+        :complexity: O(n) where n is the length of the array
+        """
+        res = cls(len(array))
+        for i in range(len(array)):
+            res.segments[i // cls.SEGMENT_SIZE].items[i % cls.SEGMENT_SIZE] = array[i]
+        return res
+
+    def clone(self) -> CowArray[T]:
+        """
+        Returns an array with the same items, sharing every segment until either array writes to it.
+
+        :complexity: O(1)
+        """
+        res = object.__new__(type(self))
+        res.length = self.length
+        res.segments = self.segments
+        res.owner = object()
+        res.owns_directory = False
+        self.owner = object()
+        self.owns_directory = False
+        return res
+
+    def __len__(self) -> int:
+        """
+        :complexity: O(1)
+        """
+        return self.length
+
+    def _check_index(self, index: int) -> int:
+        if index < 0:
+            index += self.length
+            if index < 0:
+                raise IndexError("invalid index")
+        return index
+
+    def __getitem__(self, index: int) -> T:
+        """
+        :complexity: O(1)
+        :raises IndexError: when the index is out of range
+        """
+        index = self._check_index(index)
+        return self.segments[index // self.SEGMENT_SIZE].items[index % self.SEGMENT_SIZE]
+
+    def __setitem__(self, index: int, value: T) -> None:
+        """
+        Sets an item, first copying the directory and the item's segment if they are shared.
+
+        :complexity: O(1) when the segment is owned, otherwise O(SEGMENT_SIZE) plus O(n / SEGMENT_SIZE)
+        for the first write after a clone, where n is the length of the array
+        :raises IndexError: when the index is out of range
+        """
+        index = self._check_index(index)
+        if not self.owns_directory:
+            directory = ArrayR(len(self.segments))
+            for i in range(len(directory)):
+                directory[i] = self.segments[i]
+            self.segments = directory
+            self.owns_directory = True
+        segment = self.segments[index // self.SEGMENT_SIZE]
+        if segment.owner is not self.owner:
+            items = ArrayR(len(segment.items))
+            for i in range(len(items)):
+                items[i] = segment.items[i]
+            segment = _Segment(self.owner, items)
+            self.segments[index // self.SEGMENT_SIZE] = segment
+        segment.items[index % self.SEGMENT_SIZE] = value
+
+    def to_list(self) -> list:
+        """
+        :complexity: O(n) where n is the length of the array
+        """
+        return [self[i] for i in range(len(self))]
+
+    def __str__(self) -> str:
+        """
+        :complexity: O(n) where n is the length of the array
+        """
+        return str(self.to_list())
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+class CowTable:
+    """
+    Mixin adding O(1) clone() to tables backed by arrays.
+
+    Subclasses list their backing arrays in COW_ARRAYS, and in CLONED_ATTRIBUTES any other
+    mutable attribute the clone needs its own shallow copy of (e.g. a stateful resize policy).
+    Table methods only index their arrays, so they work the same on CowArrays.
+    """
+
+    COW_ARRAYS: tuple[str, ...] = ()
+    CLONED_ATTRIBUTES: tuple[str, ...] = ()
+
+    def clone(self):
+        """
+        Returns a table with the same entries. Both tables keep working independently.
+        A table with plain arrays first moves them into CowArrays and keeps those.
+        The table then shares their segments with the clone, after which each of the
+        two copies the segments it writes to. A rebuild (growing, shrinking, compacting
+        or reseeding) gives a table plain arrays again.
+        Values are shared, not copied. The clone starts with stats disabled.
+
+        :complexity: O(1) for a table backed by CowArrays, otherwise O(M) where M is the table size
+        """
+        state = dict(self.__dict__)
+        if isinstance(self, InstrumentedTable) and self.stats_enabled():
+            # The wrappers count into this table's stats, the clone gets back the methods they replaced
+            for name in self.INSTRUMENTED_METHODS:
+                del state[name]
+            state.update(self._replaced_methods)
+            del state['_table_stats'], state['_replaced_methods']
+        res = object.__new__(type(self))
+        res.__dict__.update(state)
+        for name in self.COW_ARRAYS:
+            array = getattr(self, name)
+            if not isinstance(array, CowArray):
+                array = CowArray.from_array(array)
+                setattr(self, name, array)
+            setattr(res, name, array.clone())
+        for name in self.CLONED_ATTRIBUTES:
+            setattr(res, name, copy.copy(getattr(self, name)))
+        return res
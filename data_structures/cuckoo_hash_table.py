@@ -0,0 +1,371 @@
+""" Hash Table ADT using cuckoo hashing.
+
+Defines a Hash Table where every key has exactly two possible slots, one in
+each half of the table, chosen by two independent hash functions. A lookup
+checks those two slots and a small stash, so it examines a constant number
+of slots whatever the keys are.
+
+An insert that finds both slots taken evicts the entry in the first one,
+which moves to its own other slot, possibly evicting another entry in turn.
+The number of evictions is bounded; an entry still left over goes to the
+stash. Once the stash is full too, the keys have formed a cycle the hash
+functions cannot resolve, so both are reseeded and the table rebuilt, and it
+grows if a few reseeds do not help. Like the other tables, every slot caches
+the full-width hashes of its key, so rebuilding at a new size never re-hashes.
+"""
+from __future__ import annotations
+
+from typing import Generic, Iterator, TypeVar, Union
+from data_structures.cow_array import CowTable
+from data_structures.hash_functions import HashFunction, PolynomialHash
+from data_structures.referential_array import ArrayR
+from data_structures.table_sizes import size_at
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class CuckooHashTable(CowTable, Generic[K, V]):
+    """
+    Cuckoo Hash Table.
+
+    Type Arguments:
+        - K:    Key Type. In most cases should be string.
+                Otherwise matching hash functions should be given.
+        - V:    Value Type.
+
+    Attributes:
+        key_array, value_array: key and value of the entry in every slot
+        hash_array, alt_array: full-width first and second hash of the key in every slot, None for empty slots
+        stash: (key, value, hash, alt_hash) entries that found no slot
+        count: number of entries
+
+    The first half of the arrays holds the slots chosen by `hash`, the second half those chosen by `hash2`.
+    Lookups and deletes examine at most 2 + STASH_SIZE slots.
+    clone() returns a copy-on-write snapshot, in O(1) once the table has been cloned before.
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    # Size of each half, continued with generated primes once a table outgrows them.
+    TABLE_SIZES = [5, 13, 29, 53, 97, 193, 389, 769, 1543, 3079, 6151, 12289, 24593, 49157, 98317, 196613, 393241, 786433, 1572869]
+
+    # Two-way cuckoo tables fail to place keys quickly as the load nears 1/2.
+    MAX_LOAD = 0.45
+
+    STASH_SIZE = 4
+
+    # An insert evicts at most EVICTION_FACTOR * log2(table_size) entries before using the stash.
+    EVICTION_FACTOR = 3
+
+    # Reseeds at one size before the table grows instead.
+    MAX_RESEEDS = 3
+
+    COW_ARRAYS = ('key_array', 'value_array', 'hash_array', 'alt_array', 'stash')
+
+    def __init__(self, sizes=None, hash_function: Union[HashFunction[K], None] = None, alt_function: Union[HashFunction[K], None] = None) -> None:
+        """
+        Initialise the Hash Table.
+
+        :param sizes: sizes of each half to use instead of TABLE_SIZES
+        :param hash_function: hash strategy choosing the slot in the first half, PolynomialHash by default
+        :param alt_function: independent hash strategy for the second half, a reseeded copy of hash_function by default
+        """
+        if sizes is not None:
+            self.TABLE_SIZES = sizes
+        self.hash_function = hash_function if hash_function is not None else PolynomialHash()
+        self.alt_function = alt_function if alt_function is not None else self.hash_function.reseeded()
+        self.size_index = 0
+        self._allocate(self.TABLE_SIZES[self.size_index])
+        self.count = 0
+
+    def hash(self, key: K) -> int:
+        """
+        Full-width hash choosing the slot of a key in the first half.
+
+        :complexity: O(hash_function(key)), O(len(key)) for the default strategy
+        """
+        return self.hash_function(key)
+
+    def hash2(self, key: K) -> int:
+        """
+        Full-width hash choosing the slot of a key in the second half, independent of `hash`.
+
+        :complexity: O(alt_function(key)), O(len(key)) for the default strategy
+        """
+        return self.alt_function(key)
+
+    @property
+    def table_size(self) -> int:
+        """
+        Number of slots in both halves, not counting the stash.
+        """
+        return len(self.hash_array)
+
+    def __len__(self) -> int:
+        """
+        Returns number of elements in the hash table
+        """
+        return self.count
+
+    def is_empty(self) -> bool:
+        return self.count == 0
+
+    def _allocate(self, half_size: int) -> None:
+        """
+        Replace the storage with empty arrays of two halves of the given size and an empty stash.
+
+        :complexity: O(M) where M is the half size
+        """
+        self.half_size = half_size
+        self.key_array: ArrayR[K] = ArrayR(2 * half_size)
+        self.value_array: ArrayR[V] = ArrayR(2 * half_size)
+        self.hash_array: ArrayR[int] = ArrayR(2 * half_size)
+        self.alt_array: ArrayR[int] = ArrayR(2 * half_size)
+        self.stash: ArrayR[tuple[K, V, int, int]] = ArrayR(self.STASH_SIZE)
+        self.stash_count = 0
+
+    def _positions(self, key_hash: int, alt_hash: int) -> tuple[int, int]:
+        """
+        The two slots a pair of hashes may use, one in each half.
+        """
+        return key_hash % self.half_size, self.half_size + alt_hash % self.half_size
+
+    def _find(self, key: K, key_hash: int, alt_hash: int) -> int:
+        """
+        Position of a key, or -(i + 1) when it is at index i of the stash.
+
+        :complexity: O(comp(K)), at most 2 + STASH_SIZE slots are examined
+        :raises KeyError: when the key is not in the table.
+        """
+        for position in self._positions(key_hash, alt_hash):
+            if self.hash_array[position] == key_hash and self.key_array[position] == key:
+                return position
+        for i in range(self.stash_count):
+            if self.stash[i][2] == key_hash and self.stash[i][0] == key:
+                return -(i + 1)
+        raise KeyError(key)
+
+    def __getitem__(self, key: K) -> V:
+        """
+        Get the value at a certain key
+
+        :complexity: O(hash(key) + comp(K)), see _find.
+        :raises KeyError: when the key doesn't exist.
+        """
+        position = self._find(key, self.hash(key), self.hash2(key))
+        if position < 0:
+            return self.stash[-position - 1][1]
+        return self.value_array[position]
+
+    def __contains__(self, key: K) -> bool:
+        """
+        Checks to see if the given key is in the Hash Table
+
+        :complexity: See __getitem__.
+        """
+        try:
+            self._find(key, self.hash(key), self.hash2(key))
+        except KeyError:
+            return False
+        else:
+            return True
+
+    def __setitem__(self, key: K, data: V) -> None:
+        """
+        Set an (key, value) pair in our hash table.
+        Updating an existing key only overwrites its value.
+
+        :complexity best: O(hash(key)) one of the two slots is free.
+        :complexity worst: O(hash(key) + log(M)) evictions, plus O(N + M) amortised when the table has to be rebuilt.
+        Where N is len(self) and M is the table size
+        """
+        key_hash, alt_hash = self.hash(key), self.hash2(key)
+        try:
+            position = self._find(key, key_hash, alt_hash)
+        except KeyError:
+            pass
+        else:
+            if position < 0:
+                self.stash[-position - 1] = (key, data, key_hash, alt_hash)
+            else:
+                self.value_array[position] = data
+            return
+
+        self.count += 1
+        leftover = self._place(key, data, key_hash, alt_hash)
+        if leftover is not None or self.count > self.table_size * self.MAX_LOAD:
+            self._rehash(leftover)
+
+    def _place(self, key: K, data: V, key_hash: int, alt_hash: int) -> Union[tuple[K, V, int, int], None]:
+        """
+        Place an entry known not to be in the table, evicting entries along the way if both of its slots are taken.
+        An entry still homeless after the eviction limit goes to the stash.
+
+        :returns: None, or the entry left homeless once the stash is full too
+        :complexity best: O(1) one of the two slots is free.
+        :complexity worst: O(log(M)) where M is the table size.
+        """
+        first, second = self._positions(key_hash, alt_hash)
+        if self.hash_array[first] is None:
+            self._store(first, key, data, key_hash, alt_hash)
+            return None
+        if self.hash_array[second] is None:
+            self._store(second, key, data, key_hash, alt_hash)
+            return None
+
+        position = first
+        for _ in range(self.EVICTION_FACTOR * self.half_size.bit_length()):
+            # Swap the carried entry into the slot and carry its occupant on instead.
+            evicted = (self.key_array[position], self.value_array[position], self.hash_array[position], self.alt_array[position])
+            self._store(position, key, data, key_hash, alt_hash)
+            key, data, key_hash, alt_hash = evicted
+            first, second = self._positions(key_hash, alt_hash)
+            position = second if position == first else first
+            if self.hash_array[position] is None:
+                self._store(position, key, data, key_hash, alt_hash)
+                return None
+
+        if self.stash_count < self.STASH_SIZE:
+            self.stash[self.stash_count] = (key, data, key_hash, alt_hash)
+            self.stash_count += 1
+            return None
+        return key, data, key_hash, alt_hash
+
+    def _store(self, position: int, key: K, data: V, key_hash: int, alt_hash: int) -> None:
+        self.key_array[position] = key
+        self.value_array[position] = data
+        self.hash_array[position] = key_hash
+        self.alt_array[position] = alt_hash
+
+    def __delitem__(self, key: K) -> None:
+        """
+        Deletes a (key, value) pair in our hash table.
+
+        :complexity: See __getitem__.
+        :raises KeyError: when the key doesn't exist.
+        """
+        position = self._find(key, self.hash(key), self.hash2(key))
+        if position < 0:
+            # Keep the stash packed at the front
+            i = -position - 1
+            self.stash_count -= 1
+            self.stash[i] = self.stash[self.stash_count]
+            self.stash[self.stash_count] = None
+        else:
+            self._store(position, None, None, None, None)
+        self.count -= 1
+
+    def _rehash(self, leftover: Union[tuple[K, V, int, int], None]) -> None:
+        """
+        Rebuild the table, together with an entry that could not be placed.
+        A table over MAX_LOAD grows. Otherwise both hash functions are reseeded, as the keys
+        form a cycle they cannot resolve, and the table only grows if MAX_RESEEDS reseeds do not help.
+
+        :complexity: O(N + M) expected, where N is len(self) and M the new table size,
+        plus O(N * hash(K)) for every reseed
+        """
+        entries = ArrayR(self.count)
+        i = 0
+        for position in range(self.table_size):
+            if self.hash_array[position] is not None:
+                entries[i] = (self.key_array[position], self.value_array[position], self.hash_array[position], self.alt_array[position])
+                i += 1
+        for j in range(self.stash_count):
+            entries[i] = self.stash[j]
+            i += 1
+        if leftover is not None:
+            entries[i] = leftover
+
+        size_index = self.size_index
+        reseed = leftover is not None and self.count <= self.table_size * self.MAX_LOAD
+        reseeds = 0
+        while True:
+            if reseed and reseeds < self.MAX_RESEEDS:
+                reseeds += 1
+                self.hash_function = self.hash_function.reseeded()
+                self.alt_function = self.alt_function.reseeded()
+            else:
+                size_index += 1
+                reseeds = 0
+            if self._rebuild(entries, size_index, reseeds > 0):
+                self.size_index = size_index
+                return
+            reseed = True
+
+    def _rebuild(self, entries: ArrayR[tuple[K, V, int, int]], size_index: int, rehash: bool) -> bool:
+        """
+        Place every entry into empty arrays with halves of size TABLE_SIZES[size_index].
+
+        :param rehash: recompute both hashes of every key instead of using the cached ones
+        :returns: whether every entry found a slot or a place in the stash
+        :complexity: O(N log(M) + M) where N is the number of entries and M the half size, plus O(N * hash(K)) to rehash
+        """
+        if rehash:
+            for i in range(len(entries)):
+                key, data, _, _ = entries[i]
+                entries[i] = (key, data, self.hash(key), self.hash2(key))
+        self._allocate(size_at(self.TABLE_SIZES, size_index))
+        for i in range(len(entries)):
+            if self._place(*entries[i]) is not None:
+                return False
+        return True
+
+    def items(self) -> Iterator[tuple[K, V]]:
+        """
+        Yields every (key, value) pair straight from the backing arrays, then the stash.
+        The table must not be modified while iterating.
+
+        :complexity: O(M) where M is self.table_size, with O(1) extra memory.
+        """
+        for position in range(self.table_size):
+            if self.hash_array[position] is not None:
+                yield self.key_array[position], self.value_array[position]
+        for i in range(self.stash_count):
+            yield self.stash[i][0], self.stash[i][1]
+
+    def iter_keys(self) -> Iterator[K]:
+        """
+        :complexity: See items.
+        """
+        for key, _ in self.items():
+            yield key
+
+    def iter_values(self) -> Iterator[V]:
+        """
+        :complexity: See items.
+        """
+        for _, value in self.items():
+            yield value
+
+    def keys(self) -> ArrayR[K]:
+        """
+        Returns all keys in the hash table.
+
+        :complexity: O(M) where M is self.table_size.
+        """
+        res = ArrayR(self.count)
+        for i, key in enumerate(self.iter_keys()):
+            res[i] = key
+        return res
+
+    def values(self) -> ArrayR[V]:
+        """
+        Returns all values in the hash table.
+
+        :complexity: O(M) where M is self.table_size.
+        """
+        res = ArrayR(self.count)
+        for i, value in enumerate(self.iter_values()):
+            res[i] = value
+        return res
+
+    def __str__(self) -> str:
+        """
+        Returns all they key/value pairs in our hash table (no particular
+        order).
+        :complexity: O(M * (str(key) + str(value))) where M is the table size
+        """
+        result = ""
+        for key, value in self.items():
+            result += "(" + str(key) + "," + str(value) + ")\n"
+        return result
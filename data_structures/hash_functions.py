@@ -0,0 +1,120 @@
+""" Hash function strategies for the hash tables.
+
+A hash function maps a key to a full-width, non-negative integer that does
+not depend on any table size. Tables reduce it modulo their size. Every
+strategy is seeded, and `reseeded` gives an independent member of the same
+family, which tables use to recover from abnormally long probe sequences.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Generic, TypeVar
+
+K = TypeVar('K')
+
+
+class HashFunction(ABC, Generic[K]):
+    """
+    Abstract seeded hash function.
+
+    Attributes:
+        seed: selects a member of the hash family
+    """
+    # Mersenne prime, every hash is in the range [0, HASH_MODULUS)
+    HASH_MODULUS = (1 << 61) - 1
+
+    # LCG constants (as in RandomGen) used to derive new seeds deterministically
+    SEED_A = 25214903917
+    SEED_C = 11
+    SEED_MOD = 1 << 48
+
+    def __init__(self, seed: int) -> None:
+        self.seed = seed
+
+    @abstractmethod
+    def __call__(self, key: K) -> int:
+        """ Returns the full-width hash of the key. """
+        pass
+
+    def reseeded(self) -> HashFunction[K]:
+        """
+        Returns a hash function of the same family with a new seed derived from this one.
+        Seeds are derived without touching RandomGen, so reseeding does not change simulations.
+
+        :complexity: O(1)
+        """
+        seed = (self.SEED_A * self.seed + self.SEED_C) % self.SEED_MOD
+        return type(self)(seed)
+
+    def __str__(self) -> str:
+        return f"{type(self).__name__}({self.seed})"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+class PolynomialHash(HashFunction[str]):
+    """
+    Polynomial string hash, with the seed as the starting coefficient.
+    Deterministic across processes. The default for every table.
+
+    The last character of a key always has coefficient 1, so on its own the
+    polynomial would give two keys differing only in their last character the
+    same hash difference under every seed. The polynomial value is therefore
+    passed through a seeded xorshift-multiply finaliser, which makes members
+    with different seeds behave independently.
+    """
+    DEFAULT_SEED = 31415
+    HASH_BASE = 31
+
+    # Finaliser constants (as in SplitMix64), working on 64 bit words.
+    MIX_MASK = (1 << 64) - 1
+    MIX_GOLDEN = 0x9E3779B97F4A7C15
+    MIX_A = 0xBF58476D1CE4E5B9
+    MIX_B = 0x94D049BB133111EB
+
+    def __init__(self, seed: int = DEFAULT_SEED) -> None:
+        # A zero coefficient would hash every key to its last character.
+        HashFunction.__init__(self, seed % (self.HASH_MODULUS - 1) or self.DEFAULT_SEED)
+        self.mix_key = self.seed * self.MIX_GOLDEN & self.MIX_MASK
+
+    def __call__(self, key: str) -> int:
+        """
+        :complexity: O(len(key))
+        """
+        value = 0
+        a = self.seed
+        for char in key:
+            value = (ord(char) + a * value) % self.HASH_MODULUS
+            a = a * self.HASH_BASE % (self.HASH_MODULUS - 1)
+        return self._finalise(value)
+
+    def _finalise(self, value: int) -> int:
+        """
+        Mixes a polynomial value with the seed, so every output bit depends on every input bit.
+
+        :complexity: O(1)
+        """
+        value ^= self.mix_key
+        value = (value ^ (value >> 30)) * self.MIX_A & self.MIX_MASK
+        value = (value ^ (value >> 27)) * self.MIX_B & self.MIX_MASK
+        value ^= value >> 31
+        return value % self.HASH_MODULUS
+
+
+class BuiltinHash(HashFunction[K]):
+    """
+    Seeded wrapper around Python's built-in hash, which runs in C.
+    Much faster for long keys, but string hashes change between processes
+    unless PYTHONHASHSEED is set, so table order is not reproducible between runs.
+    """
+    DEFAULT_SEED = 0
+
+    def __init__(self, seed: int = DEFAULT_SEED) -> None:
+        HashFunction.__init__(self, seed)
+
+    def __call__(self, key: K) -> int:
+        """
+        :complexity: O(len(key)) on the first call for a string, O(1) afterwards as Python caches it
+        """
+        return hash((self.seed, key)) % self.HASH_MODULUS
@@ -1,14 +1,29 @@
 """ Hash Table ADT
 
 Defines a Hash Table using Linear Probing for conflict resolution.
+Deletion shifts the rest of the cluster backwards instead of rehashing it.
+When to grow and shrink is decided by a pluggable resize policy; by default
+the table grows above a load of 1/2 and shrinks below a load of 1/8.
+Every entry keeps the full-width hash of its key, so resizing never
+re-reads keys and lookups compare hashes before keys. The hash function is
+a pluggable strategy, and the table reseeds it if an insert probes abnormally far.
+
+Keys, values and hashes are stored in three parallel arrays rather than as
+one tuple per entry, so updating the value of an existing key overwrites a
+single slot and allocates nothing.
 """
 from __future__ import annotations
 __author__ = 'Jackson Goerner'
 __since__ = '07/02/2023'
 
 
-from typing import TypeVar, Generic
+from typing import Iterable, Iterator, TypeVar, Generic, Union
+from data_structures.cow_array import CowTable
+from data_structures.hash_functions import HashFunction, PolynomialHash
 from data_structures.referential_array import ArrayR
+from data_structures.resize_policy import LoadFactorPolicy, ResizePolicy
+from data_structures.table_sizes import size_at
+from data_structures.table_stats import InstrumentedTable, TableStats
 
 K = TypeVar('K')
 V = TypeVar('V')
@@ -18,7 +33,7 @@ class FullError(Exception):
     pass
 
 
-class LinearProbeTable(Generic[K, V]):
+class LinearProbeTable(InstrumentedTable, CowTable, Generic[K, V]):
     """
     Linear Probe Table.
 
@@ -27,41 +42,97 @@ class LinearProbeTable(Generic[K, V]):
                 Otherwise `hash` should be overwritten.
         - V:    Value Type.
 
+    Attributes:
+        key_array, value_array: key and value of the entry in every slot
+        hash_array: full-width hash of the key in every slot, None for empty slots
+        count: number of entries
+
+    Probe and resize counters are available through enable_stats() and stats().
+    clone() returns a copy-on-write snapshot, in O(1) once the table has been cloned before.
     Unless stated otherwise, all methods have O(1) complexity.
     """
 
-    # No test case should exceed 1 million entries.
+    # Starting sizes, continued with generated primes once a table outgrows them.
     TABLE_SIZES = [5, 13, 29, 53, 97, 193, 389, 769, 1543, 3079, 6151, 12289, 24593, 49157, 98317, 196613, 393241, 786433, 1572869]
 
-    HASH_BASE = 31
+    # Thresholds of the default LoadFactorPolicy: grow above MAX_LOAD, shrink below
+    # SHRINK_LOAD to the smallest size with a load of at most SHRINK_TARGET_LOAD.
+    # The gap between the loads stops the table from resizing back and forth.
+    MAX_LOAD = 1 / 2
+    SHRINK_LOAD = 1 / 8
+    SHRINK_TARGET_LOAD = 1 / 4
+
+    INSTRUMENTED_METHODS = ('_linear_probe', '_resize', '_reseed')
+    COW_ARRAYS = ('key_array', 'value_array', 'hash_array')
+    CLONED_ATTRIBUTES = ('resize_policy',)
+
+    # An insert probing further than PROBE_LIMIT_FACTOR * log2(table_size) reseeds the hash,
+    # at most MAX_RESEEDS times per table size in case the keys themselves collide.
+    PROBE_LIMIT_FACTOR = 4
+    MAX_RESEEDS = 3
 
-    def __init__(self, sizes=None) -> None:
+    def __init__(self, sizes=None, hash_function: Union[HashFunction[K], None] = None, resize_policy: Union[ResizePolicy, None] = None) -> None:
         """
         Initialise the Hash Table.
+
+        :param sizes: table sizes to use instead of TABLE_SIZES
+        :param hash_function: hash strategy, PolynomialHash by default
+        :param resize_policy: decides when to grow and shrink, a LoadFactorPolicy with the class thresholds by default.
+        Policies may keep per table state, so a policy should not be shared between tables.
         """
         if sizes is not None:
             self.TABLE_SIZES = sizes
+        self.hash_function = hash_function if hash_function is not None else PolynomialHash()
+        if resize_policy is None:
+            resize_policy = LoadFactorPolicy(self.MAX_LOAD, self.SHRINK_LOAD, self.SHRINK_TARGET_LOAD)
+        self.resize_policy = resize_policy
+        self.reseeds = 0
         self.size_index = 0
-        self.array:ArrayR[tuple[K, V]] = ArrayR(self.TABLE_SIZES[self.size_index])
+        self._allocate(self.TABLE_SIZES[self.size_index])
         self.count = 0
 
+    @classmethod
+    def from_items(cls, items: Iterable[tuple[K, V]], expected_size: Union[int, None] = None) -> LinearProbeTable[K, V]:
+        """
+        Build a table from (key, value) pairs, sized for all of them up front so it never rehashes.
+
+        :param expected_size: number of pairs, needed to size the table when items has no len
+        :complexity: O(N*hash(K) + M) with no probing, where N is the number of pairs and M the final table size
+        """
+        table = cls()
+        table.update(items, expected_size)
+        return table
+
     def hash(self, key: K) -> int:
         """
         Hash a key for insert/retrieve/update into the hashtable.
+        The hash does not depend on the table size, positions are hash % table_size.
 
-        :complexity: O(len(key))
+        :complexity: O(hash_function(key)), O(len(key)) for the default strategy
         """
-
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % self.table_size
-            a = a * self.HASH_BASE % (self.table_size - 1)
-        return value
+        return self.hash_function(key)
 
     @property
     def table_size(self) -> int:
-        return len(self.array)
+        return len(self.hash_array)
+
+    def _allocate(self, table_size: int) -> None:
+        """
+        Replace the storage with empty arrays of the given size.
+
+        :complexity: O(M) where M is the table size
+        """
+        self.key_array: ArrayR[K] = ArrayR(table_size)
+        self.value_array: ArrayR[V] = ArrayR(table_size)
+        self.hash_array: ArrayR[int] = ArrayR(table_size)
+
+    def _store(self, position: int, key: K, data: V, key_hash: int) -> None:
+        """
+        Write an entry into an empty slot. The hash is written last, as it marks the slot as taken.
+        """
+        self.key_array[position] = key
+        self.value_array[position] = data
+        self.hash_array[position] = key_hash
 
     def __len__(self) -> int:
         """
@@ -69,26 +140,27 @@ class LinearProbeTable(Generic[K, V]):
         """
         return self.count
 
-    def _linear_probe(self, key: K, is_insert: bool) -> int:
+    def _linear_probe(self, key: K, key_hash: int, is_insert: bool) -> int:
         """
         Find the correct position for this key in the hash table using linear probing.
-        :complexity best: O(hash(key)) first position is empty
-        :complexity worst: O(hash(key) + N*comp(K)) when we've searched the entire table
+        Keys are only compared when their full hashes are equal.
+        :complexity best: O(1) first position is empty
+        :complexity worst: O(N + comp(K)) when we've searched the entire table
                         where N is the tablesize
         :raises KeyError: When the key is not in the table, but is_insert is False.
         :raises FullError: When a table is full and cannot be inserted.
         """
         # Initial position
-        position = self.hash(key)
+        position = key_hash % self.table_size
 
         for _ in range(self.table_size):
-            if self.array[position] is None:
+            if self.hash_array[position] is None:
                 # Empty spot. Am I upserting or retrieving?
                 if is_insert:
                     return position
                 else:
                     raise KeyError(key)
-            elif self.array[position][0] == key:
+            elif self.hash_array[position] == key_hash and self.key_array[position] == key:
                 return position
             else:
                 # Taken by something else. Time to linear probe.
@@ -99,6 +171,37 @@ class LinearProbeTable(Generic[K, V]):
         else:
             raise KeyError(key)
 
+    def items(self) -> Iterator[tuple[K, V]]:
+        """
+        Yields every (key, value) pair straight from the backing arrays.
+        The table must not be modified while iterating.
+
+        :complexity: O(N) where N is self.table_size, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            if self.hash_array[x] is not None:
+                yield self.key_array[x], self.value_array[x]
+
+    def iter_keys(self) -> Iterator[K]:
+        """
+        Yields every key straight from the backing arrays.
+
+        :complexity: O(N) where N is self.table_size, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            if self.hash_array[x] is not None:
+                yield self.key_array[x]
+
+    def iter_values(self) -> Iterator[V]:
+        """
+        Yields every value straight from the backing arrays.
+
+        :complexity: O(N) where N is self.table_size, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            if self.hash_array[x] is not None:
+                yield self.value_array[x]
+
     def keys(self) -> ArrayR[K]:
         """
         Returns all keys in the hash table.
@@ -106,11 +209,8 @@ class LinearProbeTable(Generic[K, V]):
         :complexity: O(N) where N is self.table_size.
         """
         res = ArrayR(self.count)
-        i = 0
-        for x in range(self.table_size):
-            if self.array[x] is not None:
-                res[i] = self.array[x][0]
-                i += 1
+        for i, key in enumerate(self.iter_keys()):
+            res[i] = key
         return res
 
     def values(self) -> ArrayR[V]:
@@ -120,11 +220,8 @@ class LinearProbeTable(Generic[K, V]):
         :complexity: O(N) where N is self.table_size.
         """
         res = ArrayR(self.count)
-        i = 0
-        for x in range(self.table_size):
-            if self.array[x] is not None:
-                res[i] = self.array[x][1]
-                i += 1
+        for i, value in enumerate(self.iter_values()):
+            res[i] = value
         return res
 
     def __contains__(self, key: K) -> bool:
@@ -147,74 +244,215 @@ class LinearProbeTable(Generic[K, V]):
         :complexity: See linear probe.
         :raises KeyError: when the key doesn't exist.
         """
-        position = self._linear_probe(key, False)
-        return self.array[position][1]
+        position = self._linear_probe(key, self.hash(key), False)
+        return self.value_array[position]
 
     def __setitem__(self, key: K, data: V) -> None:
         """
         Set an (key, value) pair in our hash table.
+        Updating an existing key only overwrites its value slot.
 
         :complexity: See linear probe.
-        :raises FullError: when the table cannot be resized further.
         """
+        key_hash = self.hash(key)
+        position = self._linear_probe(key, key_hash, True)
 
-        position = self._linear_probe(key, True)
-
-        if self.array[position] is None:
-            self.count += 1
+        if self.hash_array[position] is not None:
+            self.value_array[position] = data
+            return
 
-        self.array[position] = (key, data)
+        self.count += 1
+        self._store(position, key, data, key_hash)
 
-        if len(self) > self.table_size / 2:
+        probe_length = (position - key_hash) % self.table_size
+        if self.resize_policy.should_grow(self, probe_length):
             self._rehash()
+        elif probe_length > self._probe_limit() and self.reseeds < self.MAX_RESEEDS:
+            self._reseed()
+
+    def reserve(self, n: int) -> None:
+        """
+        Grow the table so it holds n entries without rehashing.
+        The table may still shrink again if entries are deleted.
+
+        :complexity: O(N + M) where N is len(self) and M the new table size, O(1) if already large enough
+        """
+        size_index = self.size_index
+        while n > size_at(self.TABLE_SIZES, size_index) * self.resize_policy.grow_load:
+            size_index += 1
+        if size_index > self.size_index:
+            self._resize(size_index)
+
+    def update(self, items: Iterable[tuple[K, V]], expected_size: Union[int, None] = None) -> None:
+        """
+        Set every (key, value) pair, reserving room for all of them first.
+        An iterable without len and without expected_size is read into a list to count it.
+
+        :param expected_size: number of pairs, if items has no len
+        :complexity: O(N*hash(K) + M) with no probing, where N is the number of pairs and M the final table size
+        """
+        if expected_size is None:
+            if not hasattr(items, "__len__"):
+                items = list(items)
+            expected_size = len(items)
+        self.reserve(len(self) + expected_size)
+        for key, data in items:
+            self[key] = data
 
     def __delitem__(self, key: K) -> None:
         """
         Deletes a (key, value) pair in our hash table.
+        Later entries of the cluster are shifted back into the gap when their home position
+        allows it, using their cached hash, so no key is re-hashed or compared.
 
         :complexity best: O(hash(key)) deleting item is not probed and in correct spot.
-        :complexity worst: O(N*hash(key)+N^2*comp(K)) deleting item is midway through large chain.
+        :complexity worst: O(hash(key) + N) deleting item is midway through large chain.
         :raises KeyError: when the key doesn't exist.
         """
-        position = self._linear_probe(key, False)
+        position = self._linear_probe(key, self.hash(key), False)
         # Remove the element
-        self.array[position] = None
+        self._clear(position)
         self.count -= 1
         # Start moving over the cluster
+        gap = position
         position = (position + 1) % self.table_size
-        while self.array[position] is not None:
-            key2, value = self.array[position]
-            self.array[position] = None
-            # Reinsert.
-            newpos = self._linear_probe(key2, True)
-            self.array[newpos] = (key2, value)
+        while self.hash_array[position] is not None:
+            home = self.hash_array[position] % self.table_size
+            # The entry can fill the gap unless its home lies after the gap.
+            if (position - home) % self.table_size >= (position - gap) % self.table_size:
+                self._store(gap, self.key_array[position], self.value_array[position], self.hash_array[position])
+                self._clear(position)
+                gap = position
             position = (position + 1) % self.table_size
 
+        if self.size_index > 0 and self.resize_policy.should_shrink(self):
+            self._shrink()
+
+    def _clear(self, position: int) -> None:
+        """
+        Empty a slot, dropping the references to its key and value.
+        """
+        self.hash_array[position] = None
+        self.key_array[position] = None
+        self.value_array[position] = None
+
     def is_empty(self) -> bool:
         return self.count == 0
 
     def is_full(self) -> bool:
         return self.count == self.table_size
 
+    def _free_position(self, key_hash: int) -> int:
+        """
+        Find the first empty position for a hash, for an entry known not to be in the table.
+
+        :complexity best: O(1) first position is empty
+        :complexity worst: O(N) where N is the tablesize
+        """
+        position = key_hash % self.table_size
+        while self.hash_array[position] is not None:
+            position = (position + 1) % self.table_size
+        return position
+
+    def _probe_limit(self) -> int:
+        """
+        Longest probe an insert may take before the hash function is considered unlucky.
+        """
+        return self.PROBE_LIMIT_FACTOR * self.table_size.bit_length()
+
+    def _reseed(self) -> None:
+        """
+        Switch to a freshly seeded hash function and rebuild the table at its current size.
+        Keys have to be re-hashed, so this only happens when probes grow abnormally long.
+
+        :complexity best: O(N*hash(K) + M) No probing.
+        :complexity worst: O(N*hash(K) + N^2 + M) Lots of probing.
+        Where N is len(self) and M is the table size
+        """
+        self.reseeds += 1
+        self.hash_function = self.hash_function.reseeded()
+        old_keys, old_values, old_hashes = self.key_array, self.value_array, self.hash_array
+        self._allocate(self.table_size)
+        for x in range(len(old_hashes)):
+            if old_hashes[x] is not None:
+                key_hash = self.hash(old_keys[x])
+                self._store(self._free_position(key_hash), old_keys[x], old_values[x], key_hash)
+        self.resize_policy.on_rebuild(self)
+
     def _rehash(self) -> None:
         """
-        Need to resize table and reinsert all values
+        Need to resize table and reinsert all values.
+        Entries are placed using their cached hash, keys are never re-hashed or compared.
 
-        :complexity best: O(N*hash(K)) No probing.
-        :complexity worst: O(N*hash(K) + N^2*comp(K)) Lots of probing.
+        :complexity best: O(N) No probing.
+        :complexity worst: O(N^2) Lots of probing.
         Where N is len(self)
         """
-        old_array = self.array
-        self.size_index += 1
-        if self.size_index == len(self.TABLE_SIZES):
-            # Cannot be resized further.
-            return
-        self.array = ArrayR(self.TABLE_SIZES[self.size_index])
-        self.count = 0
-        for item in old_array:
-            if item is not None:
-                key, value = item
-                self[key] = value
+        self._resize(self.size_index + 1)
+
+    def _shrink(self) -> None:
+        """
+        Resize the table down to the smallest size whose load stays at most the policy's shrink_target_load.
+
+        :complexity best: O(N + M) No probing.
+        :complexity worst: O(N^2 + M) Lots of probing.
+        Where N is len(self) and M is the current table size
+        """
+        size_index = 0
+        while len(self) > size_at(self.TABLE_SIZES, size_index) * self.resize_policy.shrink_target_load:
+            size_index += 1
+        if size_index < self.size_index:
+            self._resize(size_index)
+
+    def _resize(self, size_index: int) -> None:
+        """
+        Move every entry into a new array of size TABLE_SIZES[size_index], generating the size if needed.
+
+        :complexity best: O(N + M) No probing.
+        :complexity worst: O(N^2 + M) Lots of probing.
+        Where N is len(self) and M is the larger of the two table sizes
+        """
+        old_keys, old_values, old_hashes = self.key_array, self.value_array, self.hash_array
+        self.size_index = size_index
+        self.reseeds = 0
+        self._allocate(size_at(self.TABLE_SIZES, self.size_index))
+        for x in range(len(old_hashes)):
+            if old_hashes[x] is not None:
+                self._store(self._free_position(old_hashes[x]), old_keys[x], old_values[x], old_hashes[x])
+        self.resize_policy.on_rebuild(self)
+
+    def _instrument(self, stats: TableStats) -> dict:
+        """
+        Wrappers counting the slots every probe examines and timing every resize and reseed.
+        """
+        probe = self._linear_probe
+
+        def counting_probe(key: K, key_hash: int, is_insert: bool) -> int:
+            try:
+                position = probe(key, key_hash, is_insert)
+            except KeyError:
+                stats.record_probe(self._run_length(key_hash) + 1, False)
+                raise
+            stats.record_probe((position - key_hash) % self.table_size + 1, self.hash_array[position] is not None)
+            return position
+
+        return {'_linear_probe': counting_probe, '_resize': stats.timed(self._resize), '_reseed': stats.timed(self._reseed)}
+
+    def _run_length(self, key_hash: int) -> int:
+        """
+        Number of occupied slots from the home position of a hash up to the first empty slot.
+
+        :complexity: O(N) where N is the tablesize
+        """
+        position = key_hash % self.table_size
+        length = 0
+        while length < self.table_size and self.hash_array[position] is not None:
+            position = (position + 1) % self.table_size
+            length += 1
+        return length
+
+    def _capacity(self) -> int:
+        return self.table_size
 
     def __str__(self) -> str:
         """
@@ -223,8 +461,6 @@ class LinearProbeTable(Generic[K, V]):
         :complexity: O(N * (str(key) + str(value))) where N is the table size
         """
         result = ""
-        for item in self.array:
-            if item is not None:
-                (key, value) = item
-                result += "(" + str(key) + "," + str(value) + ")\n"
+        for key, value in self.items():
+            result += "(" + str(key) + "," + str(value) + ")\n"
         return result
@@ -1,44 +1,86 @@
 """ Hash Table ADT
 
-Defines a Hash Table using Linear Probing for conflict resolution.
-It currently rehashes the primary cluster to handle deletion.
+Defines a Hash Table using Separate Chaining for conflict resolution.
+Every entry keeps the full-width hash of its key, so chains are searched
+by comparing hashes before keys. The hash function is a pluggable strategy,
+and the table reseeds it if a chain grows far beyond the average length.
+The table grows once it holds more entries than buckets, and can optionally
+shrink when it empties. Resizing relinks the existing chain nodes into the
+new buckets using their cached hashes, so no node is allocated.
+
+Each bucket holds the first node of its chain. Nodes keep the key, data and
+hash as mutable fields, so an update overwrites the data of the node it
+found and a delete unlinks the node during the same walk.
 """
+from __future__ import annotations
 __author__ = 'Brendon Taylor & Rupert Ebeling'
 __docformat__ = 'reStructuredText'
 __modified__ = '15/08/2023'
 __since__ = '31/03/2023'
 
+from data_structures.hash_functions import HashFunction, PolynomialHash
 from data_structures.referential_array import ArrayR
-from data_structures.linked_list import LinkedList
-from typing import TypeVar, Generic
+from data_structures.table_sizes import next_prime
+from data_structures.table_stats import InstrumentedTable, TableStats
+from typing import Iterator, TypeVar, Generic, Union
 
 T = TypeVar('T')
 
 
-class HashTableSeparateChaining(Generic[T]):
+class _ChainNode(Generic[T]):
+    """ Chain node holding one entry and the full-width hash of its key. """
+    __slots__ = ('key', 'data', 'hash', 'link')
+
+    def __init__(self, key: str, data: T, key_hash: int, link: Union[_ChainNode[T], None] = None) -> None:
+        self.key = key
+        self.data = data
+        self.hash = key_hash
+        self.link = link
+
+
+class HashTableSeparateChaining(InstrumentedTable, Generic[T]):
     """
     Separate Chaining Hash Table
 
     constants:
         MIN_CAPACITY: smallest valid table size
         DEFAULT_TABLE_SIZE: default table size used in the __init__
-        DEFAULT_HASH_TABLE: default hash base used for the hash function
+        CHAIN_FACTOR, CHAIN_SLACK: a chain longer than CHAIN_FACTOR * average length + CHAIN_SLACK reseeds the hash
+        MAX_RESEEDS: most reseeds per table size, in case the keys themselves collide
+        MAX_LOAD_FACTOR: the table grows to about twice its size above this many entries per bucket
+        MIN_LOAD_FACTOR: a shrinking table halves below this many entries per bucket
 
     attributes:
         count: number of elements in the hash table
-        array: used to represent our internal array
+        table: the first chain node of every bucket, None for empty buckets
+        hash_function: hash strategy used by `hash`
+        min_size: the table never shrinks below its initial size
+        shrink: whether the table shrinks as entries are deleted
+
+    Lookup and resize counters are available through enable_stats() and stats().
     """
     MIN_CAPACITY = 1
 
     DEFAULT_TABLE_SIZE = 17
-    DEFAULT_HASH_BASE = 31
+    CHAIN_FACTOR = 4
+    CHAIN_SLACK = 8
+    MAX_RESEEDS = 3
+    MAX_LOAD_FACTOR = 1
+    MIN_LOAD_FACTOR = 1 / 8
+    INSTRUMENTED_METHODS = ('_find', '_redistribute')
 
-    def __init__(self, table_size: int = DEFAULT_TABLE_SIZE) -> None:
+    def __init__(self, table_size: int = DEFAULT_TABLE_SIZE, hash_function: Union[HashFunction[str], None] = None, shrink: bool = False) -> None:
         """
+        :param hash_function: hash strategy, PolynomialHash by default
+        :param shrink: shrink the table as entries are deleted, down to table_size
         :complexity: O(A) where A is complexity of ArrayR.__init__()
         """
         self.count = 0
-        self.table = ArrayR(max(self.MIN_CAPACITY, table_size))
+        self.table: ArrayR[Union[_ChainNode[T], None]] = ArrayR(max(self.MIN_CAPACITY, table_size))
+        self.min_size = len(self.table)
+        self.shrink = shrink
+        self.hash_function = hash_function if hash_function is not None else PolynomialHash()
+        self.reseeds = 0
 
     def __len__(self) -> int:
         """
@@ -47,53 +89,94 @@ class HashTableSeparateChaining(Generic[T]):
         """
         return self.count
 
+    def _find(self, key: str, key_hash: int) -> _ChainNode[T]:
+        """
+        Returns the chain node holding the key
+        :raises KeyError: when the key doesn't exist
+        :complexity: O(C) where C is the length of the chain, keys are only compared when hashes match
+        """
+        node = self.table[key_hash % len(self.table)]
+        while node is not None:
+            if node.hash == key_hash and node.key == key:
+                return node
+            node = node.link
+        raise KeyError(key)
+
     def __delitem__(self, key: str) -> None:
         """
         Deletes an item from our hash table
         :raises KeyError: when the key doesn't exist
+        :complexity: O(hash(key) + C) where C is the length of the chain
         """
-        position = self.hash(key)
-        for index, item in enumerate(self.table[position]):
-            if item[0] == key:
-                self.table[position].delete_at_index(index)
-                self.count -= 1
-                return
+        key_hash = self.hash(key)
+        position = key_hash % len(self.table)
+        previous = None
+        node = self.table[position]
+        while node is not None and not (node.hash == key_hash and node.key == key):
+            previous = node
+            node = node.link
+        if node is None:
+            raise KeyError(key)
 
-        raise KeyError(key)
+        if previous is None:
+            self.table[position] = node.link
+        else:
+            previous.link = node.link
+        self.count -= 1
+        if self.shrink and len(self.table) > self.min_size and self.count < len(self.table) * self.MIN_LOAD_FACTOR:
+            self._resize(max(self.min_size, len(self.table) // 2))
 
     def __setitem__(self, key: str, data: T) -> None:
         """
         Set a (key, data) pair in our hash table
+        An existing key has its data overwritten in place, nothing is allocated.
+        :complexity: O(hash(key) + C) where C is the length of the chain
         """
-        position = self.hash(key)
-        if self.table[position] is None:
-            self.table[position] = LinkedList()
-
-        # Attempt to find the key in our linked list
-        if len(self.table[position]) > 0:
-            for index, item in enumerate(self.table[position]):
-                if item[0] == key:
+        key_hash = self.hash(key)
+        position = key_hash % len(self.table)
+        node = self.table[position]
+        if node is None:
+            self.table[position] = _ChainNode(key, data, key_hash)
+            chain_length = 1
+        else:
+            chain_length = 1
+            while True:
+                if node.hash == key_hash and node.key == key:
                     # If found update the data
-                    self.table[position][index] = (key, data)
+                    node.data = data
                     return
-                
-        # self.table[position].insert(0, (key, data)) # To insert at the beginning 
-        self.table[position].append((key, data))
+                if node.link is None:
+                    break
+                node = node.link
+                chain_length += 1
+            node.link = _ChainNode(key, data, key_hash)
+            chain_length += 1
         self.count += 1
 
+        if self.count > len(self.table) * self.MAX_LOAD_FACTOR:
+            self._resize(next_prime(2 * len(self.table)))
+        elif chain_length > self._chain_limit() and self.reseeds < self.MAX_RESEEDS:
+            self._reseed()
+
     def __getitem__(self, key: str) -> T:
         """
         Get the data associated with a key
         :raises KeyError: when the key doesn't exist
+        :complexity: O(hash(key) + C) where C is the length of the chain
         """
-        position = self.hash(key)
-        if self.table[position] is None:
-            raise KeyError(key)
-        for item in self.table[position]:
-            if item[0] == key:
-                return item[1]
+        return self._find(key, self.hash(key)).data
 
-        raise KeyError(key)
+    def __contains__(self, key: str) -> bool:
+        """
+        Checks to see if the given key is in the Hash Table
+        :complexity: O(hash(key) + C) where C is the length of the chain
+        """
+        try:
+            self._find(key, self.hash(key))
+        except KeyError:
+            return False
+        else:
+            return True
 
     def is_empty(self):
         """
@@ -105,15 +188,52 @@ class HashTableSeparateChaining(Generic[T]):
     def hash(self, key: str) -> int:
         """
         Universal Hash function
-        :post: returns a valid position (0 <= value < table_size)
-        :complexity: O(K) where K is the size of the key
+        :post: returns a full-width hash, the position of the key is hash % table_size
+        :complexity: O(K) where K is the size of the key, for the default strategy
         """
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % len(self.table)
-            a = a * HashTableSeparateChaining.DEFAULT_HASH_BASE % (len(self.table) - 1)
-        return value
+        return self.hash_function(key)
+
+    def _chain_limit(self) -> int:
+        """
+        Longest chain allowed before the hash function is considered unlucky
+        :complexity: O(1)
+        """
+        return self.CHAIN_FACTOR * (self.count // len(self.table)) + self.CHAIN_SLACK
+
+    def _reseed(self) -> None:
+        """
+        Switches to a freshly seeded hash function and rebuilds every chain
+        :complexity: O(N*K + M) where N number of items, K the size of the keys and M the table size
+        """
+        self.reseeds += 1
+        self.hash_function = self.hash_function.reseeded()
+        self._redistribute(len(self.table), True)
+
+    def _resize(self, table_size: int) -> None:
+        """
+        Moves every chain node into a table of the given size, using the cached hashes
+        :complexity: O(N + M) where N number of items and M the larger table size
+        """
+        self.reseeds = 0
+        self._redistribute(table_size, False)
+
+    def _redistribute(self, table_size: int, rehash: bool) -> None:
+        """
+        Relinks every chain node to the front of its bucket in a new array of buckets
+        :param rehash: recompute the hash of every key instead of using the cached hash
+        :complexity: O(N + M) where N number of items and M the larger table size, plus O(N*K) to rehash
+        """
+        old_table = self.table
+        self.table = ArrayR(table_size)
+        for node in old_table:
+            while node is not None:
+                following = node.link
+                if rehash:
+                    node.hash = self.hash(node.key)
+                position = node.hash % table_size
+                node.link = self.table[position]
+                self.table[position] = node
+                node = following
 
     def insert(self, key: str, data: T) -> None:
         """
@@ -122,15 +242,43 @@ class HashTableSeparateChaining(Generic[T]):
         """
         self[key] = data
 
-    def __iter__(self):
+    def __iter__(self) -> Iterator[T]:
         """
         Returns an iterator for the hash table
         :complexity: O(N) where N number of items in our hash table
         """
-        for list in self.table:
-            if list is not None:
-                for item in list:
-                    yield item[1]
+        return self.iter_values()
+
+    def items(self) -> Iterator[tuple[str, T]]:
+        """
+        Yields every (key, data) pair by walking the chain nodes directly.
+        The table must not be modified while iterating.
+        :complexity: O(N + M) where N number of items and M the table size, with O(1) extra memory
+        """
+        for node in self.table:
+            while node is not None:
+                yield node.key, node.data
+                node = node.link
+
+    def iter_keys(self) -> Iterator[str]:
+        """
+        Yields every key by walking the chain nodes directly.
+        :complexity: O(N + M) where N number of items and M the table size, with O(1) extra memory
+        """
+        for node in self.table:
+            while node is not None:
+                yield node.key
+                node = node.link
+
+    def iter_values(self) -> Iterator[T]:
+        """
+        Yields every data item by walking the chain nodes directly.
+        :complexity: O(N + M) where N number of items and M the table size, with O(1) extra memory
+        """
+        for node in self.table:
+            while node is not None:
+                yield node.data
+                node = node.link
 
     def keys(self) -> ArrayR[str]:
         """
@@ -138,12 +286,8 @@ class HashTableSeparateChaining(Generic[T]):
         :complexity: O(N) where N number of items in our hash table
         """
         res = ArrayR(self.count)
-        i = 0
-        for list in self.table:
-            if list is not None:
-                for item in list:
-                    res[i] = item[0]
-                    i += 1
+        for i, key in enumerate(self.iter_keys()):
+            res[i] = key
         return res
 
     def values(self) -> ArrayR[T]:
@@ -152,31 +296,75 @@ class HashTableSeparateChaining(Generic[T]):
         :complexity: O(N) where N number of items in our hash table
         """
         res = ArrayR(self.count)
-        i = 0
-        for list in self.table:
-            if list is not None:
-                for item in list:
-                    res[i] = item[1]
-                    i += 1
+        for i, value in enumerate(self.iter_values()):
+            res[i] = value
         return res
 
+    def _instrument(self, stats: TableStats) -> dict:
+        """
+        Wrappers counting the nodes every lookup examines and timing every resize and reseed.
+        """
+        find = self._find
+
+        def counting_find(key: str, key_hash: int) -> _ChainNode[T]:
+            try:
+                found = find(key, key_hash)
+            except KeyError:
+                stats.record_probe(self._chain_length(key_hash % len(self.table), None), False)
+                raise
+            stats.record_probe(self._chain_length(key_hash % len(self.table), found), True)
+            return found
+
+        return {'_find': counting_find, '_redistribute': stats.timed(self._redistribute)}
+
+    def _chain_length(self, position: int, target: Union[_ChainNode[T], None]) -> int:
+        """
+        Number of nodes in a chain up to and including target, or in the whole chain when target is None
+        :complexity: O(C) where C is the length of the chain
+        """
+        length = 0
+        node = self.table[position]
+        while node is not None:
+            length += 1
+            if node is target:
+                break
+            node = node.link
+        return length
+
+    def _capacity(self) -> int:
+        return len(self.table)
+
+    def _structure_stats(self, report) -> None:
+        """
+        Adds the chain length distribution, chain_histogram[n] being the number of buckets holding n entries
+        :complexity: O(N + M) where N number of items and M the table size
+        """
+        longest = 0
+        for position in range(len(self.table)):
+            longest = max(longest, self._chain_length(position, None))
+        histogram = ArrayR.from_list([0] * (longest + 1))
+        for position in range(len(self.table)):
+            histogram[self._chain_length(position, None)] += 1
+        report["max_chain"] = longest
+        report["chain_histogram"] = histogram
+
     def __str__(self) -> str:
         """
         Returns all they key/value pairs in our hash table (no particular order)
         :complexity: O(N) where N number of items in our hash table
         """
         result = ""
-        for list in self.table:
-            if list is not None:
+        for node in self.table:
+            if node is not None:
                 first = True
-                for item in list:
+                while node is not None:
                     if not first:
                         result += ' -> '
-                    (key, value) = item
-                    result += "(" + str(key) + "," + str(value) + ")"
+                    result += "(" + str(node.key) + "," + str(node.data) + ")"
                     first = False
+                    node = node.link
                 result += '\n'
         return result
-    
+
     def __repr__(self) -> str:
         return str(self)
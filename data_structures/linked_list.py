@@ -1,4 +1,5 @@
 """ Linked-node based implementation of List ADT. """
+from __future__ import annotations
 from data_structures.abstract_list import List, T
 from data_structures.node import Node
 
@@ -20,6 +21,19 @@ class LinkedList(List[T]):
         # first call clear() for the base class
         List.clear(self)
         self.head = None
+        self.rear = None
+
+    def clone(self) -> LinkedList[T]:
+        """ Returns a list with the same items in new nodes, so changing either list leaves the other alone.
+            The items themselves are shared.
+            :complexity: O(n) where n is the length of the list
+        """
+        res = LinkedList()
+        current = self.head
+        while current is not None:
+            res.append(current.item)
+            current = current.link
+        return res
 
     def __setitem__(self, index: int, item: T) -> None:
         """ Magic method. Insert the item at a given position. """
@@ -88,10 +102,14 @@ class LinkedList(List[T]):
             if index > 0:
                 previous_node = self.__get_node_at_index(index-1)
                 item = previous_node.link.item
+                if previous_node.link is self.rear:
+                    self.rear = previous_node
                 previous_node.link = previous_node.link.link
             elif index == 0:
                 item = self.head.item
                 self.head = self.head.link
+                if self.head is None:
+                    self.rear = None
             else:
                 raise ValueError("Index out of bounds")
             self.length -= 1
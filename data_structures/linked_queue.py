@@ -1,3 +1,4 @@
+from __future__ import annotations
 
 from typing import TypeVar
 
@@ -14,6 +15,7 @@ class LinkedQueue(Queue[T]):
     Attributes:
          front: the element at the front of the queue.
          rear: the element at the rear of the queue.
+         shared: whether the nodes may be shared with a clone of the queue.
     """
     MIN_CAPACITY = 0
 
@@ -21,12 +23,16 @@ class LinkedQueue(Queue[T]):
         Queue.__init__(self)
         self.front = None
         self.rear = None
+        self.shared = False
 
     def append(self, item: T) -> None:
         """ Adds an element to the rear of the queue.
         :pre: queue is not full
         :raises Exception: if the queueu is full
         """
+        if self.shared:
+            self._unshare()
+
         # Case 1: Empty queue
         if self.front is None:
             self.front = Node(item)
@@ -93,6 +99,37 @@ class LinkedQueue(Queue[T]):
         Queue.__init__(self)
         self.front = None
         self.rear = None
+        self.shared = False
+
+    def clone(self) -> LinkedQueue[T]:
+        """ Returns a queue with the same elements, sharing the nodes.
+        Serving never changes a node, so both queues only copy their nodes
+        on their first append, which links a new node after the rear.
+        :complexity: O(1)
+        """
+        res = LinkedQueue()
+        res.front = self.front
+        res.rear = self.rear
+        res.length = self.length
+        res.shared = self.shared = self.front is not None
+        return res
+
+    def _unshare(self) -> None:
+        """ Copies the nodes of the queue, so that appending does not change a clone.
+        :complexity: O(n) where n is the length of the queue
+        """
+        node, last = self.front, self.rear
+        self.front = self.rear = None
+        while node is not None:
+            new_node = Node(node.item)
+            if self.front is None:
+                self.front = new_node
+            else:
+                self.rear.next = new_node
+            self.rear = new_node
+            # The rear node of a queue has no next, and may have been given one by a clone
+            node = node.next if node is not last else None
+        self.shared = False
 
     def __str__(self) -> str:
         """ Returns a string representation of the queue."""
@@ -1,4 +1,5 @@
 """ Stack ADT based on linked nodes. """
+from __future__ import annotations
 
 __author__ = 'Maria Garcia de la Banda, modified by Brendon Taylor and Alexey Ignatiev'
 __docformat__ = 'reStructuredText'
@@ -26,6 +27,16 @@ class LinkedStack(Stack[T]):
         super().clear()
         self.top = None
 
+    def clone(self) -> LinkedStack[T]:
+        """ Returns a stack with the same elements, sharing the nodes.
+            Pushing and popping never change an existing node, so sharing is safe.
+            :complexity: O(1)
+        """
+        res = LinkedStack()
+        res.top = self.top
+        res.length = self.length
+        return res
+
     def is_empty(self) -> bool:
         """ Returns whether the stack is empty
             :complexity: O(1)
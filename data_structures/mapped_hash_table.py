@@ -0,0 +1,499 @@
+""" Hash Table ADT stored in memory-mapped files.
+
+Defines a Linear Probing Hash Table whose slot array lives in a file that is
+memory-mapped, so opening a table reads nothing but its header and slots are
+paged in by the operating system as lookups touch them. Every slot has a
+fixed width: a used flag, the full-width hash of the key, the offset and
+length of the value in a companion data file, and the key itself encoded
+as UTF-8 in a fixed number of bytes.
+
+Values are pickled and appended to the data file, which is also mapped for
+reading. Updating or deleting a key leaves its old value behind as garbage
+until `compact` copies the live values into a new data file. Each data file
+carries a generation number recorded in the slot file header, and the slot
+file is only ever replaced atomically, so a table interrupted while growing
+or compacting still opens in its previous state.
+
+Keys are hashed with PolynomialHash, which gives the same hash in every
+process, so a table written by one process can be opened read-only by any
+number of others at the same time. Readers share the writer's slot map, so
+they see its inserts, updates and deletes as they happen, and a read that
+races a write may see a half-written slot. Only a rebuild, which replaces
+the files, detaches open readers: they keep the old files until reopened.
+
+Values are decoded with pickle, so the files must be as trusted as code: anyone
+who can write them can run arbitrary code in every process that reads them.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import pickle
+import struct
+from typing import Generic, Iterator, TypeVar
+from data_structures.hash_functions import PolynomialHash
+from data_structures.hash_table import LinearProbeTable
+from data_structures.referential_array import ArrayR
+from data_structures.table_sizes import size_at
+
+V = TypeVar('V')
+
+
+class MappedHashTable(Generic[V]):
+    """
+    Memory-mapped Linear Probe Table with string keys.
+
+    Type Arguments:
+        - V:    Value Type. Has to be picklable.
+
+    Attributes:
+        path: path of the slot file, data files are named path.<generation>.dat
+        read_only: whether the table was opened read-only
+        key_width: most bytes a key may take when encoded as UTF-8
+        hash_function: PolynomialHash with the seed recorded in the file
+
+    A table opened read-only is a live view of the files, not a snapshot, until the writer rebuilds them.
+    Only open files from a trusted source, as values are unpickled.
+    Tables should be closed, or used as context managers, so that writes reach the disk.
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    # Same growth thresholds and starting sizes as LinearProbeTable.
+    TABLE_SIZES = LinearProbeTable.TABLE_SIZES
+    MAX_LOAD = LinearProbeTable.MAX_LOAD
+
+    DEFAULT_KEY_WIDTH = 64
+    MAGIC = b"HTMMAP01"
+
+    # magic, key width, hash seed, table size, count, garbage bytes, data generation
+    HEADER = struct.Struct("<8sIQQQQQ")
+    # used flag and key hash, read first so most probed slots never decode their key
+    SLOT_HEAD = struct.Struct("<BQ")
+    SLOT_VALUE_OFFSET = SLOT_HEAD.size
+    # value offset, value length and key length
+    SLOT_VALUE = struct.Struct("<QQH")
+
+    def __init__(self, path: str, read_only: bool = False, key_width: int = DEFAULT_KEY_WIDTH,
+                 seed: int = PolynomialHash.DEFAULT_SEED) -> None:
+        """
+        Opens the table at path, creating empty files if they do not exist yet.
+
+        :param read_only: map the files read-only, so the table can be shared between processes
+        :param key_width: key width of a new table, an existing table keeps its own
+        :param seed: hash seed of a new table, an existing table keeps its own
+        :complexity: O(1) to open an existing table, O(M) to create one where M is the first table size
+        :raises FileNotFoundError: when opening a missing table read-only
+        :raises ValueError: when the file is not a mapped hash table
+        """
+        self.path = path
+        self.read_only = read_only
+        if not os.path.exists(path):
+            if read_only:
+                raise FileNotFoundError(path)
+            self._create(path, self.TABLE_SIZES[0], key_width, seed, 0)
+            open(self._data_path(0), "wb").close()
+        self._open()
+
+    def _create(self, path: str, table_size: int, key_width: int, seed: int, generation: int) -> None:
+        """
+        Writes a slot file with a header and table_size empty slots.
+
+        :complexity: O(M) where M is table_size
+        """
+        with open(path, "wb") as file:
+            file.write(self.HEADER.pack(self.MAGIC, key_width, seed, table_size, 0, 0, generation))
+            file.truncate(self.HEADER.size + table_size * self._slot_size(key_width))
+
+    def _open(self) -> None:
+        """
+        Maps the slot file and the data file of the generation it records.
+
+        :raises ValueError: when the file is not a mapped hash table
+        """
+        access = mmap.ACCESS_READ if self.read_only else mmap.ACCESS_WRITE
+        with open(self.path, "rb" if self.read_only else "r+b") as file:
+            self.slots = mmap.mmap(file.fileno(), 0, access=access)
+        magic, self.key_width, seed, self.table_size, _, _, self.generation = self.HEADER.unpack_from(self.slots, 0)
+        if magic != self.MAGIC:
+            self.slots.close()
+            raise ValueError(f"{self.path} is not a mapped hash table.")
+        self.slot_size = self._slot_size(self.key_width)
+        self.hash_function = PolynomialHash(seed)
+        self.data_file = open(self._data_path(self.generation), "rb" if self.read_only else "r+b")
+        self.data = None
+        self._map_data()
+
+    def _map_data(self) -> None:
+        """
+        Maps the whole data file for reading, called again once appended values fall outside the map.
+        An empty file cannot be mapped, so data stays None until the first value is written.
+        """
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        if os.fstat(self.data_file.fileno()).st_size > 0:
+            self.data = mmap.mmap(self.data_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _slot_size(self, key_width: int) -> int:
+        return self.SLOT_HEAD.size + self.SLOT_VALUE.size + key_width
+
+    def _data_path(self, generation: int) -> str:
+        return f"{self.path}.{generation}.dat"
+
+    def _header_field(self, index: int) -> int:
+        return self.HEADER.unpack_from(self.slots, 0)[index]
+
+    def _set_header(self, count: int, garbage: int) -> None:
+        self.HEADER.pack_into(self.slots, 0, self.MAGIC, self.key_width, self.hash_function.seed,
+                              self.table_size, count, garbage, self.generation)
+
+    def __len__(self) -> int:
+        """
+        Returns number of elements in the hash table
+        """
+        return self._header_field(4)
+
+    @property
+    def garbage(self) -> int:
+        """
+        Bytes of the data file held by values that were overwritten or deleted.
+        """
+        return self._header_field(5)
+
+    def is_empty(self) -> bool:
+        return len(self) == 0
+
+    def hash(self, key: str) -> int:
+        """
+        :complexity: O(len(key))
+        """
+        return self.hash_function(key)
+
+    def _offset(self, position: int) -> int:
+        return self.HEADER.size + position * self.slot_size
+
+    def _encode(self, key: str) -> bytes:
+        """
+        :raises ValueError: when the key does not fit in a slot
+        """
+        encoded = key.encode("utf-8")
+        if len(encoded) > self.key_width:
+            raise ValueError(f"Key {key!r} is longer than {self.key_width} bytes.")
+        return encoded
+
+    def _slot_key(self, offset: int) -> bytes:
+        key_length = self.SLOT_VALUE.unpack_from(self.slots, offset + self.SLOT_VALUE_OFFSET)[2]
+        key_start = offset + self.SLOT_VALUE_OFFSET + self.SLOT_VALUE.size
+        return self.slots[key_start:key_start + key_length]
+
+    def _linear_probe(self, encoded: bytes, key_hash: int, is_insert: bool) -> int:
+        """
+        Find the correct position for this key using linear probing.
+        Keys are only read from the slot when the full hashes are equal.
+
+        :complexity best: O(1) first position is empty
+        :complexity worst: O(N + len(key)) when we've searched the entire table where N is the tablesize
+        :raises KeyError: When the key is not in the table, but is_insert is False.
+        """
+        position = key_hash % self.table_size
+        for _ in range(self.table_size):
+            offset = self._offset(position)
+            used, slot_hash = self.SLOT_HEAD.unpack_from(self.slots, offset)
+            if not used:
+                if is_insert:
+                    return position
+                raise KeyError(encoded.decode("utf-8"))
+            if slot_hash == key_hash and self._slot_key(offset) == encoded:
+                return position
+            position = (position + 1) % self.table_size
+        raise KeyError(encoded.decode("utf-8"))
+
+    def _read_value(self, offset: int) -> V:
+        """
+        Unpickles the value a used slot points to, remapping the data file if it has grown since it was mapped.
+        Only use on trusted files, as for pickle.
+
+        :complexity: O(L) where L is the pickled size of the value
+        """
+        value_offset, value_length, _ = self.SLOT_VALUE.unpack_from(self.slots, offset + self.SLOT_VALUE_OFFSET)
+        if self.data is None or value_offset + value_length > len(self.data):
+            self._map_data()
+        return pickle.loads(self.data[value_offset:value_offset + value_length])
+
+    def _append_value(self, data: V) -> tuple[int, int]:
+        """
+        Pickles a value onto the end of the data file.
+
+        :returns: the offset and length of the pickled value
+        :complexity: O(L) where L is the pickled size of the value
+        """
+        pickled = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        value_offset = self.data_file.seek(0, os.SEEK_END)
+        self.data_file.write(pickled)
+        self.data_file.flush()
+        return value_offset, len(pickled)
+
+    def __getitem__(self, key: str) -> V:
+        """
+        Get the value at a certain key
+
+        :complexity: See linear probe, plus unpickling the value.
+        :raises KeyError: when the key doesn't exist.
+        """
+        position = self._linear_probe(self._encode(key), self.hash(key), False)
+        return self._read_value(self._offset(position))
+
+    def __contains__(self, key: str) -> bool:
+        """
+        Checks to see if the given key is in the Hash Table, without reading its value.
+
+        :complexity: See linear probe.
+        """
+        try:
+            self._linear_probe(self._encode(key), self.hash(key), False)
+        except KeyError:
+            return False
+        return True
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise PermissionError(f"{self.path} is open read-only.")
+
+    def __setitem__(self, key: str, data: V) -> None:
+        """
+        Set an (key, value) pair in our hash table.
+        The value is appended to the data file, an existing key's old value becomes garbage.
+
+        :complexity: See linear probe, plus pickling the value.
+        :raises PermissionError: when the table is read-only.
+        :raises ValueError: when the key does not fit in a slot.
+        """
+        self._check_writable()
+        encoded = self._encode(key)
+        key_hash = self.hash(key)
+        position = self._linear_probe(encoded, key_hash, True)
+        offset = self._offset(position)
+        count, garbage = len(self), self.garbage
+
+        value_offset, value_length = self._append_value(data)
+        if self.SLOT_HEAD.unpack_from(self.slots, offset)[0]:
+            garbage += self.SLOT_VALUE.unpack_from(self.slots, offset + self.SLOT_VALUE_OFFSET)[1]
+            self.SLOT_VALUE.pack_into(self.slots, offset + self.SLOT_VALUE_OFFSET, value_offset, value_length, len(encoded))
+        else:
+            count += 1
+            key_start = offset + self.SLOT_VALUE_OFFSET + self.SLOT_VALUE.size
+            self.slots[key_start:key_start + len(encoded)] = encoded
+            self.SLOT_VALUE.pack_into(self.slots, offset + self.SLOT_VALUE_OFFSET, value_offset, value_length, len(encoded))
+            # The used flag is written last, as it marks the slot as taken.
+            self.SLOT_HEAD.pack_into(self.slots, offset, 1, key_hash)
+        self._set_header(count, garbage)
+
+        if count > self.table_size * self.MAX_LOAD:
+            self._rehash()
+
+    def __delitem__(self, key: str) -> None:
+        """
+        Deletes a (key, value) pair in our hash table.
+        Later slots of the cluster are shifted back into the gap as in LinearProbeTable.
+
+        :complexity best: O(len(key)) deleting item is not probed and in correct spot.
+        :complexity worst: O(len(key) + N) deleting item is midway through large chain.
+        :raises KeyError: when the key doesn't exist.
+        :raises PermissionError: when the table is read-only.
+        """
+        self._check_writable()
+        position = self._linear_probe(self._encode(key), self.hash(key), False)
+        offset = self._offset(position)
+        garbage = self.garbage + self.SLOT_VALUE.unpack_from(self.slots, offset + self.SLOT_VALUE_OFFSET)[1]
+        self._clear_slot(offset)
+
+        gap = position
+        position = (position + 1) % self.table_size
+        while True:
+            offset = self._offset(position)
+            used, slot_hash = self.SLOT_HEAD.unpack_from(self.slots, offset)
+            if not used:
+                break
+            home = slot_hash % self.table_size
+            # The slot can fill the gap unless its home lies after the gap.
+            if (position - home) % self.table_size >= (position - gap) % self.table_size:
+                gap_offset = self._offset(gap)
+                self.slots[gap_offset:gap_offset + self.slot_size] = self.slots[offset:offset + self.slot_size]
+                self._clear_slot(offset)
+                gap = position
+            position = (position + 1) % self.table_size
+        self._set_header(len(self) - 1, garbage)
+
+    def _clear_slot(self, offset: int) -> None:
+        self.slots[offset:offset + self.slot_size] = bytes(self.slot_size)
+
+    def _rehash(self) -> None:
+        """
+        Moves every slot into a slot file of the next table size, keeping the data file.
+        Slots are placed using their cached hash, keys are never decoded or re-hashed.
+
+        :complexity best: O(N + M) No probing.
+        :complexity worst: O(N^2 + M) Lots of probing.
+        Where N is len(self) and M is the new table size
+        """
+        size_index = 0
+        while size_at(self.TABLE_SIZES, size_index) <= self.table_size:
+            size_index += 1
+        self._rebuild(size_at(self.TABLE_SIZES, size_index), False)
+
+    def compact(self) -> None:
+        """
+        Copies the live values into a data file of the next generation, dropping the garbage,
+        and rebuilds the slot file to point at it. The previous data file is deleted.
+
+        :complexity: O(N + M + D) where N is len(self), M is the table size and D the size of the live values
+        :raises PermissionError: when the table is read-only.
+        """
+        self._check_writable()
+        self._rebuild(self.table_size, True)
+
+    def _rebuild(self, table_size: int, compact: bool) -> None:
+        """
+        Writes a new slot file next to the current one and atomically replaces it.
+        When compacting, the live values are first copied into a data file of the next generation.
+
+        :complexity best: O(N + M + D) No probing.
+        :complexity worst: O(N^2 + M + D) Lots of probing.
+        Where N is len(self), M is the larger table size and D the size of the values copied
+        """
+        generation = self.generation + 1 if compact else self.generation
+        rebuilt_path = self.path + ".rebuild"
+        self._create(rebuilt_path, table_size, self.key_width, self.hash_function.seed, generation)
+        data_file = open(self._data_path(generation), "wb") if compact else None
+        if self.data is None or len(self.data) < os.fstat(self.data_file.fileno()).st_size:
+            self._map_data()
+
+        with open(rebuilt_path, "r+b") as file:
+            rebuilt = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_WRITE)
+        for old_position in range(self.table_size):
+            offset = self._offset(old_position)
+            used, slot_hash = self.SLOT_HEAD.unpack_from(self.slots, offset)
+            if not used:
+                continue
+            position = slot_hash % table_size
+            while rebuilt[self._offset(position)]:
+                position = (position + 1) % table_size
+            new_offset = self._offset(position)
+            rebuilt[new_offset:new_offset + self.slot_size] = self.slots[offset:offset + self.slot_size]
+            if compact:
+                value_offset, value_length, key_length = self.SLOT_VALUE.unpack_from(self.slots, offset + self.SLOT_VALUE_OFFSET)
+                new_value_offset = data_file.tell()
+                data_file.write(self.data[value_offset:value_offset + value_length])
+                self.SLOT_VALUE.pack_into(rebuilt, new_offset + self.SLOT_VALUE_OFFSET, new_value_offset, value_length, key_length)
+        self.HEADER.pack_into(rebuilt, 0, self.MAGIC, self.key_width, self.hash_function.seed,
+                              table_size, len(self), 0 if compact else self.garbage, generation)
+        rebuilt.flush()
+        rebuilt.close()
+        if compact:
+            data_file.flush()
+            os.fsync(data_file.fileno())
+            data_file.close()
+
+        old_generation = self.generation
+        self._close_maps()
+        os.replace(rebuilt_path, self.path)
+        if compact:
+            os.remove(self._data_path(old_generation))
+        self._open()
+
+    def items(self) -> Iterator[tuple[str, V]]:
+        """
+        Yields every (key, value) pair straight from the mapped slots.
+        The table must not be modified while iterating.
+
+        :complexity: O(N) where N is self.table_size, plus unpickling every value.
+        """
+        for position in range(self.table_size):
+            offset = self._offset(position)
+            if self.slots[offset]:
+                yield self._slot_key(offset).decode("utf-8"), self._read_value(offset)
+
+    def iter_keys(self) -> Iterator[str]:
+        """
+        Yields every key straight from the mapped slots, without reading any value.
+
+        :complexity: O(N) where N is self.table_size, with O(1) extra memory.
+        """
+        for position in range(self.table_size):
+            offset = self._offset(position)
+            if self.slots[offset]:
+                yield self._slot_key(offset).decode("utf-8")
+
+    def iter_values(self) -> Iterator[V]:
+        """
+        Yields every value.
+
+        :complexity: O(N) where N is self.table_size, plus unpickling every value.
+        """
+        for _, value in self.items():
+            yield value
+
+    def keys(self) -> ArrayR[str]:
+        """
+        Returns all keys in the hash table.
+
+        :complexity: O(N) where N is self.table_size.
+        """
+        res = ArrayR(len(self))
+        for i, key in enumerate(self.iter_keys()):
+            res[i] = key
+        return res
+
+    def values(self) -> ArrayR[V]:
+        """
+        Returns all values in the hash table.
+
+        :complexity: O(N) where N is self.table_size, plus unpickling every value.
+        """
+        res = ArrayR(len(self))
+        for i, value in enumerate(self.iter_values()):
+            res[i] = value
+        return res
+
+    def flush(self) -> None:
+        """
+        Writes the mapped slots and the appended values through to the disk.
+
+        :complexity: O(M) where M is the size of the dirty pages
+        """
+        if not self.read_only:
+            self.slots.flush()
+            self.data_file.flush()
+            os.fsync(self.data_file.fileno())
+
+    def _close_maps(self) -> None:
+        self.flush()
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self.data_file.close()
+        self.slots.close()
+
+    def close(self) -> None:
+        """
+        Flushes and unmaps the table. It cannot be used afterwards.
+        """
+        if not self.slots.closed:
+            self._close_maps()
+
+    def __enter__(self) -> MappedHashTable[V]:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        """
+        Returns all they key/value pairs in our hash table (no particular
+        order).
+        :complexity: O(N * (str(key) + str(value))) where N is the table size
+        """
+        result = ""
+        for key, value in self.items():
+            result += "(" + str(key) + "," + str(value) + ")\n"
+        return result
@@ -0,0 +1,324 @@
+""" Hash Table ADT with a compact, insertion-ordered layout.
+
+Defines a Hash Table laid out like CPython's dict. Entries are appended, in
+insertion order, to dense key, value and hash arrays. A separate sparse
+index array, probed linearly, holds for every used slot the position of its
+entry in the dense arrays. Only the index array has to stay under the load
+limit, so the entry arrays waste no room on empty slots, and iterating
+visits the entries in insertion order without touching the index at all.
+
+The index is a typed array of machine integers rather than an ArrayR of
+references, using the narrowest type that can hold every dense position,
+so an index slot takes 1 to 8 bytes instead of a reference to an int object.
+
+Deleting an entry shifts the rest of its index cluster backwards, as in
+LinearProbeTable, and leaves a hole in the dense arrays. Once the dense
+arrays are full, the table is rebuilt: holes are squeezed out, keeping the
+order, and the index is resized to suit the live entries.
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Generic, Iterator, TypeVar, Union
+from data_structures.cow_array import CowTable
+from data_structures.hash_functions import HashFunction, PolynomialHash
+from data_structures.hash_table import LinearProbeTable
+from data_structures.referential_array import ArrayR
+from data_structures.table_sizes import size_at
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class OrderedHashTable(CowTable, Generic[K, V]):
+    """
+    Insertion-ordered Hash Table.
+
+    Type Arguments:
+        - K:    Key Type. In most cases should be string.
+                Otherwise `hash` should be overwritten.
+        - V:    Value Type.
+
+    Attributes:
+        indices: position in the dense arrays of the entry in every index slot, EMPTY for empty slots
+        key_array, value_array: keys and values in insertion order
+        hash_array: full-width hash of every key, None for deleted entries
+        used: number of dense positions taken, including deleted entries
+        count: number of entries
+
+    Iteration follows insertion order; updating a key keeps its position.
+    clone() copies the compact index and snapshots the dense arrays copy-on-write, see CowTable.clone.
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    # Same starting sizes as LinearProbeTable, used for the index array.
+    TABLE_SIZES = LinearProbeTable.TABLE_SIZES
+
+    # The dense arrays hold MAX_LOAD entries per index slot, so the index load never passes it.
+    MAX_LOAD = 2 / 3
+
+    # Index value of an empty slot
+    EMPTY = -1
+
+    # Signed array type codes from narrowest to widest, with the largest position each can hold.
+    INDEX_TYPES = (('b', (1 << 7) - 1), ('h', (1 << 15) - 1), ('i', (1 << 31) - 1), ('q', (1 << 63) - 1))
+
+    COW_ARRAYS = ('key_array', 'value_array', 'hash_array')
+    CLONED_ATTRIBUTES = ('indices',)
+
+    def __init__(self, sizes=None, hash_function: Union[HashFunction[K], None] = None) -> None:
+        """
+        Initialise the Hash Table.
+
+        :param sizes: index sizes to use instead of TABLE_SIZES
+        :param hash_function: hash strategy, PolynomialHash by default
+        """
+        if sizes is not None:
+            self.TABLE_SIZES = sizes
+        self.hash_function = hash_function if hash_function is not None else PolynomialHash()
+        self.size_index = 0
+        self._allocate(self.TABLE_SIZES[self.size_index])
+        self.count = 0
+
+    def hash(self, key: K) -> int:
+        """
+        Hash a key for insert/retrieve/update into the hashtable.
+        The hash does not depend on the table size, positions are hash % table_size.
+
+        :complexity: O(hash_function(key)), O(len(key)) for the default strategy
+        """
+        return self.hash_function(key)
+
+    @property
+    def table_size(self) -> int:
+        """
+        Number of index slots.
+        """
+        return len(self.indices)
+
+    @property
+    def capacity(self) -> int:
+        """
+        Number of dense positions, the most entries that can be added before a rebuild.
+        """
+        return len(self.hash_array)
+
+    def __len__(self) -> int:
+        """
+        Returns number of elements in the hash table
+        """
+        return self.count
+
+    def is_empty(self) -> bool:
+        return self.count == 0
+
+    def _allocate(self, table_size: int) -> None:
+        """
+        Replace the storage with an empty index of the given size and matching dense arrays.
+
+        :complexity: O(M) where M is the table size
+        """
+        capacity = max(1, int(table_size * self.MAX_LOAD))
+        for type_code, largest in self.INDEX_TYPES:
+            if capacity <= largest:
+                break
+        self.indices: array = array(type_code, [self.EMPTY]) * table_size
+        self.key_array: ArrayR[K] = ArrayR(capacity)
+        self.value_array: ArrayR[V] = ArrayR(capacity)
+        self.hash_array: ArrayR[int] = ArrayR(capacity)
+        self.used = 0
+
+    def _lookup(self, key: K, key_hash: int) -> int:
+        """
+        Index slot holding the key, or the empty slot ending its probe if the key is not in the table.
+        Keys are only compared when their full hashes are equal.
+
+        :complexity best: O(1) first slot is empty
+        :complexity worst: O(N + comp(K)) where N is the table size
+        """
+        position = key_hash % self.table_size
+        while True:
+            entry = self.indices[position]
+            if entry == self.EMPTY or (self.hash_array[entry] == key_hash and self.key_array[entry] == key):
+                return position
+            position = (position + 1) % self.table_size
+
+    def _find(self, key: K) -> int:
+        """
+        Dense position of a key.
+
+        :complexity: See _lookup.
+        :raises KeyError: when the key is not in the table.
+        """
+        entry = self.indices[self._lookup(key, self.hash(key))]
+        if entry == self.EMPTY:
+            raise KeyError(key)
+        return entry
+
+    def __getitem__(self, key: K) -> V:
+        """
+        Get the value at a certain key
+
+        :complexity: See _lookup.
+        :raises KeyError: when the key doesn't exist.
+        """
+        return self.value_array[self._find(key)]
+
+    def __contains__(self, key: K) -> bool:
+        """
+        Checks to see if the given key is in the Hash Table
+
+        :complexity: See _lookup.
+        """
+        try:
+            self._find(key)
+        except KeyError:
+            return False
+        else:
+            return True
+
+    def __setitem__(self, key: K, data: V) -> None:
+        """
+        Set an (key, value) pair in our hash table.
+        An existing key keeps its position in the order and only has its value overwritten,
+        a new key is appended to the dense arrays.
+
+        :complexity: See _lookup, plus O(N + M) amortised over the inserts when the dense arrays are full.
+        """
+        key_hash = self.hash(key)
+        position = self._lookup(key, key_hash)
+        entry = self.indices[position]
+        if entry != self.EMPTY:
+            self.value_array[entry] = data
+            return
+
+        if self.used == self.capacity:
+            self._rebuild()
+            position = self._lookup(key, key_hash)
+        self.key_array[self.used] = key
+        self.value_array[self.used] = data
+        self.hash_array[self.used] = key_hash
+        self.indices[position] = self.used
+        self.used += 1
+        self.count += 1
+
+    def __delitem__(self, key: K) -> None:
+        """
+        Deletes a (key, value) pair in our hash table.
+        The entry leaves a hole in the dense arrays, and later slots of its index cluster
+        are shifted back into the gap using the cached hashes.
+
+        :complexity best: O(hash(key)) deleting item is not probed and in correct spot.
+        :complexity worst: O(hash(key) + N) deleting item is midway through large chain.
+        :raises KeyError: when the key doesn't exist.
+        """
+        position = self._lookup(key, self.hash(key))
+        entry = self.indices[position]
+        if entry == self.EMPTY:
+            raise KeyError(key)
+        self.key_array[entry] = None
+        self.value_array[entry] = None
+        self.hash_array[entry] = None
+        self.indices[position] = self.EMPTY
+        self.count -= 1
+
+        gap = position
+        position = (position + 1) % self.table_size
+        while self.indices[position] != self.EMPTY:
+            home = self.hash_array[self.indices[position]] % self.table_size
+            # The slot can fill the gap unless its home lies after the gap.
+            if (position - home) % self.table_size >= (position - gap) % self.table_size:
+                self.indices[gap] = self.indices[position]
+                self.indices[position] = self.EMPTY
+                gap = position
+            position = (position + 1) % self.table_size
+
+    def _rebuild(self) -> None:
+        """
+        Moves the live entries, in order, into new arrays where they fill under 2/3 of the dense positions.
+        The table grows or shrinks to the smallest such size. Entries are indexed using their cached hash.
+
+        :complexity best: O(N + M) No probing.
+        :complexity worst: O(N^2 + M) Lots of probing.
+        Where N is the number of dense positions and M is the new table size
+        """
+        old_keys, old_values, old_hashes, old_used = self.key_array, self.value_array, self.hash_array, self.used
+        size_index = 0
+        while 3 * self.count >= 2 * int(size_at(self.TABLE_SIZES, size_index) * self.MAX_LOAD):
+            size_index += 1
+        self.size_index = size_index
+        self._allocate(size_at(self.TABLE_SIZES, size_index))
+        for x in range(old_used):
+            key_hash = old_hashes[x]
+            if key_hash is not None:
+                position = key_hash % self.table_size
+                while self.indices[position] != self.EMPTY:
+                    position = (position + 1) % self.table_size
+                self.key_array[self.used] = old_keys[x]
+                self.value_array[self.used] = old_values[x]
+                self.hash_array[self.used] = key_hash
+                self.indices[position] = self.used
+                self.used += 1
+
+    def items(self) -> Iterator[tuple[K, V]]:
+        """
+        Yields every (key, value) pair in insertion order, straight from the dense arrays.
+        The table must not be modified while iterating.
+
+        :complexity: O(U) where U is the number of dense positions used, with O(1) extra memory.
+        """
+        for x in range(self.used):
+            if self.hash_array[x] is not None:
+                yield self.key_array[x], self.value_array[x]
+
+    def iter_keys(self) -> Iterator[K]:
+        """
+        Yields every key in insertion order.
+
+        :complexity: See items.
+        """
+        for x in range(self.used):
+            if self.hash_array[x] is not None:
+                yield self.key_array[x]
+
+    def iter_values(self) -> Iterator[V]:
+        """
+        Yields every value in insertion order of the keys.
+
+        :complexity: See items.
+        """
+        for x in range(self.used):
+            if self.hash_array[x] is not None:
+                yield self.value_array[x]
+
+    def keys(self) -> ArrayR[K]:
+        """
+        Returns all keys in the hash table, in insertion order.
+
+        :complexity: See items.
+        """
+        res = ArrayR(self.count)
+        for i, key in enumerate(self.iter_keys()):
+            res[i] = key
+        return res
+
+    def values(self) -> ArrayR[V]:
+        """
+        Returns all values in the hash table, in insertion order of the keys.
+
+        :complexity: See items.
+        """
+        res = ArrayR(self.count)
+        for i, value in enumerate(self.iter_values()):
+            res[i] = value
+        return res
+
+    def __str__(self) -> str:
+        """
+        Returns all they key/value pairs in our hash table, in insertion order.
+        :complexity: O(U * (str(key) + str(value))) where U is the number of dense positions used
+        """
+        result = ""
+        for key, value in self.items():
+            result += "(" + str(key) + "," + str(value) + ")\n"
+        return result
@@ -0,0 +1,353 @@
+""" Hash Table ADT using a generated minimal perfect hash.
+
+Generalises HashyPerfectionTable to any static set of keys. The hash is built
+with CHD (compress, hash and displace): keys are split into small buckets by
+their full-width hash, and each bucket, largest first, is given a
+displacement that moves all of its keys into free slots. Buckets holding a
+single key are left until last and sent straight to one of the remaining
+slots, so the nearly full table is never searched. A lookup hashes the
+key once, reads its bucket's displacement and compares the one key stored in
+the resulting slot. There is exactly one slot per key.
+"""
+from __future__ import annotations
+
+import pickle
+from typing import Generic, Iterable, Iterator, TypeVar, Union
+from data_structures.hash_functions import HashFunction, PolynomialHash
+from data_structures.referential_array import ArrayR
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class PerfectHashTable(Generic[K, V]):
+    """
+    Perfect Hash Table over a fixed key set.
+
+    Type Arguments:
+        - K:    Key Type. In most cases should be string.
+                Otherwise a matching hash_function should be given.
+        - V:    Value Type.
+
+    Attributes:
+        hash_function: full-width hash the perfect hash is built on
+        displacements: displacement index of every bucket
+        slot_keys: the key owning every slot
+        array: (key, value) entries, None for keys without a value
+        count: number of keys with a value
+
+    Only the keys given to the builder can be stored, setting any other key raises KeyError.
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    # Average number of keys per bucket, smaller buckets are easier to place but need more displacements.
+    BUCKET_SIZE = 2
+
+    # Attempts at placing a single bucket, per slot, before the hash function is reseeded.
+    MAX_DISPLACEMENT_TRIES = 4
+
+    # Multiplier spreading consecutive attempts over the table (Knuth's multiplicative hash).
+    TRY_MULTIPLIER = 2654435761
+
+    def __init__(self, keys: Iterable[K], hash_function: Union[HashFunction[K], None] = None) -> None:
+        """
+        Builds a minimal perfect hash for the keys.
+
+        :param keys: the static key set
+        :param hash_function: full-width hash strategy, PolynomialHash by default
+        :complexity: O(n * hash(K)) expected, where n is the number of keys.
+        :raises ValueError: when there are no keys or a key is repeated
+        """
+        key_list = list(keys)
+        if len(key_list) == 0:
+            raise ValueError("A perfect hash table needs at least one key.")
+        self.hash_function = hash_function if hash_function is not None else PolynomialHash()
+        self.table_size = len(key_list)
+        self.bucket_count = (self.table_size + self.BUCKET_SIZE - 1) // self.BUCKET_SIZE
+        while not self._build(key_list):
+            self.hash_function = self.hash_function.reseeded()
+        self.array: ArrayR[Union[tuple[K, V], None]] = ArrayR(self.table_size)
+        self.count = 0
+
+    @staticmethod
+    def _mix(key_hash: int) -> int:
+        """
+        SplitMix64 finaliser. Polynomial hashes of keys like "Player 1" ... "Player 999"
+        differ only in their low digits, which would give every bucket the same shape.
+        """
+        key_hash = (key_hash ^ (key_hash >> 30)) * 0xBF58476D1CE4E5B9 & 0xFFFFFFFFFFFFFFFF
+        key_hash = (key_hash ^ (key_hash >> 27)) * 0x94D049BB133111EB & 0xFFFFFFFFFFFFFFFF
+        return key_hash ^ (key_hash >> 31)
+
+    def _split(self, key_hash: int) -> tuple[int, int, int]:
+        """
+        Splits a full-width hash into its bucket, first position and position step.
+        """
+        rest, bucket = divmod(self._mix(key_hash), self.bucket_count)
+        rest, first = divmod(rest, self.table_size)
+        return bucket, first, rest % self.table_size
+
+    def _build(self, key_list: list[K]) -> bool:
+        """
+        Tries to place every key with the current hash function.
+
+        :returns: False when a bucket could not be placed and the hash function has to be reseeded
+        :complexity: see __init__
+        :raises ValueError: when a key is repeated
+        """
+        buckets: list[list[tuple[K, int, int]]] = [[] for _ in range(self.bucket_count)]
+        for key in key_list:
+            bucket, first, step = self._split(self.hash_function(key))
+            for other, other_first, other_step in buckets[bucket]:
+                if other_first == first and other_step == step:
+                    if other == key:
+                        raise ValueError(f"Duplicate key {key}")
+                    # No displacement can separate these two keys
+                    return False
+            buckets[bucket].append((key, first, step))
+
+        # Counting sort so the largest buckets are placed while the table is still empty
+        largest = max(len(bucket) for bucket in buckets)
+        by_size: list[list[int]] = [[] for _ in range(largest + 1)]
+        for index, bucket in enumerate(buckets):
+            by_size[len(bucket)].append(index)
+
+        self.displacements: ArrayR[int] = ArrayR(self.bucket_count)
+        self.slot_keys: ArrayR[K] = ArrayR(self.table_size)
+        taken = [False] * self.table_size
+        for size in range(largest, 1, -1):
+            for index in by_size[size]:
+                displacement = self._place(buckets[index], taken)
+                if displacement is None:
+                    return False
+                self.displacements[index] = displacement
+                for key, first, step in buckets[index]:
+                    self.slot_keys[self._position(first, step, displacement)] = key
+
+        # Each single key bucket takes any free slot, through d0 = 0 and d1 = slot - first
+        if largest >= 1:
+            free = [position for position in range(self.table_size) if not taken[position]]
+            for index in by_size[1]:
+                key, first, _ = buckets[index][0]
+                position = free.pop()
+                self.displacements[index] = (position - first) % self.table_size
+                self.slot_keys[position] = key
+        for index in by_size[0]:
+            self.displacements[index] = 0
+        return True
+
+    def _place(self, bucket: list[tuple[K, int, int]], taken: list[bool]) -> Union[int, None]:
+        """
+        Finds a displacement that sends every key of the bucket to a distinct free slot
+        and marks those slots as taken. Attempt k tries displacement k * TRY_MULTIPLIER,
+        so consecutive attempts do not walk along the same run of taken slots.
+
+        :returns: the displacement or None when none was found within MAX_DISPLACEMENT_TRIES rounds
+        :complexity: O(t * s) where t is the number of displacements tried and s the bucket size
+        """
+        pairs = self.table_size * self.table_size
+        for attempt in range(self.table_size * self.MAX_DISPLACEMENT_TRIES):
+            displacement = attempt * self.TRY_MULTIPLIER % pairs
+            positions = [self._position(first, step, displacement) for _, first, step in bucket]
+            if all(not taken[position] for position in positions) and len(set(positions)) == len(positions):
+                for position in positions:
+                    taken[position] = True
+                return displacement
+        return None
+
+    def _position(self, first: int, step: int, displacement: int) -> int:
+        """
+        Slot of a key for a displacement index, read as the pair (d0, d1) = divmod(displacement, table_size).
+        """
+        d0, d1 = divmod(displacement, self.table_size)
+        return (first + d0 * step + d1) % self.table_size
+
+    def hash(self, key: K) -> int:
+        """
+        Perfect hash of a key. Keys outside the key set also map to a slot,
+        so the key stored in that slot still has to be compared.
+
+        :complexity: O(hash_function(key)), O(len(key)) for the default strategy
+        """
+        bucket, first, step = self._split(self.hash_function(key))
+        return self._position(first, step, self.displacements[bucket])
+
+    def __len__(self) -> int:
+        """
+        Returns number of elements in the hash table
+        """
+        return self.count
+
+    def _slot(self, key: K) -> int:
+        """
+        Slot owned by a key, using a single key comparison.
+
+        :complexity: O(hash(key) + comp(K))
+        :raises KeyError: when the key is not in the key set
+        """
+        position = self.hash(key)
+        if self.slot_keys[position] != key:
+            raise KeyError(f"{key} not found")
+        return position
+
+    def items(self) -> Iterator[tuple[K, V]]:
+        """
+        Yields every (key, value) pair straight from the backing array.
+        The table must not be modified while iterating.
+
+        :complexity: O(n) where n is the number of keys, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            item = self.array[x]
+            if item is not None:
+                yield item[0], item[1]
+
+    def iter_keys(self) -> Iterator[K]:
+        """
+        Yields every key that has a value.
+
+        :complexity: O(n) where n is the number of keys, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            item = self.array[x]
+            if item is not None:
+                yield item[0]
+
+    def iter_values(self) -> Iterator[V]:
+        """
+        Yields every value straight from the backing array.
+
+        :complexity: O(n) where n is the number of keys, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            item = self.array[x]
+            if item is not None:
+                yield item[1]
+
+    def keys(self) -> ArrayR[K]:
+        """
+        Returns all keys that have a value.
+
+        :complexity: O(n) where n is the number of keys.
+        """
+        res = ArrayR(self.count)
+        for i, key in enumerate(self.iter_keys()):
+            res[i] = key
+        return res
+
+    def values(self) -> ArrayR[V]:
+        """
+        Returns all values in the hash table.
+
+        :complexity: O(n) where n is the number of keys.
+        """
+        res = ArrayR(self.count)
+        for i, value in enumerate(self.iter_values()):
+            res[i] = value
+        return res
+
+    def __contains__(self, key: K) -> bool:
+        """
+        Checks to see if the given key has a value in the Hash Table
+
+        :complexity: See _slot.
+        """
+        try:
+            _ = self[key]
+        except KeyError:
+            return False
+        else:
+            return True
+
+    def __getitem__(self, key: K) -> V:
+        """
+        Get the value at a certain key
+
+        :complexity: See _slot.
+        :raises KeyError: when the key doesn't have a value.
+        """
+        item = self.array[self._slot(key)]
+        if item is None:
+            raise KeyError(f"{key} not found")
+        return item[1]
+
+    def __setitem__(self, key: K, data: V) -> None:
+        """
+        Set an (key, value) pair in our hash table.
+
+        :complexity: See _slot.
+        :raises KeyError: when the key is not in the key set.
+        """
+        position = self._slot(key)
+        if self.array[position] is None:
+            self.count += 1
+        self.array[position] = (key, data)
+
+    def __delitem__(self, key: K) -> None:
+        """
+        Deletes a (key, value) pair in our hash table. The key stays in the key set.
+
+        :complexity: See _slot.
+        :raises KeyError: when the key doesn't have a value.
+        """
+        position = self._slot(key)
+        if self.array[position] is None:
+            raise KeyError(f"{key} not found")
+        self.array[position] = None
+        self.count -= 1
+
+    def is_empty(self) -> bool:
+        return self.count == 0
+
+    def is_full(self) -> bool:
+        return self.count == self.table_size
+
+    def __getstate__(self) -> dict:
+        """
+        Pickled state, ArrayR wraps a ctypes array which cannot be pickled directly.
+
+        :complexity: O(n) where n is the number of keys.
+        """
+        state = self.__dict__.copy()
+        for name in ("displacements", "slot_keys", "array"):
+            state[name] = state[name].to_list()
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        :complexity: O(n) where n is the number of keys.
+        """
+        for name in ("displacements", "slot_keys", "array"):
+            state[name] = ArrayR.from_list(state[name])
+        self.__dict__.update(state)
+
+    def serialise(self) -> bytes:
+        """
+        Serialises the built hash together with the stored values, so the key set
+        does not have to be rebuilt. Values have to be picklable.
+
+        :complexity: O(n) where n is the number of keys.
+        """
+        return pickle.dumps(self)
+
+    @classmethod
+    def deserialise(cls, data: bytes) -> PerfectHashTable[K, V]:
+        """
+        Restores a table written by serialise. Only use on trusted data, as for pickle.
+
+        :complexity: O(n) where n is the number of keys.
+        :raises TypeError: when the data does not hold a PerfectHashTable
+        """
+        table = pickle.loads(data)
+        if not isinstance(table, cls):
+            raise TypeError(f"Expected a serialised {cls.__name__}")
+        return table
+
+    def __str__(self) -> str:
+        """
+        :complexity: O(n * (str(key) + str(value))) where n is the number of keys.
+        """
+        result = ""
+        for key, value in self.items():
+            result += "(" + str(key) + "," + str(value) + ")\n"
+        return result
@@ -0,0 +1,169 @@
+""" Resize policies for the open-addressing hash tables.
+
+A policy decides when a table grows, compacts its deleted slots or shrinks.
+Tables ask it after every insert of a new key, passing how many slots past
+the home position the insert had to probe, and tell it whenever they rebuild.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+
+
+class ResizePolicy(ABC):
+    """
+    Abstract resize policy.
+
+    The table passed to every method provides len(table), table.table_size and,
+    if it uses lazy deletion, table.tombstones.
+
+    Attributes:
+        grow_load: a table whose load stays at or below this never grows, used to size tables up front
+        shrink_load: a table shrinks once its load falls below this
+        shrink_target_load: a shrinking table moves to the smallest size with at most this load
+    """
+
+    def __init__(self, grow_load: float, shrink_load: float, shrink_target_load: float) -> None:
+        """
+        :raises ValueError: when the loads do not satisfy 0 <= shrink_load < shrink_target_load < grow_load < 1,
+        open addressing needs a free slot to end every probe
+        """
+        if not 0 <= shrink_load < shrink_target_load < grow_load < 1:
+            raise ValueError("Loads should satisfy 0 <= shrink_load < shrink_target_load < grow_load < 1.")
+        self.grow_load = grow_load
+        self.shrink_load = shrink_load
+        self.shrink_target_load = shrink_target_load
+
+    @abstractmethod
+    def should_grow(self, table, probe_length: int) -> bool:
+        """
+        Called once after every insert of a new key, before should_compact.
+
+        :param probe_length: slots probed past the home position of the new key
+        """
+        pass
+
+    def should_compact(self, table, probe_length: int) -> bool:
+        """
+        Called after every insert of a new key that did not grow the table, for tables with deleted slots.
+        """
+        return False
+
+    @staticmethod
+    def _worth_compacting(table, max_load: float) -> bool:
+        """
+        Whether deleted slots take up more than half the room max_load leaves free. Only then does a
+        compaction free enough slots to last O(M) inserts; a table with fewer deleted slots past the
+        limit has its live entries near the limit too, and grows instead.
+
+        :complexity: O(1)
+        """
+        return getattr(table, "tombstones", 0) > table.table_size * (1 - max_load) / 2
+
+    def should_shrink(self, table) -> bool:
+        """
+        Called after every delete.
+
+        :complexity: O(1)
+        """
+        return len(table) < table.table_size * self.shrink_load
+
+    def on_rebuild(self, table) -> None:
+        """
+        Called after the table was resized, compacted or reseeded.
+        """
+        pass
+
+
+class LoadFactorPolicy(ResizePolicy):
+    """
+    Fixed thresholds: grow once the load passes max_load. Once live entries plus
+    deleted slots pass it, compact if deleted slots are a real share of the table
+    and grow otherwise. The default policy of every table.
+    """
+
+    def __init__(self, max_load: float, shrink_load: float, shrink_target_load: float) -> None:
+        ResizePolicy.__init__(self, max_load, shrink_load, shrink_target_load)
+        self.max_load = max_load
+
+    def should_grow(self, table, probe_length: int) -> bool:
+        """
+        :complexity: O(1)
+        """
+        used = len(table) + getattr(table, "tombstones", 0)
+        if used > table.table_size * self.max_load and not self._worth_compacting(table, self.max_load):
+            return True
+        return len(table) > table.table_size * self.max_load
+
+    def should_compact(self, table, probe_length: int) -> bool:
+        """
+        :complexity: O(1)
+        """
+        used = len(table) + getattr(table, "tombstones", 0)
+        return used > table.table_size * self.max_load and self._worth_compacting(table, self.max_load)
+
+
+class AdaptivePolicy(ResizePolicy):
+    """
+    Load thresholds driven by the observed probe lengths.
+
+    Keeps a moving average of insert probe lengths since the last rebuild. Between
+    min_load and max_load the table grows (or compacts, if deleted slots are a real
+    share of the table) as soon as that average passes probe_budget. Well spread
+    keys let the load run up to max_load, while clustered keys or many deleted
+    slots make the table grow early, trading memory for shorter probes.
+
+    Attributes:
+        average_probe: moving average of the probe lengths since the last rebuild
+    """
+    DEFAULT_MIN_LOAD = 0.4
+    DEFAULT_MAX_LOAD = 0.85
+    DEFAULT_PROBE_BUDGET = 3.0
+    DEFAULT_SHRINK_LOAD = 1 / 8
+    DEFAULT_SHRINK_TARGET_LOAD = 1 / 4
+
+    # Weight of the newest probe length in the moving average
+    SMOOTHING = 1 / 16
+
+    def __init__(self, min_load: float = DEFAULT_MIN_LOAD, max_load: float = DEFAULT_MAX_LOAD,
+                 probe_budget: float = DEFAULT_PROBE_BUDGET, shrink_load: float = DEFAULT_SHRINK_LOAD,
+                 shrink_target_load: float = DEFAULT_SHRINK_TARGET_LOAD) -> None:
+        """
+        :raises ValueError: when the loads are out of order, a table can never be allowed to fill up
+        """
+        if not min_load <= max_load < 1:
+            raise ValueError("Loads should satisfy min_load <= max_load < 1.")
+        ResizePolicy.__init__(self, min_load, shrink_load, shrink_target_load)
+        self.min_load = min_load
+        self.max_load = max_load
+        self.probe_budget = probe_budget
+        self.average_probe = 0.0
+
+    def _over_budget(self, table, load: float) -> bool:
+        if load > self.max_load:
+            return True
+        return load > self.min_load and self.average_probe > self.probe_budget
+
+    def should_grow(self, table, probe_length: int) -> bool:
+        """
+        :complexity: O(1)
+        """
+        self.average_probe += (probe_length - self.average_probe) * self.SMOOTHING
+        used = len(table) + getattr(table, "tombstones", 0)
+        if not self._worth_compacting(table, self.max_load) and self._over_budget(table, used / table.table_size):
+            return True
+        return self._over_budget(table, len(table) / table.table_size)
+
+    def should_compact(self, table, probe_length: int) -> bool:
+        """
+        :complexity: O(1)
+        """
+        used = len(table) + getattr(table, "tombstones", 0)
+        return self._worth_compacting(table, self.max_load) and self._over_budget(table, used / table.table_size)
+
+    def on_rebuild(self, table) -> None:
+        """
+        Starts a new average, probes of the old layout say nothing about the new one.
+
+        :complexity: O(1)
+        """
+        self.average_probe = 0.0
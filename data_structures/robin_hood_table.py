@@ -0,0 +1,307 @@
+""" Hash Table ADT
+
+Defines a Hash Table using Robin Hood hashing for conflict resolution.
+Each slot records how far its entry is from its home position. An insert
+takes the slot of any entry that is closer to home than itself, which keeps
+probe lengths short and even, so the table runs at a high load factor.
+Lookups stop as soon as they pass an entry closer to home than the key
+would be, and deletion shifts the rest of the cluster backwards.
+Keys, values, hashes and distances live in parallel arrays, so updating the
+value of an existing key overwrites a single slot and allocates nothing.
+"""
+from __future__ import annotations
+
+from typing import Iterator, TypeVar, Generic, Union
+from data_structures.cow_array import CowTable
+from data_structures.hash_functions import HashFunction, PolynomialHash
+from data_structures.hash_table import FullError
+from data_structures.referential_array import ArrayR
+from data_structures.table_sizes import size_at
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class RobinHoodTable(CowTable, Generic[K, V]):
+    """
+    Robin Hood Table.
+
+    Type Arguments:
+        - K:    Key Type. In most cases should be string.
+                Otherwise `hash` should be overwritten.
+        - V:    Value Type.
+
+    Attributes:
+        key_array, value_array: key and value of the entry in every slot
+        hash_array: full-width hash of the key in every slot
+        distances: distance of every entry from its home position, None for empty slots
+        count: number of entries
+
+    clone() returns a copy-on-write snapshot, in O(1) once the table has been cloned before.
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    # Starting sizes, continued with generated primes once a table outgrows them.
+    TABLE_SIZES = [5, 13, 29, 53, 97, 193, 389, 769, 1543, 3079, 6151, 12289, 24593, 49157, 98317, 196613, 393241, 786433, 1572869]
+
+    # Robin Hood keeps probe lengths short up to high loads.
+    MAX_LOAD_FACTOR = 0.875
+
+    COW_ARRAYS = ('key_array', 'value_array', 'hash_array', 'distances')
+
+    def __init__(self, sizes=None, hash_function: Union[HashFunction[K], None] = None) -> None:
+        """
+        Initialise the Hash Table.
+
+        :param sizes: table sizes to use instead of TABLE_SIZES
+        :param hash_function: hash strategy, PolynomialHash by default
+        """
+        if sizes is not None:
+            self.TABLE_SIZES = sizes
+        self.hash_function = hash_function if hash_function is not None else PolynomialHash()
+        self.size_index = 0
+        self._allocate(self.TABLE_SIZES[self.size_index])
+        self.count = 0
+
+    def hash(self, key: K) -> int:
+        """
+        Hash a key for insert/retrieve/update into the hashtable.
+        The hash does not depend on the table size, positions are hash % table_size.
+
+        :complexity: O(hash_function(key)), O(len(key)) for the default strategy
+        """
+        return self.hash_function(key)
+
+    @property
+    def table_size(self) -> int:
+        return len(self.distances)
+
+    def _allocate(self, table_size: int) -> None:
+        """
+        Replace the storage with empty arrays of the given size.
+
+        :complexity: O(M) where M is the table size
+        """
+        self.key_array: ArrayR[K] = ArrayR(table_size)
+        self.value_array: ArrayR[V] = ArrayR(table_size)
+        self.hash_array: ArrayR[int] = ArrayR(table_size)
+        self.distances: ArrayR[int] = ArrayR(table_size)
+
+    def __len__(self) -> int:
+        """
+        Returns number of elements in the hash table
+        """
+        return self.count
+
+    def _find(self, key: K, key_hash: int) -> int:
+        """
+        Find the position of a key.
+        The search stops at an empty slot or at an entry closer to its home than the key would be.
+
+        :complexity best: O(1) first position is empty
+        :complexity worst: O(D + comp(K)) where D is the longest probe distance in the table
+        :raises KeyError: When the key is not in the table.
+        """
+        position = key_hash % self.table_size
+        distance = 0
+        while self.distances[position] is not None and self.distances[position] >= distance:
+            if self.hash_array[position] == key_hash and self.key_array[position] == key:
+                return position
+            position = (position + 1) % self.table_size
+            distance += 1
+        raise KeyError(key)
+
+    def _place(self, key: K, data: V, key_hash: int, position: int, distance: int) -> None:
+        """
+        Place an entry known not to be in the table, starting the probe at position.
+        Entries closer to their home than the one being placed are displaced and placed further along.
+
+        :complexity best: O(1) first position is empty
+        :complexity worst: O(N) where N is the tablesize
+        """
+        while self.distances[position] is not None:
+            if self.distances[position] < distance:
+                # Take the slot from the richer entry and carry it on instead.
+                key, self.key_array[position] = self.key_array[position], key
+                data, self.value_array[position] = self.value_array[position], data
+                key_hash, self.hash_array[position] = self.hash_array[position], key_hash
+                distance, self.distances[position] = self.distances[position], distance
+            position = (position + 1) % self.table_size
+            distance += 1
+        self.key_array[position] = key
+        self.value_array[position] = data
+        self.hash_array[position] = key_hash
+        self.distances[position] = distance
+
+    def items(self) -> Iterator[tuple[K, V]]:
+        """
+        Yields every (key, value) pair straight from the backing arrays.
+        The table must not be modified while iterating.
+
+        :complexity: O(N) where N is self.table_size, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            if self.distances[x] is not None:
+                yield self.key_array[x], self.value_array[x]
+
+    def iter_keys(self) -> Iterator[K]:
+        """
+        Yields every key straight from the backing arrays.
+
+        :complexity: O(N) where N is self.table_size, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            if self.distances[x] is not None:
+                yield self.key_array[x]
+
+    def iter_values(self) -> Iterator[V]:
+        """
+        Yields every value straight from the backing arrays.
+
+        :complexity: O(N) where N is self.table_size, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            if self.distances[x] is not None:
+                yield self.value_array[x]
+
+    def keys(self) -> ArrayR[K]:
+        """
+        Returns all keys in the hash table.
+
+        :complexity: O(N) where N is self.table_size.
+        """
+        res = ArrayR(self.count)
+        for i, key in enumerate(self.iter_keys()):
+            res[i] = key
+        return res
+
+    def values(self) -> ArrayR[V]:
+        """
+        Returns all values in the hash table.
+
+        :complexity: O(N) where N is self.table_size.
+        """
+        res = ArrayR(self.count)
+        for i, value in enumerate(self.iter_values()):
+            res[i] = value
+        return res
+
+    def __contains__(self, key: K) -> bool:
+        """
+        Checks to see if the given key is in the Hash Table
+
+        :complexity: See _find.
+        """
+        try:
+            _ = self[key]
+        except KeyError:
+            return False
+        else:
+            return True
+
+    def __getitem__(self, key: K) -> V:
+        """
+        Get the value at a certain key
+
+        :complexity: See _find.
+        :raises KeyError: when the key doesn't exist.
+        """
+        return self.value_array[self._find(key, self.hash(key))]
+
+    def __setitem__(self, key: K, data: V) -> None:
+        """
+        Set an (key, value) pair in our hash table.
+
+        :complexity best: O(hash(key)) first position is empty.
+        :complexity worst: O(hash(key) + N) when entries have to be displaced.
+        :raises FullError: when the table is full and cannot be resized further.
+        """
+        key_hash = self.hash(key)
+        position = key_hash % self.table_size
+        distance = 0
+        while self.distances[position] is not None and self.distances[position] >= distance:
+            if self.hash_array[position] == key_hash and self.key_array[position] == key:
+                # Update in place, the entry does not move.
+                self.value_array[position] = data
+                return
+            position = (position + 1) % self.table_size
+            distance += 1
+
+        if self.is_full():
+            raise FullError("Table is full!")
+        # The key is not in the table, so it can be placed from here.
+        self._place(key, data, key_hash, position, distance)
+        self.count += 1
+
+        if len(self) > self.table_size * self.MAX_LOAD_FACTOR:
+            self._rehash()
+
+    def __delitem__(self, key: K) -> None:
+        """
+        Deletes a (key, value) pair in our hash table.
+        Later entries of the cluster are shifted back by one until an empty slot
+        or an entry already at its home position is reached.
+
+        :complexity best: O(hash(key)) deleting item is not probed and in correct spot.
+        :complexity worst: O(hash(key) + N) deleting item is at the start of a large cluster.
+        :raises KeyError: when the key doesn't exist.
+        """
+        position = self._find(key, self.hash(key))
+        self.count -= 1
+        following = (position + 1) % self.table_size
+        while self.distances[following] is not None and self.distances[following] > 0:
+            self.key_array[position] = self.key_array[following]
+            self.value_array[position] = self.value_array[following]
+            self.hash_array[position] = self.hash_array[following]
+            self.distances[position] = self.distances[following] - 1
+            position = following
+            following = (following + 1) % self.table_size
+        self.key_array[position] = None
+        self.value_array[position] = None
+        self.hash_array[position] = None
+        self.distances[position] = None
+
+    def is_empty(self) -> bool:
+        return self.count == 0
+
+    def is_full(self) -> bool:
+        return self.count == self.table_size
+
+    def max_distance(self) -> int:
+        """
+        Returns the longest probe distance in the table.
+
+        :complexity: O(N) where N is self.table_size.
+        """
+        res = 0
+        for x in range(self.table_size):
+            if self.distances[x] is not None and self.distances[x] > res:
+                res = self.distances[x]
+        return res
+
+    def _rehash(self) -> None:
+        """
+        Need to resize table and reinsert all values.
+        Entries are placed using their cached hash, keys are never re-hashed or compared.
+
+        :complexity best: O(N) No probing.
+        :complexity worst: O(N^2) Lots of probing.
+        Where N is len(self)
+        """
+        old_keys, old_values, old_hashes, old_distances = self.key_array, self.value_array, self.hash_array, self.distances
+        self.size_index += 1
+        self._allocate(size_at(self.TABLE_SIZES, self.size_index))
+        for x in range(len(old_distances)):
+            if old_distances[x] is not None:
+                self._place(old_keys[x], old_values[x], old_hashes[x], old_hashes[x] % self.table_size, 0)
+
+    def __str__(self) -> str:
+        """
+        Returns all they key/value pairs in our hash table (no particular
+        order).
+        :complexity: O(N * (str(key) + str(value))) where N is the table size
+        """
+        result = ""
+        for key, value in self.items():
+            result += "(" + str(key) + "," + str(value) + ")\n"
+        return result
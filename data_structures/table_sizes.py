@@ -0,0 +1,79 @@
+""" Prime table sizes generated on demand.
+
+The hash tables start from a fixed list of prime sizes. Once a table grows
+past the end of its list, the sizes continue with the first prime after
+double the last size, so tables keep growing by roughly a factor of two
+with no upper limit. Generated sizes are cached per starting list, never
+added to the list itself, which classes and callers may share.
+"""
+from __future__ import annotations
+
+# Witnesses making Miller-Rabin deterministic for every n below 3.3 * 10^24
+PRIME_WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+# Factor between consecutive generated sizes
+GROWTH_FACTOR = 2
+
+# Sizes generated past the end of every starting list, keyed by the starting list as a tuple
+_generated: dict[tuple[int, ...], list[int]] = {}
+
+
+def is_prime(n: int) -> bool:
+    """
+    Deterministic Miller-Rabin primality test.
+
+    :complexity: O(log(n)^3) using schoolbook multiplication
+    """
+    if n < 2:
+        return False
+    for p in PRIME_WITNESSES:
+        if n % p == 0:
+            return n == p
+    # n - 1 = d * 2^s with d odd
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in PRIME_WITNESSES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def next_prime(n: int) -> int:
+    """
+    Returns the smallest prime strictly larger than n.
+
+    :complexity: O(g * log(n)^3) where g is the gap to the next prime, O(log(n)) on average
+    """
+    candidate = max(n + 1, 2)
+    while not is_prime(candidate):
+        candidate += 1
+    return candidate
+
+
+def size_at(sizes: list[int], index: int) -> int:
+    """
+    Returns the size at index in the sequence starting with sizes, generating primes past its end.
+    The list is left unchanged; generated sizes are cached for every table starting from the same sizes.
+
+    :complexity: O(1) when sizes is long enough, otherwise O(L) to look up the cache where L is len(sizes),
+    plus O(k * log(n)^4) where k is the number of sizes generated and n the largest of them
+    :raises IndexError: when index is negative
+    """
+    if index < 0:
+        raise IndexError(f"Index {index} out of range")
+    if index < len(sizes):
+        return sizes[index]
+    generated = _generated.setdefault(tuple(sizes), [])
+    while len(sizes) + len(generated) <= index:
+        last = generated[-1] if generated else sizes[-1]
+        generated.append(next_prime(last * GROWTH_FACTOR))
+    return generated[index - len(sizes)]
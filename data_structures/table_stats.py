@@ -0,0 +1,177 @@
+""" Opt-in instrumentation shared by the hash tables.
+
+Instrumentation is off by default and then costs nothing: the tables run
+their normal methods. `enable_stats` puts counting wrappers around a few of a
+table's internal methods, as attributes of that one instance. The wrappers
+record the probe length of every search and the count and duration of every
+rebuild. `disable_stats` removes them again. `stats` reports the counters
+together with figures read from the table itself, such as its load factor.
+"""
+from __future__ import annotations
+
+import time
+from typing import Callable, TypeVar
+from data_structures.referential_array import ArrayR
+
+F = TypeVar('F', bound=Callable)
+
+
+class TableStats:
+    """
+    Counters collected while instrumentation is enabled.
+
+    Attributes:
+        hits, misses: number of searches that found / did not find their key
+        hit_probes, miss_probes: total slots or nodes examined by those searches
+        max_hit_probe, max_miss_probe: longest single search of each kind
+        histogram: histogram[n] is the number of searches that examined n slots or nodes
+        rebuilds: number of rehashes, resizes, compactions and reseeds
+        rebuild_seconds: total time spent rebuilding
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.hit_probes = 0
+        self.miss_probes = 0
+        self.max_hit_probe = 0
+        self.max_miss_probe = 0
+        self.histogram: ArrayR[int] = ArrayR.from_list([0] * 8)
+        self.rebuilds = 0
+        self.rebuild_seconds = 0.0
+
+    def record_probe(self, length: int, hit: bool) -> None:
+        """
+        :complexity: O(1) amortised, the histogram doubles when a longer search is seen
+        """
+        if hit:
+            self.hits += 1
+            self.hit_probes += length
+            self.max_hit_probe = max(self.max_hit_probe, length)
+        else:
+            self.misses += 1
+            self.miss_probes += length
+            self.max_miss_probe = max(self.max_miss_probe, length)
+        if length >= len(self.histogram):
+            grown = ArrayR.from_list([0] * (2 * length))
+            for i in range(len(self.histogram)):
+                grown[i] = self.histogram[i]
+            self.histogram = grown
+        self.histogram[length] += 1
+
+    def timed(self, method: F) -> F:
+        """
+        Wraps a rebuild method so its calls are counted and timed.
+        """
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.rebuilds += 1
+                self.rebuild_seconds += time.perf_counter() - start
+        return wrapper
+
+
+def trim_histogram(histogram: ArrayR[int]) -> ArrayR[int]:
+    """
+    Copies a histogram without its trailing zeros, keeping at least one entry.
+
+    :complexity: O(n) where n is the length of the histogram
+    """
+    length = len(histogram)
+    while length > 1 and histogram[length - 1] == 0:
+        length -= 1
+    res = ArrayR(length)
+    for i in range(length):
+        res[i] = histogram[i]
+    return res
+
+
+class InstrumentedTable:
+    """
+    Uniform stats API for the hash tables.
+
+    Subclasses list the internal methods they wrap in INSTRUMENTED_METHODS and implement:
+        _instrument(stats): returns a dict of wrappers, keyed by method name
+        _capacity(): number of slots (or buckets) the load factor is measured against
+        _structure_stats(report): adds table specific figures to a stats report
+    """
+
+    INSTRUMENTED_METHODS: tuple[str, ...] = ()
+
+    def stats_enabled(self) -> bool:
+        return '_table_stats' in self.__dict__
+
+    def enable_stats(self) -> None:
+        """
+        Starts collecting probe and rebuild counters. Does nothing if already enabled.
+        Methods already overridden on the instance (e.g. a test replacing `hash`) are wrapped too,
+        and restored by disable_stats.
+
+        :complexity: O(1)
+        """
+        if self.stats_enabled():
+            return
+        self._table_stats = TableStats()
+        self._replaced_methods = {name: self.__dict__[name] for name in self.INSTRUMENTED_METHODS if name in self.__dict__}
+        wrappers = self._instrument(self._table_stats)
+        for name in self.INSTRUMENTED_METHODS:
+            setattr(self, name, wrappers[name])
+
+    def disable_stats(self) -> None:
+        """
+        Stops collecting and discards the counters. Does nothing if not enabled.
+
+        :complexity: O(1)
+        """
+        if not self.stats_enabled():
+            return
+        for name in self.INSTRUMENTED_METHODS:
+            if name in self._replaced_methods:
+                setattr(self, name, self._replaced_methods[name])
+            else:
+                delattr(self, name)
+        del self._table_stats
+        del self._replaced_methods
+
+    def stats(self):
+        """
+        Returns a LinearProbeTable report keyed by name:
+            enabled, size, capacity, load_factor
+            hits, misses, avg_hit_probe, avg_miss_probe, max_hit_probe, max_miss_probe,
+            probe_histogram (ArrayR, index is the probe length), rebuilds, rebuild_seconds
+        plus the table specific entries (tombstone_ratio, chain_histogram, ...).
+        Counters are 0 while instrumentation is disabled.
+
+        :complexity: O(M) where M is the capacity, for the table specific figures
+        """
+        # Imported here, as hash_table itself uses this module.
+        from data_structures.hash_table import LinearProbeTable
+
+        stats = self._table_stats if self.stats_enabled() else TableStats()
+        report = LinearProbeTable()
+        report["enabled"] = self.stats_enabled()
+        report["size"] = len(self)
+        report["capacity"] = self._capacity()
+        report["load_factor"] = len(self) / self._capacity()
+        report["hits"] = stats.hits
+        report["misses"] = stats.misses
+        report["avg_hit_probe"] = stats.hit_probes / stats.hits if stats.hits else 0.0
+        report["avg_miss_probe"] = stats.miss_probes / stats.misses if stats.misses else 0.0
+        report["max_hit_probe"] = stats.max_hit_probe
+        report["max_miss_probe"] = stats.max_miss_probe
+        report["probe_histogram"] = trim_histogram(stats.histogram)
+        report["rebuilds"] = stats.rebuilds
+        report["rebuild_seconds"] = stats.rebuild_seconds
+        self._structure_stats(report)
+        return report
+
+    def _instrument(self, stats: TableStats):
+        raise NotImplementedError
+
+    def _capacity(self) -> int:
+        raise NotImplementedError
+
+    def _structure_stats(self, report) -> None:
+        pass
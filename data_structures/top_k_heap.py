@@ -0,0 +1,233 @@
+""" Bounded heap that keeps the k best items offered to it.
+
+The worst of the kept items sits at the root, so a better item can replace it
+in O(log k). Items are identified by a string key, which lets a kept item be
+moved when its priority changes instead of being inserted twice.
+
+Alongside the heap, the kept entries are also held in rank order, updated in
+O(k) whenever the kept items change, so reading them best first is a linear
+walk rather than a sort.
+"""
+from __future__ import annotations
+
+from data_structures.hash_table import LinearProbeTable
+from data_structures.referential_array import ArrayR
+from typing import Callable, Generic, TypeVar, Union
+
+P = TypeVar('P')
+T = TypeVar('T')
+
+
+class TopKHeap(Generic[P, T]):
+    """
+    Top-k heap.
+
+    Type Arguments:
+        - P:    Priority Type. Ordered by the `compare` function.
+        - T:    Item Type.
+
+    Attributes:
+        capacity: the number of items kept
+        compare: compare(a, b) < 0 when priority a ranks ahead of priority b
+        array: heap of (key, priority, item) entries, worst ranked at the root
+        ranked: the same entries in rank order, best first
+        positions: maps the key of every kept item to its index in the array
+
+    Unless stated otherwise, all methods have O(1) complexity.
+    """
+
+    def __init__(self, capacity: int, compare: Callable[[P, P], int]) -> None:
+        """
+        :complexity: O(capacity) to initialise the array
+        :raises ValueError: when the capacity is not positive
+        """
+        if capacity <= 0:
+            raise ValueError("Heap capacity should be larger than 0.")
+        self.capacity = capacity
+        self.compare = compare
+        self.array: ArrayR[tuple[str, P, T]] = ArrayR(capacity)
+        self.ranked: ArrayR[tuple[str, P, T]] = ArrayR(capacity)
+        self.length = 0
+        self.positions: LinearProbeTable[str, int] = LinearProbeTable()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def is_empty(self) -> bool:
+        return self.length == 0
+
+    def is_full(self) -> bool:
+        return self.length == self.capacity
+
+    def __contains__(self, key: str) -> bool:
+        """
+        :complexity: O(hash(key))
+        """
+        return key in self.positions
+
+    def priority_of(self, key: str) -> P:
+        """
+        Returns the priority a kept item was offered with.
+
+        :complexity: O(hash(key))
+        :raises KeyError: when the key is not kept
+        """
+        return self.array[self.positions[key]][1]
+
+    def peek_worst(self) -> tuple[str, P, T]:
+        """
+        Returns the (key, priority, item) entry that ranks last.
+
+        :raises IndexError: when the heap is empty
+        """
+        if self.is_empty():
+            raise IndexError("Heap is empty")
+        return self.array[0]
+
+    def offer(self, key: str, priority: P, item: T) -> bool:
+        """
+        Offers an item to the heap.
+        A kept item is moved to match its new priority, a new item is kept
+        if there is room or if it ranks ahead of the current worst.
+
+        :returns: whether the kept items or their order changed
+        :complexity: O(1) when the item is not kept, otherwise O(k + log(k) * hash(key)) where k is the capacity
+        """
+        entry = (key, priority, item)
+        if key in self.positions:
+            index = self.positions[key]
+            self.array[index] = entry
+            index = self._rise(index)
+            self._sink(index)
+            self._unrank(key, self.length)
+            self._rank(entry, self.length - 1)
+            return True
+
+        if self.length < self.capacity:
+            self.array[self.length] = entry
+            self.positions[key] = self.length
+            self._rank(entry, self.length)
+            self.length += 1
+            self._rise(self.length - 1)
+            return True
+
+        if self.compare(priority, self.array[0][1]) < 0:
+            worst_key = self.array[0][0]
+            del self.positions[worst_key]
+            self.array[0] = entry
+            self.positions[key] = 0
+            self._sink(0)
+            self._unrank(worst_key, self.length)
+            self._rank(entry, self.length - 1)
+            return True
+
+        return False
+
+    def _unrank(self, key: str, count: int) -> None:
+        """
+        Removes the entry with the given key from the first count entries of the ranking, closing the gap.
+
+        :complexity: O(count)
+        """
+        index = 0
+        while self.ranked[index][0] != key:
+            index += 1
+        for i in range(index, count - 1):
+            self.ranked[i] = self.ranked[i + 1]
+        self.ranked[count - 1] = None
+
+    def _rank(self, entry: tuple[str, P, T], count: int) -> None:
+        """
+        Inserts an entry into the first count entries of the ranking, behind every entry
+        ranked ahead of or level with it. The insertion point is found by binary search.
+
+        :complexity: O(count), to shift the entries ranked behind it
+        """
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if self.compare(entry[1], self.ranked[middle][1]) < 0:
+                high = middle
+            else:
+                low = middle + 1
+        for i in range(count, low, -1):
+            self.ranked[i] = self.ranked[i - 1]
+        self.ranked[low] = entry
+
+    def clear(self) -> None:
+        """
+        :complexity: O(k) where k is the capacity
+        """
+        self.array = ArrayR(self.capacity)
+        self.ranked = ArrayR(self.capacity)
+        self.length = 0
+        self.positions = LinearProbeTable()
+
+    def sorted_items(self) -> Union[ArrayR[T], None]:
+        """
+        Returns the kept items, best ranked first, without changing the heap.
+
+        :returns: the items or None when the heap is empty
+        :complexity: O(k) where k is the number of kept items
+        """
+        if self.is_empty():
+            return None
+        res = ArrayR(self.length)
+        for i in range(self.length):
+            res[i] = self.ranked[i][2]
+        return res
+
+    def _worse(self, first: tuple[str, P, T], second: tuple[str, P, T]) -> bool:
+        return self.compare(first[1], second[1]) > 0
+
+    def _swap(self, i: int, j: int) -> None:
+        self.array[i], self.array[j] = self.array[j], self.array[i]
+        self.positions[self.array[i][0]] = i
+        self.positions[self.array[j][0]] = j
+
+    def _rise(self, index: int) -> int:
+        """
+        Moves an entry towards the root while it ranks behind its parent.
+
+        :returns: the final index of the entry
+        :complexity: O(log(k) * hash(key))
+        """
+        while index > 0:
+            parent = (index - 1) // 2
+            if not self._worse(self.array[index], self.array[parent]):
+                break
+            self._swap(index, parent)
+            index = parent
+        return index
+
+    def _sink(self, index: int) -> int:
+        """
+        Moves an entry away from the root while a child ranks behind it.
+
+        :returns: the final index of the entry
+        :complexity: O(log(k) * hash(key))
+        """
+        while True:
+            child = self._worst_child(self.array, self.length, index)
+            if child is None or not self._worse(self.array[child], self.array[index]):
+                return index
+            self._swap(index, child)
+            index = child
+
+    def _worst_child(self, heap: ArrayR[tuple[str, P, T]], length: int, index: int) -> Union[int, None]:
+        left = 2 * index + 1
+        if left >= length:
+            return None
+        right = left + 1
+        if right < length and self._worse(heap[right], heap[left]):
+            return right
+        return left
+
+    def __str__(self) -> str:
+        """
+        :complexity: O(k * str(item))
+        """
+        return "[" + ", ".join(str(self.array[i][2]) for i in range(self.length)) + "]"
+
+    def __repr__(self) -> str:
+        return str(self)
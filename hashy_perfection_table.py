@@ -4,13 +4,14 @@ __author__ = 'Brendon Taylor'
 __since__ = '22/08/2024'
 
 from data_structures.referential_array import ArrayR
-from typing import Generic, Union, TypeVar
+from data_structures.table_stats import InstrumentedTable, TableStats
+from typing import Generic, Iterator, Union, TypeVar
 
 K = TypeVar('K')
 V = TypeVar('V')
 
 
-class HashyPerfectionTable(Generic[K, V]):
+class HashyPerfectionTable(InstrumentedTable, Generic[K, V]):
     """
     HashyPerfectionTable holds a perfect hash function for a small set of known keys.
     The expected keys can be found within constants.py in the PlayerStats enum.
@@ -20,8 +21,11 @@ class HashyPerfectionTable(Generic[K, V]):
                 Otherwise `hash` should be overwritten.
         - V:    Value Type.
 
+    Lookup counters are available through enable_stats() and stats(), every lookup examines one slot.
     Unless stated otherwise, all methods have O(1) complexity.
     """
+    INSTRUMENTED_METHODS = ('hash',)
+
     def __init__(self) -> None:
         """
         Initialise the Hash Table.
@@ -48,18 +52,55 @@ class HashyPerfectionTable(Generic[K, V]):
         """
         return self.count
 
+    def items(self) -> Iterator[tuple[K, V]]:
+        """
+        Yields every (key, value) pair straight from the backing array.
+        The table must not be modified while iterating.
+
+        Complexity:
+        Best Case Complexity: O(N) where N is the length of the array, with O(1) extra memory.
+        Worst Case Complexity: O(N) where N is the length of the array, with O(1) extra memory.
+        """
+        for x in range(len(self.array)):
+            item = self.array[x]
+            if item is not None:
+                yield item[0], item[1]
+
+    def iter_keys(self) -> Iterator[K]:
+        """
+        Yields every key straight from the backing array.
+
+        Complexity:
+        Best Case Complexity: O(N) where N is the length of the array, with O(1) extra memory.
+        Worst Case Complexity: O(N) where N is the length of the array, with O(1) extra memory.
+        """
+        for x in range(len(self.array)):
+            item = self.array[x]
+            if item is not None:
+                yield item[0]
+
+    def iter_values(self) -> Iterator[V]:
+        """
+        Yields every value straight from the backing array.
+
+        Complexity:
+        Best Case Complexity: O(N) where N is the length of the array, with O(1) extra memory.
+        Worst Case Complexity: O(N) where N is the length of the array, with O(1) extra memory.
+        """
+        for x in range(len(self.array)):
+            item = self.array[x]
+            if item is not None:
+                yield item[1]
+
     def keys(self) -> ArrayR[K]:
         """
         Returns all keys in the hash table.
 
         :complexity: O(N) where N is self.table_size.
         """
-        res = ArrayR(len(self.array))
-        i = 0
-        for x in range(len(self)):
-            if self.array[x] is not None:
-                res[i] = self.array[x][0]
-                i += 1
+        res = ArrayR(self.count)
+        for i, key in enumerate(self.iter_keys()):
+            res[i] = key
         return res
 
     def values(self) -> ArrayR[V]:
@@ -68,12 +109,9 @@ class HashyPerfectionTable(Generic[K, V]):
 
         :complexity: O(N) where N is self.table_size.
         """
-        res = ArrayR(len(self.array))
-        i = 0
-        for x in range(len(self)):
-            if self.array[x] is not None:
-                res[i] = self.array[x][1]
-                i += 1
+        res = ArrayR(self.count)
+        for i, value in enumerate(self.iter_values()):
+            res[i] = value
         return res
 
     def __contains__(self, key: K) -> bool:
@@ -146,6 +184,23 @@ class HashyPerfectionTable(Generic[K, V]):
     def is_full(self) -> bool:
         return self.count == len(self.array)
 
+    def _instrument(self, stats: TableStats) -> dict:
+        """
+        Wrapper counting every hashed lookup as a hit or a miss of its one slot.
+        """
+        hash_key = self.hash
+
+        def counting_hash(key: K) -> int:
+            position = hash_key(key)
+            item = self.array[position]
+            stats.record_probe(1, item is not None and item[0] == key)
+            return position
+
+        return {'hash': counting_hash}
+
+    def _capacity(self) -> int:
+        return len(self.array)
+
     def __str__(self) -> str:
         """
         Complexity:
@@ -1,13 +1,31 @@
 """ Hash Table ADT
 
 Defines a Hash Table using a modified Linear Probe implementation for conflict resolution.
+Every entry keeps the full-width hashes of its key, the position comes from
+the first hash and the step size from an independent second hash, so keys
+that share a home position do not share a probe sequence. The hash functions
+are pluggable strategies, and both are reseeded if an insert probes abnormally far.
+Deleted slots are counted. Once live entries plus deleted slots pass the load
+limit, the table is compacted in place if deleted slots are a real share of
+it, and grows otherwise. When to grow, compact and
+shrink is decided by a pluggable resize policy; by default the table grows
+above a load of 2/3 and shrinks below a load of 1/6.
+
+Keys, values and both hashes are stored in parallel arrays rather than as
+one tuple per entry, so updating the value of an existing key overwrites a
+single slot and allocates nothing.
 """
 from __future__ import annotations
 __author__ = 'Jackson Goerner'
 __since__ = '07/02/2023'
 
+from data_structures.cow_array import CowTable
+from data_structures.hash_functions import HashFunction, PolynomialHash
 from data_structures.referential_array import ArrayR
-from typing import Generic, TypeVar, Union
+from data_structures.resize_policy import LoadFactorPolicy, ResizePolicy
+from data_structures.table_sizes import size_at
+from data_structures.table_stats import InstrumentedTable, TableStats
+from typing import Generic, Iterable, Iterator, TypeVar, Union
 
 K = TypeVar('K')
 V = TypeVar('V')
@@ -17,7 +35,7 @@ class FullError(Exception):
     pass
 
 
-class HashyStepTable(Generic[K, V]):
+class HashyStepTable(InstrumentedTable, CowTable, Generic[K, V]):
     """
     Hashy Step Table.
 
@@ -26,57 +44,137 @@ class HashyStepTable(Generic[K, V]):
                 Otherwise `hash` should be overwritten.
         - V:    Value Type.
 
+    Attributes:
+        key_array, value_array: key and value of the entry in every slot
+        hash_array: full-width hash of the key in every slot, None for empty slots and "DELETED" for deleted ones
+        step_array: full-width step hash of the key in every slot
+
+    Probe and rebuild counters are available through enable_stats() and stats().
+    clone() returns a copy-on-write snapshot, in O(1) once the table has been cloned before.
     Unless stated otherwise, all methods have O(1) complexity.
     """
 
-    # No test case should exceed 1 million entries.
+    # Starting sizes, continued with generated primes once a table outgrows them.
     TABLE_SIZES = [5, 13, 29, 53, 97, 193, 389, 769, 1543, 3079, 6151, 12289, 24593, 49157, 98317, 196613, 393241, 786433, 1572869]
 
-    HASH_BASE = 31
+    # Thresholds of the default LoadFactorPolicy: grow (or compact) above MAX_LOAD, shrink below
+    # SHRINK_LOAD to the smallest size with a load of at most SHRINK_TARGET_LOAD.
+    # The gap between the loads stops the table from resizing back and forth.
+    MAX_LOAD = 2 / 3
+    SHRINK_LOAD = 1 / 6
+    SHRINK_TARGET_LOAD = 1 / 3
+
+    INSTRUMENTED_METHODS = ('_hashy_probe', '_reinsert', '_reseed')
+    COW_ARRAYS = ('key_array', 'value_array', 'hash_array', 'step_array')
+    CLONED_ATTRIBUTES = ('resize_policy',)
 
-    def __init__(self, sizes=None) -> None:
+    # An insert probing further than PROBE_LIMIT_FACTOR * log2(table_size) reseeds both hashes,
+    # at most MAX_RESEEDS times per table size in case the keys themselves collide.
+    PROBE_LIMIT_FACTOR = 4
+    MAX_RESEEDS = 3
+
+    def __init__(self, sizes=None, hash_function: Union[HashFunction[K], None] = None, step_function: Union[HashFunction[K], None] = None, resize_policy: Union[ResizePolicy, None] = None) -> None:
         """
         Initialise the Hash Table.
 
+        Args:
+        sizes: table sizes to use instead of TABLE_SIZES
+        hash_function: hash strategy for the position, PolynomialHash by default
+        step_function: independent hash strategy for the step size, a reseeded copy of hash_function by default
+        resize_policy: decides when to grow, compact and shrink, a LoadFactorPolicy with the class thresholds by default.
+                       Policies may keep per table state, so a policy should not be shared between tables.
+
         Complexity:
         Best Case Complexity: O(max(N, M)) where N is the length of TABLE_SIZES and M is the length of sizes.
         Worst Case Complexity: O(max(N, M)) where N is the length of TABLE_SIZES and M is the length of sizes.
         """
         if sizes is not None:
             self.TABLE_SIZES = sizes
+        self.hash_function = hash_function if hash_function is not None else PolynomialHash()
+        self.step_function = step_function if step_function is not None else self.hash_function.reseeded()
+        if resize_policy is None:
+            resize_policy = LoadFactorPolicy(self.MAX_LOAD, self.SHRINK_LOAD, self.SHRINK_TARGET_LOAD)
+        self.resize_policy = resize_policy
+        self.reseeds = 0
+        self.last_probe_length = 0  #probes taken by the last insert
         self.size_index = 0
-        self.array: ArrayR[Union[tuple[K, V], None]] = ArrayR(self.TABLE_SIZES[self.size_index])
+        self._allocate(self.TABLE_SIZES[self.size_index])
         self.count = 0
+        self.tombstones = 0  #number of "DELETED" slots
+
+    @classmethod
+    def from_items(cls, items: Iterable[tuple[K, V]], expected_size: Union[int, None] = None) -> HashyStepTable[K, V]:
+        """
+        Build a table from (key, value) pairs, sized for all of them up front so it never rehashes.
+
+        Args:
+        expected_size: number of pairs, needed to size the table when items has no len
+
+        Complexity:
+        Best Case Complexity: O(N*hash(K) + M) where N is the number of pairs and M the final table size, no probing.
+        Worst Case Complexity: O(N*hash(K) + N * M) lots of probing.
+        """
+        table = cls()
+        table.update(items, expected_size)
+        return table
 
     def hash(self, key: K) -> int:
         """
         Hash a key for insert/retrieve/update into the hashtable.
+        The hash does not depend on the table size, positions are hash % table_size.
 
         Complexity:
-        Best Case Complexity: O(len(key))
-        Worst Case Complexity: O(len(key))
+        Best Case Complexity: O(len(key)) for the default strategy
+        Worst Case Complexity: O(len(key)) for the default strategy
         """
-
-        value = 0
-        a = 31415
-        for char in key:
-            value = (ord(char) + a * value) % self.table_size
-            a = a * self.HASH_BASE % (self.table_size - 1)
-        return value
+        return self.hash_function(key)
 
     def hash2(self, key: K) -> int:
         """
         Used to determine the step size for our hash table.
+        Full-width and independent of `hash`, the step is hash2 % (table_size - 1) + 1.
+
+        Complexity:
+        Best Case Complexity: O(len(key)) for the default strategy
+        Worst Case Complexity: O(len(key)) for the default strategy
+        """
+        return self.step_function(key)
+
+    def _step(self, step_hash: int) -> int:
+        """
+        Step size for a full-width second hash.
 
         Complexity:
-        Best Case Complexity:
-        Worst Case Complexity:
+        Best Case Complexity: O(1)
+        Worst Case Complexity: O(1)
         """
-        return 1 + self.hash(key) % (self.table_size - 1) #make sure step is at least 1
+        return 1 + step_hash % (self.table_size - 1) #make sure step is at least 1
 
     @property
     def table_size(self) -> int:
-        return len(self.array)
+        return len(self.hash_array)
+
+    def _allocate(self, table_size: int) -> None:
+        """
+        Replace the storage with empty arrays of the given size.
+
+        Complexity:
+        Best Case Complexity: O(M) where M is the table size
+        Worst Case Complexity: O(M) where M is the table size
+        """
+        self.key_array: ArrayR[K] = ArrayR(table_size)
+        self.value_array: ArrayR[V] = ArrayR(table_size)
+        self.hash_array: ArrayR[Union[int, str, None]] = ArrayR(table_size)
+        self.step_array: ArrayR[int] = ArrayR(table_size)
+
+    def _store(self, position: int, key: K, data: V, key_hash: int, step_hash: int) -> None:
+        """
+        Write an entry into an empty or deleted slot. The hash is written last, as it marks the slot as taken.
+        """
+        self.key_array[position] = key
+        self.value_array[position] = data
+        self.step_array[position] = step_hash
+        self.hash_array[position] = key_hash
 
     def __len__(self) -> int:
         """
@@ -84,32 +182,37 @@ class HashyStepTable(Generic[K, V]):
         """
         return self.count
 
-    def _hashy_probe(self, key: K, is_insert: bool) -> int:
+    def _hashy_probe(self, key: K, key_hash: int, step_hash: int, is_insert: bool) -> int:
         """
         Find the correct position for this key in the hash table using hashy probing.
+        Keys are only compared when their full hashes are equal.
+        An insert reuses the first deleted slot on the probe path, but only once the key
+        is known not to be further along.
 
         Raises:
         KeyError: When the key is not in the table, but is_insert is False.
         FullError: When a table is full and cannot be inserted.
 
         Complexity:
-        Best Case Complexity:
-        Worst Case Complexity:
+        Best Case Complexity: O(1) first position is empty
+        Worst Case Complexity: O(N + comp(K)) when we've searched the entire table where N is the tablesize
         """
         #initial position
-        position = self.hash(key)
-        step_size = self.hash2(key)
+        position = key_hash % self.table_size
+        step_size = self._step(step_hash)
+        first_deleted = None
         
-        for _ in range(self.table_size): 
-            if self.array[position] is None:  #empty slot found
+        for probes in range(self.table_size): 
+            if self.hash_array[position] is None:  #empty slot found
                 if is_insert:
-                    return position
+                    self.last_probe_length = probes
+                    return position if first_deleted is None else first_deleted
                 else:
                     raise KeyError(f"{key} not found")
-            elif self.array[position] == "DELETED":
-                if is_insert:
-                    return position  #allow insertion at a deleted slot
-            elif self.array[position][0] == key:  #key matches
+            elif self.hash_array[position] == "DELETED":
+                if first_deleted is None:
+                    first_deleted = position  #remember it for insertion
+            elif self.hash_array[position] == key_hash and self.key_array[position] == key:  #key matches
                 return position
             
             #move to the next position based on step size
@@ -117,20 +220,50 @@ class HashyStepTable(Generic[K, V]):
     
         #if no position was found
         if is_insert:
+            self.last_probe_length = self.table_size
+            if first_deleted is not None:
+                return first_deleted
             raise FullError("Hash table is full")
         raise KeyError(f"{key} not found")
     
+    def items(self) -> Iterator[tuple[K, V]]:
+        """
+        Yields every (key, value) pair straight from the backing arrays, skipping deleted slots.
+        The table must not be modified while iterating.
+
+        :complexity: O(N) where N is self.table_size, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            if self._is_live(x):
+                yield self.key_array[x], self.value_array[x]
+
+    def iter_keys(self) -> Iterator[K]:
+        """
+        Yields every key straight from the backing arrays, skipping deleted slots.
+
+        :complexity: O(N) where N is self.table_size, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            if self._is_live(x):
+                yield self.key_array[x]
+
+    def iter_values(self) -> Iterator[V]:
+        """
+        Yields every value straight from the backing arrays, skipping deleted slots.
+
+        :complexity: O(N) where N is self.table_size, with O(1) extra memory.
+        """
+        for x in range(self.table_size):
+            if self._is_live(x):
+                yield self.value_array[x]
+
     def keys(self) -> list[K]:
         """
         Returns all keys in the hash table.
 
         :complexity: O(N) where N is self.table_size.
         """
-        res = []
-        for x in range(self.table_size):
-            if self.array[x] is not None:
-                res.append(self.array[x][0])
-        return res
+        return [key for key in self.iter_keys()]
 
     def values(self) -> list[V]:
         """
@@ -138,11 +271,7 @@ class HashyStepTable(Generic[K, V]):
 
         :complexity: O(N) where N is self.table_size.
         """
-        res = []
-        for x in range(self.table_size):
-            if self.array[x] is not None:
-                res.append(self.array[x][1])
-        return res
+        return [value for value in self.iter_values()]
 
     def __contains__(self, key: K) -> bool:
         """
@@ -164,38 +293,100 @@ class HashyStepTable(Generic[K, V]):
         :complexity: See hashy probe.
         :raises KeyError: when the key doesn't exist.
         """
-        position = self._hashy_probe(key, False)
-        return self.array[position][1]
+        position = self._hashy_probe(key, self.hash(key), self.hash2(key), False)
+        return self.value_array[position]
 
     def __setitem__(self, key: K, data: V) -> None:
         """
         Set an (key, value) pair in our hash table.
+        Updating an existing key only overwrites its value slot.
 
         :complexity: See hashy probe.
-        :raises FullError: when the table cannot be resized further.
         """
+        key_hash = self.hash(key)
+        step_hash = self.hash2(key)
+        position = self._hashy_probe(key, key_hash, step_hash, True)
 
-        position = self._hashy_probe(key, True)
-
-        if self.array[position] is None:
+        if self.hash_array[position] is None:
+            self.count += 1
+        elif self.hash_array[position] == "DELETED":
             self.count += 1
+            self.tombstones -= 1
+        else:
+            self.value_array[position] = data
+            return
 
-        self.array[position] = (key, data)
+        self._store(position, key, data, key_hash, step_hash)
 
-        if len(self) > self.table_size * 2 / 3:
+        probe_length = self.last_probe_length
+        if self.resize_policy.should_grow(self, probe_length):
             self._rehash()
+        elif self.resize_policy.should_compact(self, probe_length):
+            self._compact()
+        elif probe_length > self._probe_limit() and self.reseeds < self.MAX_RESEEDS:
+            self._reseed()
+
+    def reserve(self, n: int) -> None:
+        """
+        Grow the table so it holds n entries without rehashing.
+        The table may still shrink again if entries are deleted.
+
+        Complexity:
+        Best Case Complexity: O(1) when the table is already large enough.
+        Worst Case Complexity: O(N * M + M) where N is len(self) and M the new table size, lots of probing.
+        """
+        size_index = self.size_index
+        while n > size_at(self.TABLE_SIZES, size_index) * self.resize_policy.grow_load:
+            size_index += 1
+        if size_index > self.size_index:
+            self.size_index = size_index
+            self.reseeds = 0
+            self._reinsert()
+
+    def update(self, items: Iterable[tuple[K, V]], expected_size: Union[int, None] = None) -> None:
+        """
+        Set every (key, value) pair, reserving room for all of them first.
+        An iterable without len and without expected_size is read into a list to count it.
+
+        Args:
+        expected_size: number of pairs, if items has no len
+
+        Complexity:
+        Best Case Complexity: O(N*hash(K) + M) where N is the number of pairs and M the final table size, no probing.
+        Worst Case Complexity: O(N*hash(K) + N * M) lots of probing.
+        """
+        if expected_size is None:
+            if not hasattr(items, "__len__"):
+                items = list(items)
+            expected_size = len(items)
+        self.reserve(len(self) + expected_size)
+        for key, data in items:
+            self[key] = data
 
     def __delitem__(self, key: K) -> None:
         """
         Deletes a (key, value) using lazy deletion
 
         Complexity:
-        Best Case Complexity:
-        Worst Case Complexity:
+        Best Case Complexity: O(hash(key)) see hashy probe
+        Worst Case Complexity: O(hash(key) + N) see hashy probe
         """
-        position = self._hashy_probe(key, False)  #find the position of the key
-        self.array[position] = "DELETED"  #mark the entry as deleted with a sentinel value
+        position = self._hashy_probe(key, self.hash(key), self.hash2(key), False)  #find the position of the key
+        self.hash_array[position] = "DELETED"  #mark the entry as deleted with a sentinel value
+        self.key_array[position] = None  #drop the references to the deleted entry
+        self.value_array[position] = None
         self.count -= 1
+        self.tombstones += 1
+
+        if self.size_index > 0 and self.resize_policy.should_shrink(self):
+            self._shrink()
+
+    def _is_live(self, position: int) -> bool:
+        """
+        Whether a slot holds an entry, rather than being empty or deleted.
+        """
+        key_hash = self.hash_array[position]
+        return key_hash is not None and key_hash != "DELETED"
 
     def is_empty(self) -> bool:
         return self.count == 0
@@ -203,26 +394,153 @@ class HashyStepTable(Generic[K, V]):
     def is_full(self) -> bool:
         return self.count == self.table_size
 
+    def _free_position(self, key_hash: int, step_hash: int) -> int:
+        """
+        Find the first empty position for a pair of hashes, for an entry known not to be in the table.
+
+        Complexity:
+        Best Case Complexity: O(1) first position is empty
+        Worst Case Complexity: O(N) where N is the tablesize
+        """
+        position = key_hash % self.table_size
+        step_size = self._step(step_hash)
+        while self.hash_array[position] is not None:
+            position = (position + step_size) % self.table_size
+        return position
+
+    def _probe_limit(self) -> int:
+        """
+        Longest probe an insert may take before the hash functions are considered unlucky.
+        """
+        return self.PROBE_LIMIT_FACTOR * self.table_size.bit_length()
+
+    def _reseed(self) -> None:
+        """
+        Switch to freshly seeded hash functions and rebuild the table at its current size.
+        Keys have to be re-hashed, so this only happens when probes grow abnormally long.
+
+        Complexity:
+        Best Case Complexity: O(N*hash(K) + M) where N is len(self) and M is the table size, no probing.
+        Worst Case Complexity: O(N*hash(K) + N * M + M) lots of probing.
+        """
+        self.reseeds += 1
+        self.hash_function = self.hash_function.reseeded()
+        self.step_function = self.step_function.reseeded()
+        old_keys, old_values, old_hashes = self.key_array, self.value_array, self.hash_array
+        self._allocate(self.table_size)
+        self.tombstones = 0
+        for x in range(len(old_hashes)):
+            if old_hashes[x] is not None and old_hashes[x] != "DELETED":
+                key = old_keys[x]
+                key_hash, step_hash = self.hash(key), self.hash2(key)
+                self._store(self._free_position(key_hash, step_hash), key, old_values[x], key_hash, step_hash)
+        self.resize_policy.on_rebuild(self)
+
     def _rehash(self) -> None:
         """
-        Need to resize table and reinsert all values
+        Need to resize table and reinsert all values.
+        Entries are placed using their cached hash, keys are never re-hashed or compared.
 
         Complexity:
-        Best Case Complexity:
-        Worst Case Complexity:
+        Best Case Complexity: O(N + M) where N is len(self) and M is the new table size, no probing.
+        Worst Case Complexity: O(N * M + M) lots of probing.
         """
-        old_array = self.array
         self.size_index += 1  #move to the next table size
-        if self.size_index >= len(self.TABLE_SIZES):
-            raise FullError("Cannot resize beyond the maximum table size")
-        
-        self.array = ArrayR(self.TABLE_SIZES[self.size_index])  #create a new larger table
-        self.count = 0  #reset count since we're reinserting
+        self.reseeds = 0
+        self._reinsert()
+
+    def _shrink(self) -> None:
+        """
+        Resize the table down to the smallest size whose load stays at most the policy's shrink_target_load.
+        Deleted slots are dropped on the way.
 
-        #reinsert all non-deleted values from the old array
-        for item in old_array:
-            if item is not None and item != "DELETED":
-                self.__setitem__(item[0], item[1])
+        Complexity:
+        Best Case Complexity: O(N + M) where N is len(self) and M is the current table size, no probing.
+        Worst Case Complexity: O(N * M + M) lots of probing.
+        """
+        size_index = 0
+        while len(self) > size_at(self.TABLE_SIZES, size_index) * self.resize_policy.shrink_target_load:
+            size_index += 1
+        if size_index < self.size_index:
+            self.size_index = size_index
+            self.reseeds = 0
+            self._reinsert()
+
+    def _compact(self) -> None:
+        """
+        Rebuild the table at its current size to clear the deleted slots.
+        Triggered when live entries plus deleted slots pass the load limit and deleted
+        slots are a real share of the table, so churn neither makes the table grow nor
+        compacts it again after only a few inserts.
+
+        Complexity:
+        Best Case Complexity: O(N + M) where N is len(self) and M is the table size, no probing.
+        Worst Case Complexity: O(N * M + M) lots of probing.
+        """
+        self._reinsert()
+
+    def _reinsert(self) -> None:
+        """
+        Move every live entry into new arrays of size TABLE_SIZES[size_index], generating the size if needed.
+
+        Complexity:
+        Best Case Complexity: O(N + M) where N is len(self) and M is the new table size, no probing.
+        Worst Case Complexity: O(N * M + M) lots of probing.
+        """
+        old_keys, old_values, old_hashes, old_steps = self.key_array, self.value_array, self.hash_array, self.step_array
+        self._allocate(size_at(self.TABLE_SIZES, self.size_index))
+        self.tombstones = 0
+
+        #reinsert all non-deleted entries from the old arrays
+        for x in range(len(old_hashes)):
+            if old_hashes[x] is not None and old_hashes[x] != "DELETED":
+                position = self._free_position(old_hashes[x], old_steps[x])
+                self._store(position, old_keys[x], old_values[x], old_hashes[x], old_steps[x])
+        self.resize_policy.on_rebuild(self)
+
+    def _instrument(self, stats: TableStats) -> dict:
+        """
+        Wrappers counting the slots every probe examines and timing every resize, compaction and reseed.
+        """
+        probe = self._hashy_probe
+
+        def counting_probe(key: K, key_hash: int, step_hash: int, is_insert: bool) -> int:
+            try:
+                position = probe(key, key_hash, step_hash, is_insert)
+            except KeyError:
+                stats.record_probe(self._probe_count(key_hash, step_hash, None), False)
+                raise
+            stats.record_probe(self._probe_count(key_hash, step_hash, position), self._is_live(position))
+            return position
+
+        return {'_hashy_probe': counting_probe, '_reinsert': stats.timed(self._reinsert), '_reseed': stats.timed(self._reseed)}
+
+    def _probe_count(self, key_hash: int, step_hash: int, target: Union[int, None]) -> int:
+        """
+        Number of slots on the probe path of a hash up to and including target,
+        or up to and including the first empty slot when target is None.
+
+        Complexity:
+        Best Case Complexity: O(1) target is the home position
+        Worst Case Complexity: O(N) where N is the tablesize
+        """
+        position = key_hash % self.table_size
+        step_size = self._step(step_hash)
+        count = 1
+        while count < self.table_size and position != target and self.hash_array[position] is not None:
+            position = (position + step_size) % self.table_size
+            count += 1
+        return count
+
+    def _capacity(self) -> int:
+        return self.table_size
+
+    def _structure_stats(self, report) -> None:
+        """
+        Adds the number of deleted slots and their share of the table.
+        """
+        report["tombstones"] = self.tombstones
+        report["tombstone_ratio"] = self.tombstones / self.table_size
 
     def __str__(self) -> str:
         """
@@ -231,8 +549,6 @@ class HashyStepTable(Generic[K, V]):
         :complexity: O(N * (str(key) + str(value))) where N is the table size
         """
         result = ""
-        for item in self.array:
-            if item is not None:
-                (key, value) = item
-                result += "(" + str(key) + "," + str(value) + ")\n"
+        for key, value in self.items():
+            result += "(" + str(key) + "," + str(value) + ")\n"
         return result
@@ -1,8 +1,34 @@
 from __future__ import annotations
 from constants import PlayerPosition, PlayerStats
-from data_structures.hash_table_separate_chaining import HashTableSeparateChaining
+from data_structures.cow_array import CowArray
+from data_structures.referential_array import ArrayR
+from typing import Collection, Iterator, Union
+
+
+class StatsEpoch:
+    """
+    Epoch counter shared by the players and teams of one league.
+    Stats stamped with an older value of the counter read as zero.
+    """
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def advance(self) -> None:
+        """
+        Starts a new epoch, making the stats of every object sharing the counter stale.
+
+        Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
+        """
+        self.value += 1
+
 
 class Player:
+    player_counter = 0
+    #epoch of players that have not joined a league, a Season gives its players their own
+    stats_epoch = StatsEpoch()
 
     def __init__(self, name: str, position: PlayerPosition, age: int) -> None:
         """
@@ -24,17 +50,71 @@ class Player:
         if age <18: #O(1)
             raise ValueError("Player must be at least 18 years old.")
         
+        Player.player_counter += 1
+        #unique for the whole run, unlike names or ids of collected players
+        self.number = Player.player_counter #O(1)
         self.name = name #O(1)
         self.position = position #O(1)
         self.age = age #O(1)
         
         
-        self.statistics = HashTableSeparateChaining(len(PlayerStats)) #O(1)
-        #initialize all statistics to 0
-        for stat in PlayerStats: #O(1)
-            self.statistics.insert(stat.name, 0)
+        #counters are stored in PlayerStats order, all initialised to 0
+        self.statistics: ArrayR[int] = ArrayR.from_list([0] * len(PlayerStats)) #O(n)
+        #stats are only valid while this matches self.stats_epoch.value
+        self.epoch = self.stats_epoch.value
+
+    @classmethod
+    def reset_all_stats(cls) -> None:
+        """
+        Reset the stats of every player that has not joined a league by starting a new epoch.
+        Stats stamped with an older epoch read as zero and are cleared on the next write.
+        Players of a Season are reset with Season.reset_stats instead.
+
+        Returns:
+            None
+
+        Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
+        """
+        cls.stats_epoch.advance()
+
+    def join_league(self, stats_epoch: StatsEpoch) -> None:
+        """
+        Moves the player to the epoch of a league, keeping its current stats.
+
+        Args:
+            stats_epoch (StatsEpoch): The epoch of the league
+
+        Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
+        """
+        current = self.epoch == self.stats_epoch.value
+        self.stats_epoch = stats_epoch
+        self.epoch = stats_epoch.value if current else -1
+
+    def fork(self) -> Player:
+        """
+        Returns a copy of the player, so a branch of a simulation can change its stats
+        without touching this player. The two share their stats copy-on-write, the first
+        write to either copies them. The copy keeps the player's number, and shares its
+        epoch until it joins another league, as Season.fork does.
+
+        Returns:
+            Player: The copy of the player
+
+        Complexity:
+            Best Case Complexity: O(1) when the player has been forked before
+            Worst Case Complexity: O(n) where n is the number of PlayerStats, to move the stats into a CowArray on the first fork
+        """
+        if not isinstance(self.statistics, CowArray):
+            self.statistics = CowArray.from_array(self.statistics)
+        res = Player.__new__(Player)
+        res.__dict__.update(self.__dict__)
+        res.statistics = self.statistics.clone()
+        return res
 
-            
     def reset_stats(self) -> None:
         """
         Reset the stats of the player
@@ -43,12 +123,37 @@ class Player:
             None
 
         Complexity:
-            Best Case Complexity: O(n) where n is the num of the loops 
-            Worst Case Complexity: O(n) where n is the num of the loops 
+            Best Case Complexity: O(1) the stats are marked stale and cleared lazily
+            Worst Case Complexity: O(1) the stats are marked stale and cleared lazily
+
+        """
+        self.epoch = -1 #never matches a valid epoch
+
+    def _refresh_stats(self) -> None:
+        """
+        Clears stats left over from an older epoch and stamps the current one.
+
+        Complexity:
+            Best Case Complexity: O(1) when the stats are current
+            Worst Case Complexity: O(n) where n is the number of PlayerStats
+        """
+        if self.epoch != self.stats_epoch.value:
+            for index in range(len(PlayerStats)): #O(n)
+                self.statistics[index] = 0
+            self.epoch = self.stats_epoch.value
 
+    def get_number(self) -> int:
         """
-        for stat in PlayerStats: #O(n) 
-            self.statistics[stat.name] = 0
+        Get the number of the player, unique among all players created
+
+        Returns:
+            int: The number of the player
+
+        Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
+        """
+        return self.number
 
     def get_name(self) -> str:
         """
@@ -76,18 +181,18 @@ class Player:
         """
         return self.position
 
-    def get_statistics(self):
+    def get_statistics(self) -> PlayerStatsView:
         """
         Get the statistics of the player
 
         Returns:
-            statistics: The players' statistics
+            PlayerStatsView: A read-only view of the players' statistics in PlayerStats order
 
         Complexity:
-            Best Case Complexity:
-            Worst Case Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
         """
-        return HashTableSeparateChaining.values()
+        return PlayerStatsView(self)
 
     def __setitem__(self, statistic: PlayerStats, value: int) -> None:
         """
@@ -101,10 +206,11 @@ class Player:
             None
 
         Complexity:
-            Best Case Complexity:
-            Worst Case Complexity:
+            Best Case Complexity: O(1) when the stats are current
+            Worst Case Complexity: O(n) when stats from an older epoch are cleared first
         """
-        self.statistics[statistic.name] = value
+        self._refresh_stats()
+        self.statistics[statistic.index] = value
 
     def __getitem__(self, statistic: PlayerStats) -> int:
         """
@@ -117,10 +223,12 @@ class Player:
             int: The value of the stat
 
         Complexity:
-            Best Case Complexity:
-            Worst Case Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
         """
-        return self.statistics[statistic.name]
+        if self.epoch != self.stats_epoch.value:
+            return 0
+        return self.statistics[statistic.index]
 
     def __str__(self) -> str:
         """
@@ -140,4 +248,123 @@ class Player:
     def __repr__(self) -> str:
         """Returns a string representation of the Player object.
         Useful for debugging or when the Player is held in another data structure."""
-        return str(self)
\ No newline at end of file
+        return str(self)
+
+
+class PlayerStatsView:
+    """
+    Read-only view of a player's statistics in PlayerStats order.
+    The view does not copy anything, every read goes straight to the player's counters.
+    """
+
+    def __init__(self, player: Player) -> None:
+        """
+        Args:
+            player (Player): The player whose statistics are viewed
+
+        Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
+        """
+        self.player = player
+
+    def __len__(self) -> int:
+        """
+        Returns the number of statistics in the view.
+
+        Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
+        """
+        return len(PlayerStats)
+
+    def __getitem__(self, index: Union[int, PlayerStats]) -> int:
+        """
+        Returns a statistic by its position in PlayerStats order or by PlayerStats member.
+
+        Raises:
+            IndexError: When the position is out of range
+
+        Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
+        """
+        if isinstance(index, PlayerStats):
+            return self.player[index]
+        if not -len(PlayerStats) <= index < len(PlayerStats):
+            raise IndexError(f"Statistic index {index} out of range")
+        if self.player.epoch != self.player.stats_epoch.value:
+            return 0
+        return self.player.statistics[index]
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Yields the statistics in PlayerStats order.
+
+        Complexity:
+            Best Case Complexity: O(n) where n is the number of PlayerStats
+            Worst Case Complexity: O(n) where n is the number of PlayerStats
+        """
+        for index in range(len(PlayerStats)):
+            yield self[index]
+
+    def copy_into(self, buffer: ArrayR[int], start: int) -> None:
+        """
+        Copies the statistics into buffer[start:start + n].
+
+        Complexity:
+            Best Case Complexity: O(n) where n is the number of PlayerStats
+            Worst Case Complexity: O(n) where n is the number of PlayerStats
+        """
+        current = self.player.epoch == self.player.stats_epoch.value
+        for index in range(len(PlayerStats)):
+            buffer[start + index] = self.player.statistics[index] if current else 0
+
+    def snapshot(self) -> ArrayR[int]:
+        """
+        Copies the statistics into a new array in PlayerStats order.
+
+        Complexity:
+            Best Case Complexity: O(n) where n is the number of PlayerStats
+            Worst Case Complexity: O(n) where n is the number of PlayerStats
+        """
+        buffer = ArrayR(len(PlayerStats))
+        self.copy_into(buffer, 0)
+        return buffer
+
+    @staticmethod
+    def snapshot_all(players: Collection[Player]) -> Union[ArrayR[int], None]:
+        """
+        Copies the statistics of many players into one flat array.
+        The statistics of the i-th player start at position i * len(PlayerStats).
+
+        Args:
+            players (Collection[Player]): The players to export
+
+        Returns:
+            ArrayR[int]: The flat statistics buffer
+            or
+            None if there are no players.
+
+        Complexity:
+            Best Case Complexity: O(P * n) where P is the number of players and n the number of PlayerStats
+            Worst Case Complexity: O(P * n) where P is the number of players and n the number of PlayerStats
+        """
+        if len(players) == 0:
+            return None
+        buffer = ArrayR(len(players) * len(PlayerStats))
+        for i, player in enumerate(players):
+            PlayerStatsView(player).copy_into(buffer, i * len(PlayerStats))
+        return buffer
+
+    def __str__(self) -> str:
+        """
+        Returns the statistics as stat name and value pairs.
+
+        Complexity:
+            Analysis not required.
+        """
+        return ", ".join(f"{stat.value}: {self[i]}" for i, stat in enumerate(PlayerStats))
+
+    def __repr__(self) -> str:
+        return str(self)
@@ -2,10 +2,12 @@ from __future__ import annotations
 from data_structures.bset import BSet
 from data_structures.referential_array import ArrayR
 from data_structures.linked_list import LinkedList
+from data_structures.hash_table import LinearProbeTable
 from dataclasses import dataclass
 from team import Team , TeamStats
 from typing import Generator, Union
 from game_simulator import GameSimulator
+from player import Player, StatsEpoch
 
 
 
@@ -92,6 +94,26 @@ class WeekOfGames:
             raise StopIteration
 
 
+class SeasonSubscriber:
+    """
+    Base class for objects that follow a season while it is simulated.
+    Subclasses override the events they are interested in.
+    """
+
+    def on_stat_change(self, player: Player, stat) -> None:
+        """
+        Called after a player stat is changed by simulate_season.
+        """
+        pass
+
+    def on_week_end(self, week: int) -> None:
+        """
+        Called after every game of a week has been simulated.
+        Weeks are numbered from 1 in schedule order.
+        """
+        pass
+
+
 class Season:
 
     def __init__(self, teams: ArrayR[Team]) -> None:
@@ -106,8 +128,13 @@ class Season:
             Worst Case Complexity: O(N^2) where N is the number of teams.
         """
         self.teams = teams
+        #every team and player of the season is reset together through this epoch
+        self.stats_epoch = StatsEpoch()
+        for team in teams:
+            team.join_league(self.stats_epoch)
         self.schedule = self._generate_schedule()
         self.leaderboard = LinkedList()
+        self.subscribers = LinkedList()
 
         #adding teams to the leaderboard
         #O(N^2) where N is the number of teams
@@ -200,6 +227,43 @@ class Season:
                 return 0
 
     
+    def subscribe(self, subscriber: SeasonSubscriber) -> None:
+        """
+        Registers a subscriber to be told about every player stat change and the end of every week
+        during simulate_season.
+
+        Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
+        """
+        self.subscribers.append(subscriber)
+
+    def _notify_stat_change(self, player: Player, stat) -> None:
+        """
+        Tells every subscriber that a player stat has changed.
+
+        Complexity:
+            Best Case Complexity: O(1) when there are no subscribers
+            Worst Case Complexity: O(S * U) where S is the number of subscribers and U the cost of their update
+        """
+        current = self.subscribers.head
+        while current is not None:
+            current.item.on_stat_change(player, stat)
+            current = current.link
+
+    def _notify_week_end(self, week: int) -> None:
+        """
+        Tells every subscriber that a week of games has been simulated.
+
+        Complexity:
+            Best Case Complexity: O(1) when there are no subscribers
+            Worst Case Complexity: O(S * U) where S is the number of subscribers and U the cost of their update
+        """
+        current = self.subscribers.head
+        while current is not None:
+            current.item.on_week_end(week)
+            current = current.link
+
     def simulate_season(self) -> None:
         """
         Simulates the season.
@@ -214,7 +278,7 @@ class Season:
 
         #iterate over each week in the schedule
         #O(N) where N is the number of weeks
-        for week in self.schedule:
+        for week_number, week in enumerate(self.schedule, 1):
             #O(N) where N is the total number of games
             for game in week:
                 result = GameSimulator.simulate(game.home_team, game.away_team)
@@ -229,8 +293,10 @@ class Season:
                 #O(N) for each team, so O(2N) = O(N) per game
                 for player in home_team.get_players():
                     player[PlayerStats.GAMES_PLAYED] += 1
+                    self._notify_stat_change(player, PlayerStats.GAMES_PLAYED)
                 for player in away_team.get_players():
                     player[PlayerStats.GAMES_PLAYED] += 1
+                    self._notify_stat_change(player, PlayerStats.GAMES_PLAYED)
 
                 #update goals for and against for the team
                 #O(1) for each team
@@ -276,6 +342,7 @@ class Season:
                         for player in team.get_players():
                             if player.get_name() == player_name:
                                 player[stat_type] += 1
+                                self._notify_stat_change(player, stat_type)
                                 return
 
                 #update goals scored
@@ -302,6 +369,8 @@ class Season:
                     for player_name in interceptions:
                         find_and_update_player_stat(player_name, PlayerStats.INTERCEPTIONS)
 
+            self._notify_week_end(week_number)
+
         #sort teams using bubble sort
         #O(N^2) where N is the number of teams
         sorted_teams = self._bubble_sort_teams()
@@ -450,6 +519,58 @@ class Season:
         return self.teams
 
 
+    def fork(self) -> Season:
+        """
+        Returns a copy of the season for simulating a branch of it, e.g. one run of a Monte Carlo
+        simulation from the current state of the league. Every team and player is forked, sharing
+        its current stats copy-on-write, and the schedule (including delayed weeks) and the leaderboard refer to the
+        forked teams. The fork has its own epoch, so resetting either season leaves the other alone.
+        Subscribers follow this season only, the fork starts without any.
+
+        Returns:
+            Season: The forked season
+
+        Complexity:
+            Best Case Complexity: O(N * P + G) where N is the number of teams, P the number of players per team
+                                  and G the number of games in the schedule, when the season has been forked before
+            Worst Case Complexity: O(N * P * n + G) where n is the number of PlayerStats, as the first fork moves
+                                   the statistics into CowArrays
+        """
+        res = Season.__new__(Season)
+        res.stats_epoch = StatsEpoch()
+        res.teams = ArrayR(len(self.teams))
+        #forked teams by team number, to rebuild the schedule and the leaderboard
+        forks = LinearProbeTable()
+        for i, team in enumerate(self.teams):
+            res.teams[i] = team.fork()
+            res.teams[i].join_league(res.stats_epoch)
+            forks[str(team.get_number())] = res.teams[i]
+
+        res.schedule = ArrayR(len(self.schedule))
+        for week, games in enumerate(self.schedule):
+            res.schedule[week] = ArrayR(len(games))
+            for i, game in enumerate(games):
+                res.schedule[week][i] = Game(forks[str(game.home_team.get_number())],
+                                             forks[str(game.away_team.get_number())])
+
+        res.leaderboard = LinkedList()
+        for team in self.leaderboard:
+            res.leaderboard.append(forks[str(team.get_number())])
+        res.subscribers = LinkedList()
+        return res
+
+    def reset_stats(self) -> None:
+        """
+        Resets the statistics of every team and player so a new season can be simulated.
+        Stats are marked stale by advancing the season's epoch and cleared lazily on their next write.
+        Teams and players of other seasons keep their stats.
+
+        Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
+        """
+        self.stats_epoch.advance()
+
     def __len__(self) -> int:
         """
         Returns the number of teams in the season.
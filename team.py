@@ -1,7 +1,7 @@
 from __future__ import annotations
 from data_structures.referential_array import ArrayR
 from constants import GameResult, PlayerPosition, PlayerStats, TeamStats
-from player import Player
+from player import Player, StatsEpoch
 from typing import Collection, Union, TypeVar
 from data_structures.linked_list import LinkedList
 from data_structures.hash_table import LinearProbeTable
@@ -11,6 +11,8 @@ T = TypeVar("T")
 
 class Team:
     team_counter = 0
+    #epoch of teams that have not joined a league, a Season gives its teams their own
+    stats_epoch = StatsEpoch()
     def __init__(self, team_name: str, players: ArrayR[Player]) -> None:
         """
         Constructor for the Team class
@@ -34,11 +36,8 @@ class Team:
         self.players = LinearProbeTable()
 
         #initialize statistics and player positions
-        for statistic in TeamStats:
-            if statistic == TeamStats.LAST_FIVE_RESULTS:
-                self.statistics[statistic.value] = LinkedList()
-            else:
-                self.statistics[statistic.value] = 0
+        self.epoch = -1
+        self._refresh_stats()
 
         for position in PlayerPosition:
             self.players[position.value] = LinkedList()
@@ -49,19 +48,93 @@ class Team:
         
         
 
+    @classmethod
+    def reset_all_stats(cls) -> None:
+        """
+        Resets the statistics of every team that has not joined a league by starting a new epoch.
+        Statistics stamped with an older epoch read as zero and are cleared on the next write.
+        Teams of a Season are reset with Season.reset_stats instead.
+
+        Complexity:
+            Best Case Complexity: O(1)
+            Worst Case Complexity: O(1)
+        """
+        cls.stats_epoch.advance()
+
+    def join_league(self, stats_epoch: StatsEpoch) -> None:
+        """
+        Moves the team and its players to the epoch of a league, keeping their current statistics.
+        Players added to the team later join the league too.
+
+        Args:
+            stats_epoch (StatsEpoch): The epoch of the league
+
+        Complexity:
+            Best Case Complexity: O(P) where P is the number of players in the team
+            Worst Case Complexity: O(P) where P is the number of players in the team
+        """
+        current = self.epoch == self.stats_epoch.value
+        self.stats_epoch = stats_epoch
+        self.epoch = stats_epoch.value if current else -1
+        players = self.get_players()
+        if players is not None:
+            for player in players:
+                player.join_league(stats_epoch)
+
+    def fork(self) -> Team:
+        """
+        Returns a copy of the team with forked players, so a branch of a simulation can change
+        their statistics without touching this team or its players. The statistics are shared
+        copy-on-write, as are those of the players. The copy keeps the team's number, and shares
+        its epoch until it joins another league, as Season.fork does.
+
+        Returns:
+            Team: The copy of the team
+
+        Complexity:
+            Best Case Complexity: O(P) where P is the number of players, when the team has been forked before
+            Worst Case Complexity: O(P * n + S) where P is the number of players, n the number of PlayerStats
+                                   and S the size of the statistics table, to move the statistics into CowArrays
+                                   on the first fork
+        """
+        res = Team.__new__(Team)
+        res.__dict__.update(self.__dict__)
+        res.statistics = self.statistics.clone()
+
+        res.players = LinearProbeTable()
+        for position in PlayerPosition:
+            players = LinkedList()
+            for player in self.players[position.value]:
+                players.append(player.fork())
+            res.players[position.value] = players
+        return res
+
     def reset_stats(self) -> None:
         """
         Resets all the statistics of the team to the values they were during init.
 
         Complexity:
-            Best Case Complexity:
-            Worst Case Complexity:
+            Best Case Complexity: O(1) the statistics are marked stale and cleared lazily
+            Worst Case Complexity: O(1) the statistics are marked stale and cleared lazily
+        """
+        self.epoch = -1 #never matches a valid epoch
+
+    def _refresh_stats(self) -> None:
         """
+        Clears statistics left over from an older epoch and stamps the current one.
+
+        Complexity:
+            Best Case Complexity: O(1) when the statistics are current
+            Worst Case Complexity: O(S) where S is the number of TeamStats
+        """
+        if self.epoch == self.stats_epoch.value:
+            return
         for statistic in TeamStats:
             if statistic == TeamStats.LAST_FIVE_RESULTS:
                 self.statistics[statistic.value] = LinkedList()
             else:
                 self.statistics[statistic.value] = 0
+        self.epoch = self.stats_epoch.value
 
     def add_player(self, player: Player) -> None:
         """
@@ -78,6 +151,8 @@ class Team:
             Worst Case Complexity:
         """
         self.players[player.get_position().value].append(player)
+        if self.stats_epoch is not Team.stats_epoch:
+            player.join_league(self.stats_epoch)
 
 
     def remove_player(self, player: Player) -> None:
@@ -173,9 +248,10 @@ class Team:
             statistics: The teams' statistics
 
         Complexity:
-            Best Case Complexity:
-            Worst Case Complexity:
+            Best Case Complexity: O(1) when the statistics are current
+            Worst Case Complexity: O(S) where S is the number of TeamStats
         """
+        self._refresh_stats()
         return self.statistics
 
     def get_last_five_results(self) -> Union[Collection[GameResult], None]:
@@ -203,6 +279,8 @@ class Team:
             Best Case Complexity:
             Worst Case Complexity:
         """
+        if self.epoch != self.stats_epoch.value:
+            return None
         results = self.statistics[TeamStats.LAST_FIVE_RESULTS.value]
         if len(results) > 0:
             return results
@@ -237,16 +315,20 @@ class Team:
             Best Case Complexity:
             Worst Case Complexity:
         """
+        self._refresh_stats()
         if statistic in {TeamStats.WINS, TeamStats.LOSSES, TeamStats.DRAWS}:
-            if len(self.statistics[TeamStats.LAST_FIVE_RESULTS.value]) >= 5:
-                self.statistics[TeamStats.LAST_FIVE_RESULTS.value].delete_at_index(0)
+            #replaced rather than changed in place, as forks of the team may share it
+            results = self.statistics[TeamStats.LAST_FIVE_RESULTS.value].clone()
+            if len(results) >= 5:
+                results.delete_at_index(0)
 
             if statistic == TeamStats.WINS:
-                self.statistics[TeamStats.LAST_FIVE_RESULTS.value].append(GameResult.WIN)
+                results.append(GameResult.WIN)
             elif statistic == TeamStats.LOSSES:
-                self.statistics[TeamStats.LAST_FIVE_RESULTS.value].append(GameResult.LOSS)
+                results.append(GameResult.LOSS)
             elif statistic == TeamStats.DRAWS:
-                self.statistics[TeamStats.LAST_FIVE_RESULTS.value].append(GameResult.DRAW)
+                results.append(GameResult.DRAW)
+            self.statistics[TeamStats.LAST_FIVE_RESULTS.value] = results
 
         self.statistics[statistic.value] = value
 
@@ -285,6 +367,11 @@ class Team:
             Best Case Complexity:
             Worst Case Complexity:
         """
+        if self.epoch != self.stats_epoch.value:
+            #stale statistics read as they do right after a reset
+            if statistic == TeamStats.LAST_FIVE_RESULTS:
+                return self.get_last_five_results()
+            return 0
         try:
             return self.statistics[statistic.value]
         except KeyError:
@@ -7,7 +7,6 @@ You cannot use methods in this class or you will recieve
 a 0 for approach and test case marks.
 
 """
-from copy import deepcopy
 from typing import TypeVar, Union
 
 from data_structures.aset import ASet
@@ -36,15 +35,16 @@ def take_out_from_adt(adt: POSSIBLE_ADT_TYPES) -> Union[ArrayR[T], None]:
 
     output: ArrayR[T] = ArrayR(len(adt))
 
-    # Some of the below methods mutate the ADT so we will make a copy of the ADT
+    # Some of the below methods mutate the ADT so we will make a copy of the ADT.
+    # Clones share their nodes, serving or popping them does not change the original.
     adt_type = type(adt)
     if adt_type == LinkedQueue:
-        adt: LinkedQueue = deepcopy(adt)
+        adt: LinkedQueue = adt.clone()
         for index in range(len(adt)):
             output[index] = adt.serve()
 
     elif adt_type == LinkedStack:
-        adt: LinkedStack = deepcopy(adt)
+        adt: LinkedStack = adt.clone()
         for index in range(len(adt)):
             output[index] = adt.pop()
 
@@ -53,9 +53,8 @@ def take_out_from_adt(adt: POSSIBLE_ADT_TYPES) -> Union[ArrayR[T], None]:
             output[index] = adt[index]
 
     elif adt_type in [LinearProbeTable, HashTableSeparateChaining, HashyPerfectionTable, HashyStepTable]:
-        values: list[T] = adt.values()
-        for index in range(len(adt)):
-            output[index] = values[index]
+        for index, value in enumerate(adt.iter_values()):
+            output[index] = value
 
     elif adt_type == ArraySortedList:
         for index in range(len(adt)):
@@ -2,7 +2,7 @@ from unittest import TestCase
 
 from ed_utils.decorators import number, visibility
 from constants import PlayerPosition, PlayerStats, TeamStats
-from player import Player
+from player import Player, PlayerStatsView
 
 
 class TestTask1(TestCase):
@@ -71,3 +71,62 @@ class TestTask1(TestCase):
         sample_player.reset_stats()
         for i, player_stat in enumerate(PlayerStats):
             self.assertEqual(sample_player[player_stat], 0, f"Stat {player_stat.name} not reset to 0 after `reset_stats` method")
+
+    @number("1.5")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_player_league_reset(self) -> None:
+        """
+        Starting a new epoch should reset every player's stats at once.
+        """
+        for player in self.sample_players:
+            player[PlayerStats.GOALS] = 3
+            player[PlayerStats.TACKLES] = 2
+
+        Player.reset_all_stats()
+        for player in self.sample_players:
+            for player_stat in PlayerStats:
+                self.assertEqual(player[player_stat], 0, f"Stat {player_stat.name} not reset to 0 after `reset_all_stats`")
+
+        # Writing after a reset should only keep the new value
+        sample_player = self.sample_players[0]
+        sample_player[PlayerStats.GOALS] += 1
+        self.assertEqual(sample_player[PlayerStats.GOALS], 1)
+        self.assertEqual(sample_player[PlayerStats.TACKLES], 0)
+
+    @number("1.6")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_player_stats_view(self) -> None:
+        """
+        The statistics view should follow PlayerStats order and reflect later updates.
+        """
+        sample_player = self.sample_players[0]
+        view = sample_player.get_statistics()
+        self.assertEqual(len(view), len(PlayerStats))
+
+        for i, player_stat in enumerate(PlayerStats):
+            sample_player[player_stat] = i + 1
+        for i, player_stat in enumerate(PlayerStats):
+            self.assertEqual(view[i], i + 1, f"View of {player_stat.name} is incorrect")
+            self.assertEqual(view[player_stat], i + 1, f"View of {player_stat.name} is incorrect")
+
+        snapshot = view.snapshot()
+        sample_player[PlayerStats.GOALS] = 100
+        self.assertEqual(snapshot[1], 2, "Snapshot should not change after the player is updated")
+        self.assertEqual(view[1], 100, "View should reflect the player's current stats")
+
+    @number("1.7")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_player_stats_snapshot_all(self) -> None:
+        """
+        Exporting many players should lay their stats out one after the other.
+        """
+        for i, player in enumerate(self.sample_players):
+            player[PlayerStats.ASSISTS] = i
+        self.sample_players[1].reset_stats()
+
+        buffer = PlayerStatsView.snapshot_all(self.sample_players)
+        self.assertEqual(len(buffer), len(self.sample_players) * len(PlayerStats))
+        for i, player in enumerate(self.sample_players):
+            for j, player_stat in enumerate(PlayerStats):
+                self.assertEqual(buffer[i * len(PlayerStats) + j], player[player_stat])
+        self.assertIsNone(PlayerStatsView.snapshot_all([]))
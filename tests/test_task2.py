@@ -396,3 +396,26 @@ class TestTask2(TestCase):
         self.assertEqual(len(players), len(expected), "Incorrect number of players returned")
         for i in range(len(players)):
             self.assertEqual(players[i], expected[i], "Incorrect player returned / order of players incorrect")
+
+    @number("2.13")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_league_reset_stats(self) -> None:
+        """
+        Starting a new epoch should reset every team's stats, including the last five results.
+        """
+        self.sample_team[TeamStats.WINS] += 1
+        self.sample_team[TeamStats.GOALS_FOR] += 2
+
+        Team.reset_all_stats()
+        for stat in self.valid_team_stats:
+            if stat == TeamStats.LAST_FIVE_RESULTS:
+                continue
+            self.assertEqual(self.sample_team[stat], 0, f"Stat {stat} should be reset to 0")
+        self.assertIsNone(self.sample_team.get_last_five_results(), "Last five results should be empty after reset")
+
+        self.sample_team[TeamStats.LOSSES] += 1
+        self.assertEqual(self.sample_team[TeamStats.GAMES_PLAYED], 1, "Games Played stat not updated correctly after reset")
+        self.assertEqual(self.sample_team[TeamStats.WINS], 0, "Wins stat should not survive a reset")
+        results = take_out_from_adt(self.sample_team.get_last_five_results())
+        self.assertEqual(len(results), 1, "Only the result after the reset should be kept")
+        self.assertEqual(results[0], GameResult.LOSS)
@@ -2,7 +2,7 @@ from unittest import TestCase
 
 from data_structures.referential_array import ArrayR
 from ed_utils.decorators import number, visibility
-from constants import Constants, PlayerPosition
+from constants import Constants, PlayerPosition, PlayerStats, TeamStats
 from player import Player
 from random_gen import RandomGen
 from season import Season
@@ -133,4 +133,30 @@ class TestTask4(TestCase):
         # Check the order of the leaderboard should be according to the name of the teams
         sorted_teams: ArrayR[Team] = sorted(self.teams, key=lambda team: team.get_name())
         for i, team in enumerate(self.season.leaderboard):
-            self.assertEqual(team.get_name(), sorted_teams[i].get_name(), "Leaderboard not sorted correctly")
\ No newline at end of file
+            self.assertEqual(team.get_name(), sorted_teams[i].get_name(), "Leaderboard not sorted correctly")
+
+    @number("4.6")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_reset_stats_scoped_to_season(self):
+        self.season = Season(self.teams[0:2])
+        other_season = Season(self.teams[2:4])
+        for team in self.teams:
+            team[TeamStats.WINS] += 1
+            team.get_players()[0][PlayerStats.GOALS] = 2
+
+        self.season.reset_stats()
+        for team in self.teams[0:2]:
+            self.assertEqual(team[TeamStats.WINS], 0, "Team stats not reset with their season")
+            self.assertIsNone(team[TeamStats.LAST_FIVE_RESULTS], "Stale last five results should read as after a reset")
+            self.assertEqual(team.get_players()[0][PlayerStats.GOALS], 0, "Player stats not reset with their season")
+        for team in self.teams[2:4]:
+            self.assertEqual(team[TeamStats.WINS], 1, "Resetting a season should not reset another season")
+            self.assertEqual(team.get_players()[0][PlayerStats.GOALS], 2, "Resetting a season should not reset another season")
+
+        # Players added after the season was created are reset with it too
+        late_player = self.players[0]
+        self.teams[0].add_player(late_player)
+        late_player[PlayerStats.TACKLES] = 4
+        self.season.reset_stats()
+        self.assertEqual(late_player[PlayerStats.TACKLES], 0)
+        self.assertEqual(len(other_season), 2)
@@ -0,0 +1,148 @@
+from unittest import TestCase
+
+from awards import Awards, AwardHistory
+from constants import PlayerStats
+from ed_utils.decorators import number, visibility
+from random_gen import RandomGen
+from season import Season, SeasonSubscriber
+from tests import test_task5
+
+
+class TestTask6(TestCase):
+
+    def setUp(self) -> None:
+        RandomGen.set_seed(123)
+        self.teams = test_task5.Roster.generate_teams(4)
+        self.season = Season(self.teams)
+
+    def expected_leaderboard(self, player_stat: PlayerStats, num_top_players: int) -> list:
+        players = []
+        for team in self.teams:
+            for player in team.get_players():
+                players.append(player)
+        players.sort(key=lambda player: (-player[player_stat], player.get_name()))
+        return players[:num_top_players]
+
+    def assertLeaderboard(self, awards: Awards, player_stat: PlayerStats, num_top_players: int) -> None:
+        expected = self.expected_leaderboard(player_stat, num_top_players)
+        leaderboard = awards.get_leaderboard()
+        self.assertEqual(len(leaderboard), len(expected), "Incorrect number of players on the leaderboard")
+        for row, player in zip(leaderboard, expected):
+            self.assertEqual(row[0], player.get_name(), "Leaderboard not ordered correctly")
+            for i, stat in enumerate(PlayerStats):
+                self.assertEqual(row[i + 1], player[stat], f"{stat.value} of {row[0]} is incorrect")
+
+    @number("6.1")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_awards_before_season(self):
+        awards = Awards(self.season, PlayerStats.HEIGHT, 5)
+        self.assertLeaderboard(awards, PlayerStats.HEIGHT, 5)
+
+    @number("6.2")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_awards_follow_season(self):
+        goals = Awards(self.season, PlayerStats.GOALS, 5)
+        tackles = Awards(self.season, PlayerStats.TACKLES, 3)
+        self.season.simulate_season()
+        self.assertLeaderboard(goals, PlayerStats.GOALS, 5)
+        self.assertLeaderboard(tackles, PlayerStats.TACKLES, 3)
+
+    @number("6.3")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_awards_larger_than_league(self):
+        awards = Awards(self.season, PlayerStats.ASSISTS, 1000)
+        self.season.simulate_season()
+        self.assertLeaderboard(awards, PlayerStats.ASSISTS, 1000)
+
+    @number("6.4")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_awards_after_reset(self):
+        awards = Awards(self.season, PlayerStats.GOALS, 5)
+        self.season.simulate_season()
+        self.season.reset_stats()
+        self.assertLeaderboard(awards, PlayerStats.GOALS, 5)
+        self.season.simulate_season()
+        self.assertLeaderboard(awards, PlayerStats.GOALS, 5)
+
+    @number("6.5")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_awards_invalid_size(self):
+        self.assertRaises(ValueError, lambda: Awards(self.season, PlayerStats.GOALS, 0))
+
+    @number("6.6")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_multiple_awards(self):
+        player_stats = [PlayerStats.GOALS, PlayerStats.ASSISTS, PlayerStats.TACKLES, PlayerStats.INTERCEPTIONS]
+        all_awards = Awards.for_stats(self.season, player_stats, 4)
+        self.assertEqual(len(all_awards), len(player_stats))
+        self.season.simulate_season()
+        for player_stat in player_stats:
+            self.assertLeaderboard(all_awards[player_stat.value], player_stat, 4)
+
+        self.season.reset_stats()
+        for player_stat in player_stats:
+            self.assertLeaderboard(all_awards[player_stat.value], player_stat, 4)
+
+    @number("6.7")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_award_history(self):
+        awards = Awards(self.season, PlayerStats.GOALS, 5)
+        history = AwardHistory(awards)
+
+        weekly_boards = []
+        week_tracker = WeekTracker(awards, weekly_boards)
+        self.season.subscribe(week_tracker)
+        self.assertIsNone(history.get_week(1), "No weeks should be recorded before the season")
+
+        self.season.simulate_season()
+        self.assertEqual(len(weekly_boards), len(self.season.schedule))
+        for week, expected in enumerate(weekly_boards, 1):
+            board = history.get_week(week)
+            self.assertEqual(len(board), len(expected))
+            for row, (name, goals) in zip(board, expected):
+                self.assertEqual(row[0], name, f"Incorrect player in week {week}")
+                self.assertEqual(row[1], goals, f"Incorrect goals in week {week}")
+        self.assertRaises(IndexError, lambda: history.get_week(len(self.season.schedule) + 1))
+
+        # Only changed entries are stored
+        stored = sum(len(changes) for _, changes in history.weeks if changes is not None)
+        self.assertEqual(stored, history.changes)
+        self.assertLess(history.changes, 5 * len(self.season.schedule))
+
+        # Simulating again starts a new history
+        self.season.reset_stats()
+        weekly_boards.clear()
+        self.season.simulate_season()
+        for week, expected in enumerate(weekly_boards, 1):
+            board = history.get_week(week)
+            self.assertEqual([(row[0], row[1]) for row in board], expected, f"Incorrect leaderboard in week {week}")
+
+
+    @number("6.8")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_top_k_ranking(self):
+        from data_structures.top_k_heap import TopKHeap
+
+        # The ranking is kept in order through new items, replaced worsts and moved items
+        heap = TopKHeap(5, lambda first, second: second - first)
+        priorities = {}
+        for _ in range(500):
+            key = str(RandomGen.randint(0, 20))
+            priority = RandomGen.randint(0, 100)
+            if key in heap or len(heap) < 5 or priority > heap.peek_worst()[1]:
+                priorities[key] = priority
+            heap.offer(key, priority, key)
+            kept = [heap.array[i][0] for i in range(len(heap))]
+            expected = sorted((priorities[key] for key in kept), reverse=True)
+            self.assertEqual([priorities[key] for key in heap.sorted_items()], expected)
+
+
+class WeekTracker(SeasonSubscriber):
+    """ Copies the full leaderboard every week to compare the history against. """
+
+    def __init__(self, awards: Awards, boards: list) -> None:
+        self.awards = awards
+        self.boards = boards
+
+    def on_week_end(self, week: int) -> None:
+        self.boards.append([(row[0], row[2]) for row in self.awards.get_leaderboard()])
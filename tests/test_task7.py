@@ -0,0 +1,459 @@
+from unittest import TestCase
+
+from ed_utils.decorators import number, visibility
+from data_structures.hash_table import LinearProbeTable
+from data_structures.resize_policy import AdaptivePolicy, LoadFactorPolicy
+from hashy_step_table import HashyStepTable
+from random_gen import RandomGen
+
+
+class TestTask7(TestCase):
+
+    def setUp(self) -> None:
+        RandomGen.set_seed(123)
+
+    @number("7.1")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_linear_probe_delete_clusters(self):
+        table = LinearProbeTable([97])
+        # Only a few home positions, so the keys form long wrapping clusters
+        table.hash = lambda key: 95 + len(key) % 4
+        keys = [f"{'k' * (i % 7 + 1)}{i}" for i in range(40)]
+        for key in keys:
+            table[key] = key
+
+        RandomGen.random_shuffle(keys)
+        for i, key in enumerate(keys):
+            del table[key]
+            self.assertNotIn(key, table)
+            self.assertEqual(len(table), len(keys) - i - 1)
+            for remaining in keys[i + 1:]:
+                self.assertEqual(table[remaining], remaining, f"{remaining} lost after deleting {key}")
+
+    @number("7.2")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_delete_reinsert(self):
+        for table in [LinearProbeTable(), HashyStepTable()]:
+            for i in range(500):
+                table[f"Player {i}"] = i
+            for i in range(0, 500, 2):
+                del table[f"Player {i}"]
+            for i in range(0, 500, 4):
+                table[f"Player {i}"] = -i
+            for i in range(500):
+                if i % 4 == 0:
+                    self.assertEqual(table[f"Player {i}"], -i)
+                elif i % 2 == 0:
+                    self.assertNotIn(f"Player {i}", table)
+                else:
+                    self.assertEqual(table[f"Player {i}"], i)
+            self.assertEqual(len(table), 250 + 125)
+
+    @number("7.3")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_step_table_churn(self):
+        table = HashyStepTable()
+        for i in range(20):
+            table[f"Player {i}"] = i
+        size = table.table_size
+
+        # Steady insert/delete churn should not grow the table or fill it with tombstones
+        for i in range(20, 5000):
+            table[f"Player {i}"] = i
+            del table[f"Player {i - 20}"]
+            self.assertLessEqual(table.count + table.tombstones, table.table_size * 2 / 3 + 1)
+        self.assertEqual(table.table_size, size)
+        self.assertEqual(len(table), 20)
+        for i in range(4980, 5000):
+            self.assertEqual(table[f"Player {i}"], i)
+        self.assertNotIn("Player 0", table)
+
+    @number("7.4")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_step_table_reinsert_after_delete(self):
+        table = HashyStepTable([97])
+        table.hash = lambda _: 0
+        for letter in "ABC":
+            table[letter] = letter
+        del table["A"]
+        # B is further along the probe path, updating it must not create a second copy
+        table["B"] = "updated"
+        self.assertEqual(len(table), 2)
+        del table["B"]
+        self.assertNotIn("B", table)
+        self.assertEqual(table["C"], "C")
+
+    @number("7.5")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_lazy_iteration(self):
+        from constants import PlayerStats
+        from data_structures.hash_table_separate_chaining import HashTableSeparateChaining
+        from hashy_perfection_table import HashyPerfectionTable
+
+        for table in [LinearProbeTable(), HashyStepTable(), HashTableSeparateChaining(), HashyPerfectionTable()]:
+            for i, player_stat in enumerate(PlayerStats):
+                table[player_stat.value] = i
+            del table[PlayerStats.GOALS.value]
+            expected = {player_stat.value: i for i, player_stat in enumerate(PlayerStats)}
+            del expected[PlayerStats.GOALS.value]
+
+            self.assertEqual(dict(table.items()), expected, f"{type(table).__name__} items incorrect")
+            self.assertEqual(sorted(table.iter_keys()), sorted(expected.keys()))
+            self.assertEqual(sorted(table.iter_values()), sorted(expected.values()))
+            self.assertEqual(sorted(table.keys()), sorted(expected.keys()))
+            self.assertEqual(sorted(table.values()), sorted(expected.values()))
+
+    @number("7.6")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_tables_shrink(self):
+        for table in [LinearProbeTable(), HashyStepTable()]:
+            for i in range(1000):
+                table[f"Player {i}"] = i
+            peak_size = table.table_size
+            for i in range(995):
+                del table[f"Player {i}"]
+            self.assertLess(table.table_size, peak_size // 10, f"{type(table).__name__} did not shrink")
+            for i in range(995, 1000):
+                self.assertEqual(table[f"Player {i}"], i)
+
+            # Alternating an insert and a delete around the shrink point should not resize every time
+            size = table.table_size
+            for i in range(100):
+                table["Extra"] = i
+                del table["Extra"]
+            self.assertEqual(table.table_size, size)
+
+    @number("7.7")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_pluggable_hash_reseed(self):
+        from data_structures.hash_functions import BuiltinHash, PolynomialHash
+        from data_structures.hash_table_separate_chaining import HashTableSeparateChaining
+
+        class UnluckyHash(PolynomialHash):
+            # Sends every key home to the same slot until it has been reseeded
+            def __call__(self, key: str) -> int:
+                return 0 if self.seed == PolynomialHash.DEFAULT_SEED else PolynomialHash.__call__(self, key)
+
+        for table in [LinearProbeTable(hash_function=UnluckyHash()), HashTableSeparateChaining(hash_function=UnluckyHash())]:
+            for i in range(60):
+                table[f"Player {i}"] = i
+            self.assertNotEqual(table.hash_function.seed, PolynomialHash.DEFAULT_SEED, f"{type(table).__name__} did not reseed")
+            for i in range(60):
+                self.assertEqual(table[f"Player {i}"], i)
+
+        # The independent step hash spreads keys sharing a home slot, so no reseed is needed
+        table = HashyStepTable(hash_function=UnluckyHash())
+        for i in range(60):
+            table[f"Player {i}"] = i
+            self.assertLessEqual(table.last_probe_length, table._probe_limit())
+        for i in range(60):
+            self.assertEqual(table[f"Player {i}"], i)
+
+        for table in [LinearProbeTable(hash_function=BuiltinHash()), HashyStepTable(hash_function=BuiltinHash(7))]:
+            for i in range(200):
+                table[f"Player {i}"] = i
+            for i in range(0, 200, 3):
+                del table[f"Player {i}"]
+            self.assertEqual(dict(table.items()), {f"Player {i}": i for i in range(200) if i % 3})
+
+    @number("7.8")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_bulk_build(self):
+        for table_type in [LinearProbeTable, HashyStepTable]:
+            rehashes = []
+            original_rehash = table_type._rehash
+
+            def counting_rehash(table):
+                rehashes.append(table.table_size)
+                original_rehash(table)
+
+            table_type._rehash = counting_rehash
+            try:
+                table = table_type.from_items((f"Player {i}", i) for i in range(3000))
+                self.assertEqual(rehashes, [], f"{table_type.__name__} rehashed during from_items")
+                self.assertEqual(len(table), 3000)
+
+                # Overlapping keys are updated, not added twice
+                table.update([(f"Player {i}", -i) for i in range(2500, 4000)])
+                self.assertEqual(rehashes, [])
+                self.assertEqual(len(table), 4000)
+                self.assertEqual(table["Player 2999"], -2999)
+                self.assertEqual(table["Player 3999"], -3999)
+                self.assertEqual(table["Player 0"], 0)
+
+                table = table_type()
+                table.reserve(1000)
+                size = table.table_size
+                for i in range(1000):
+                    table[f"Player {i}"] = i
+                self.assertEqual(rehashes, [])
+                self.assertEqual(table.table_size, size)
+                table.reserve(10)
+                self.assertEqual(table.table_size, size, "reserve should never shrink the table")
+            finally:
+                table_type._rehash = original_rehash
+
+    @number("7.9")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_generated_table_sizes(self):
+        from data_structures.robin_hood_table import RobinHoodTable
+        from data_structures.table_sizes import is_prime, next_prime
+
+        self.assertEqual([n for n in range(30) if is_prime(n)], [2, 3, 5, 7, 11, 13, 17, 19, 23, 29])
+        self.assertTrue(is_prime(1572869))
+        self.assertFalse(is_prime(3215031751))  # strong pseudoprime to bases 2, 3, 5 and 7
+        self.assertEqual(next_prime(2 * 1572869), 3145739)
+
+        sizes = [5, 13]
+        for table in [LinearProbeTable(sizes), HashyStepTable(sizes), RobinHoodTable(sizes)]:
+            for i in range(2000):
+                table[f"Player {i}"] = i
+            self.assertGreater(table.table_size, 2000, f"{type(table).__name__} stopped growing")
+            self.assertTrue(is_prime(table.table_size))
+            for i in range(2000):
+                self.assertEqual(table[f"Player {i}"], i)
+        self.assertEqual(sizes, [5, 13], "the caller's size list should not be extended")
+
+        # Class size lists are shared, growing one table must not change them
+        from data_structures.ordered_hash_table import OrderedHashTable
+        from data_structures.table_sizes import size_at
+        class_sizes = list(LinearProbeTable.TABLE_SIZES)
+        self.assertEqual(size_at(LinearProbeTable.TABLE_SIZES, len(class_sizes)), 3145739)
+        self.assertEqual(LinearProbeTable.TABLE_SIZES, class_sizes)
+        self.assertEqual(OrderedHashTable.TABLE_SIZES, class_sizes)
+
+    @number("7.10")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_separate_chaining_resize(self):
+        from data_structures.hash_table_separate_chaining import HashTableSeparateChaining
+
+        table = HashTableSeparateChaining(shrink=True)
+        for i in range(2000):
+            table[f"Player {i}"] = i
+        self.assertGreaterEqual(len(table.table), len(table), "table did not grow with its entries")
+        nodes = set()
+        for node in table.table:
+            while node is not None:
+                nodes.add(id(node))
+                node = node.link
+
+        table._resize(len(table.table) * 3)
+        relinked = 0
+        for node in table.table:
+            while node is not None:
+                self.assertEqual(node.hash % len(table.table), table.hash(node.key) % len(table.table))
+                relinked += id(node) in nodes
+                node = node.link
+        self.assertEqual(relinked, 2000, "resizing should reuse the existing nodes")
+
+        for i in range(1990):
+            del table[f"Player {i}"]
+        self.assertLess(len(table.table), 10 / HashTableSeparateChaining.MIN_LOAD_FACTOR * 2, "table did not shrink")
+        for i in range(1990, 2000):
+            self.assertEqual(table[f"Player {i}"], i)
+
+        # Deleting the last entry of a chain and appending to it again must keep the new entry
+        table = HashTableSeparateChaining(1)
+        table["A"] = 1
+        table["B"] = 2
+        del table["B"]
+        table["C"] = 3
+        self.assertEqual(sorted(table.keys()), ["A", "C"])
+
+    @number("7.11")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_separate_chaining_in_place_update(self):
+        from data_structures.hash_table_separate_chaining import HashTableSeparateChaining
+
+        table = HashTableSeparateChaining(3)
+        table.hash = lambda key: len(key)
+        for key in ["a", "bb", "cc", "dd", "eee"]:
+            table[key] = 0
+        position = table.hash("cc") % len(table.table)
+        chain = []
+        node = table.table[position]
+        while node is not None:
+            chain.append(node)
+            node = node.link
+
+        for i in range(10):
+            table["cc"] = table["cc"] + 1
+        after = []
+        node = table.table[position]
+        while node is not None:
+            after.append(node)
+            node = node.link
+        self.assertEqual([id(node) for node in after], [id(node) for node in chain], "updates should not replace nodes")
+        self.assertEqual(table["cc"], 10)
+        self.assertEqual(len(table), 5)
+
+        # Deleting from the front, middle and back of the chain
+        for key in ["bb", "dd", "cc"]:
+            del table[key]
+            self.assertNotIn(key, table)
+        self.assertRaises(KeyError, table.__delitem__, "bb")
+        self.assertEqual(sorted(table.keys()), ["a", "eee"])
+        self.assertIn("a", table)
+
+    @number("7.12")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_table_stats(self):
+        from constants import PlayerStats
+        from data_structures.hash_table_separate_chaining import HashTableSeparateChaining
+        from hashy_perfection_table import HashyPerfectionTable
+
+        for table in [LinearProbeTable(), HashyStepTable(), HashTableSeparateChaining(), HashyPerfectionTable()]:
+            name = type(table).__name__
+            report = table.stats()
+            self.assertFalse(report["enabled"])
+            self.assertEqual(report["hits"], 0)
+
+            table.enable_stats()
+            for i, player_stat in enumerate(PlayerStats):
+                table[player_stat.value] = i
+            for player_stat in PlayerStats:
+                _ = table[player_stat.value]
+            _ = "Missing" in table
+
+            report = table.stats()
+            self.assertTrue(report["enabled"])
+            self.assertEqual(report["size"], len(PlayerStats))
+            self.assertAlmostEqual(report["load_factor"], len(PlayerStats) / report["capacity"])
+            self.assertGreaterEqual(report["hits"], len(PlayerStats), f"{name} did not count hits")
+            self.assertGreaterEqual(report["misses"], 1, f"{name} did not count misses")
+            self.assertGreaterEqual(report["avg_hit_probe"], 1)
+            self.assertGreaterEqual(report["max_hit_probe"], report["avg_hit_probe"])
+            histogram = report["probe_histogram"]
+            self.assertEqual(sum(histogram[i] for i in range(len(histogram))), report["hits"] + report["misses"])
+
+            table.disable_stats()
+            for method in table.INSTRUMENTED_METHODS:
+                self.assertNotIn(method, table.__dict__, f"{name}.{method} still wrapped")
+            self.assertFalse(table.stats()["enabled"])
+
+        table = HashyStepTable()
+        table.enable_stats()
+        for i in range(200):
+            table[f"Player {i}"] = i
+        for i in range(100):
+            del table[f"Player {i}"]
+        report = table.stats()
+        self.assertGreater(report["rebuilds"], 0)
+        self.assertGreaterEqual(report["rebuild_seconds"], 0)
+        self.assertEqual(report["tombstone_ratio"], table.tombstones / table.table_size)
+
+        table = HashTableSeparateChaining(5)
+        for i in range(5):
+            table[f"Player {i}"] = i
+        histogram = table.stats()["chain_histogram"]
+        self.assertEqual(sum(histogram[i] for i in range(len(histogram))), 5)
+        self.assertEqual(sum(i * histogram[i] for i in range(len(histogram))), 5)
+
+        # A hash replaced on the instance survives enabling and disabling stats
+        table = HashyPerfectionTable()
+        replaced = table.hash = lambda key: 0
+        table.enable_stats()
+        table.disable_stats()
+        self.assertIs(table.hash, replaced)
+
+    @number("7.13")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_resize_policy(self):
+        # The default policy keeps the fixed thresholds
+        table = LinearProbeTable()
+        for i in range(3):
+            table[f"Player {i}"] = i
+        self.assertEqual(table.table_size, 13)
+        self.assertIsInstance(table.resize_policy, LoadFactorPolicy)
+
+        # Well spread keys let an adaptive table run well past a load of 1/2
+        table = LinearProbeTable(resize_policy=AdaptivePolicy(min_load=0.4, max_load=0.8))
+        for i in range(8):
+            table[f"Player {i}"] = i
+        self.assertGreater(len(table) / table.table_size, 1 / 2)
+        for i in range(8):
+            self.assertEqual(table[f"Player {i}"], i)
+
+        # Clustered keys make it grow before max_load
+        table = LinearProbeTable([97, 193, 389], resize_policy=AdaptivePolicy(probe_budget=2))
+        table.hash = lambda key: 95 + len(key) % 4
+        for i in range(60):
+            table[f"Player {i}"] = i
+        self.assertGreater(table.table_size, 97)
+        for i in range(60):
+            self.assertEqual(table[f"Player {i}"], i)
+
+        # Custom policies are asked on every insert of a new key
+        class CountingPolicy(LoadFactorPolicy):
+            def __init__(self):
+                LoadFactorPolicy.__init__(self, 2 / 3, 1 / 6, 1 / 3)
+                self.asked = 0
+
+            def should_grow(self, table, probe_length):
+                self.asked += 1
+                return LoadFactorPolicy.should_grow(self, table, probe_length)
+
+        policy = CountingPolicy()
+        table = HashyStepTable(resize_policy=policy)
+        for i in range(50):
+            table[f"Player {i}"] = i
+        table["Player 0"] = 0
+        self.assertEqual(policy.asked, 50)
+        self.assertLessEqual(len(table), table.table_size * 2 / 3)
+        for i in range(45):
+            del table[f"Player {i}"]
+        self.assertLess(table.table_size, 97)
+
+        with self.assertRaises(ValueError):
+            LoadFactorPolicy(1, 1 / 8, 1 / 4)
+        with self.assertRaises(ValueError):
+            AdaptivePolicy(min_load=0.9, max_load=0.8)
+
+    @number("7.14")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_parallel_storage(self):
+        from data_structures.robin_hood_table import RobinHoodTable
+
+        for table in (LinearProbeTable(), HashyStepTable(), RobinHoodTable()):
+            name = type(table).__name__
+            for i in range(40):
+                table[f"Player {i}"] = i
+            key_array, hash_array = table.key_array, table.hash_array
+            keys = [key_array[x] for x in range(table.table_size)]
+            hashes = [hash_array[x] for x in range(table.table_size)]
+
+            # Updates only overwrite value slots
+            for i in range(40):
+                table[f"Player {i}"] = -i
+            self.assertIs(table.key_array, key_array, f"{name} replaced its arrays on update")
+            self.assertEqual([key_array[x] for x in range(table.table_size)], keys)
+            self.assertEqual([hash_array[x] for x in range(table.table_size)], hashes)
+            for i in range(40):
+                self.assertEqual(table[f"Player {i}"], -i)
+
+            # Deleted slots hold no references to their entries
+            for i in range(0, 40, 2):
+                del table[f"Player {i}"]
+            for x in range(table.table_size):
+                if table.key_array[x] is None:
+                    self.assertIsNone(table.value_array[x], f"{name} kept a deleted value")
+            self.assertEqual(sorted(table.values()), sorted(-i for i in range(1, 40, 2)))
+
+    @number("7.15")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_step_table_churn_near_load_limit(self):
+        for policy in (None, AdaptivePolicy()):
+            table = HashyStepTable([97, 193, 389], resize_policy=policy)
+            for i in range(64):
+                table[f"Player {i}"] = i
+            table.enable_stats()
+
+            # Deleted slots must pile up between rebuilds, or every churn operation costs O(M)
+            for i in range(64, 2064):
+                del table[f"Player {i - 64}"]
+                table[f"Player {i}"] = i
+                self.assertLessEqual(table.count + table.tombstones, table.table_size * table.resize_policy.max_load + 1)
+            self.assertLess(table.stats()["rebuilds"], 100)
+            self.assertEqual(len(table), 64)
+            for i in range(2000, 2064):
+                self.assertEqual(table[f"Player {i}"], i)
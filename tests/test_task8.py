@@ -0,0 +1,404 @@
+import os
+import pickle
+import tempfile
+from unittest import TestCase
+
+from ed_utils.decorators import number, visibility
+from constants import PlayerPosition, PlayerStats, TeamStats
+from data_structures.concurrent_hash_table import ConcurrentHashTable
+from data_structures.cow_array import CowArray
+from data_structures.cuckoo_hash_table import CuckooHashTable
+from data_structures.mapped_hash_table import MappedHashTable
+from data_structures.ordered_hash_table import OrderedHashTable
+from data_structures.perfect_hash_table import PerfectHashTable
+from data_structures.robin_hood_table import RobinHoodTable
+from random_gen import RandomGen
+
+
+class TestTask8(TestCase):
+
+    def setUp(self) -> None:
+        RandomGen.set_seed(123)
+
+    def check_table_api(self, table) -> None:
+        """ Runs a mixed workload against a table and checks it against a dict. """
+        expected = {}
+        for i in range(2000):
+            key = f"Player {RandomGen.randint(0, 999)}"
+            if RandomGen.random_chance(0.3) and key in expected:
+                del table[key]
+                del expected[key]
+            else:
+                table[key] = i
+                expected[key] = i
+            self.assertEqual(len(table), len(expected))
+
+        for key, value in expected.items():
+            self.assertEqual(table[key], value, f"Incorrect value for {key}")
+        self.assertEqual(sorted(table.keys()), sorted(expected.keys()))
+        self.assertEqual(sorted(table.values()), sorted(expected.values()))
+        self.assertNotIn("Missing", table)
+        self.assertRaises(KeyError, lambda: table["Missing"])
+
+    @number("8.1")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_robin_hood_table(self):
+        self.check_table_api(RobinHoodTable())
+
+    @number("8.2")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_robin_hood_collisions(self):
+        table = RobinHoodTable([97])
+        table.hash = lambda key: len(key)
+        keys = [f"{'k' * (i % 5 + 1)}{i}" for i in range(60)]
+        for key in keys:
+            table[key] = key
+        for i, key in enumerate(keys):
+            del table[key]
+            for remaining in keys[i + 1:]:
+                self.assertEqual(table[remaining], remaining, f"{remaining} lost after deleting {key}")
+        self.assertTrue(table.is_empty())
+
+    @number("8.3")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_perfect_hash_table(self):
+        for enum in [PlayerStats, TeamStats, PlayerPosition]:
+            keys = [member.value for member in enum]
+            table = PerfectHashTable(keys)
+            self.assertEqual(sorted(table.hash(key) for key in keys), list(range(len(keys))), f"{enum.__name__} hash is not minimal perfect")
+            for i, key in enumerate(keys):
+                table[key] = i
+            self.assertTrue(table.is_full())
+            for i, key in enumerate(keys):
+                self.assertEqual(table[key], i)
+            self.assertRaises(KeyError, table.__setitem__, "Missing", 0)
+            self.assertNotIn("Missing", table)
+
+            del table[keys[0]]
+            self.assertNotIn(keys[0], table)
+            self.assertRaises(KeyError, table.__delitem__, keys[0])
+            self.assertEqual(len(table), len(keys) - 1)
+            table[keys[0]] = -1
+            self.assertEqual(dict(table.items()), {key: -1 if i == 0 else i for i, key in enumerate(keys)})
+
+        self.assertRaises(ValueError, PerfectHashTable, ["Goals", "Goals"])
+        self.assertRaises(ValueError, PerfectHashTable, [])
+
+    @number("8.4")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_perfect_hash_table_roster(self):
+        names = [f"Player {i}" for i in range(3000)]
+        table = PerfectHashTable(names)
+        self.assertEqual(sorted(table.hash(name) for name in names), list(range(len(names))))
+        for i, name in enumerate(names):
+            table[name] = i
+
+        restored = PerfectHashTable.deserialise(table.serialise())
+        self.assertEqual(len(restored), len(names))
+        for i, name in enumerate(names):
+            self.assertEqual(restored[name], i)
+        self.assertRaises(KeyError, lambda: restored["Player 3000"])
+        self.assertRaises(TypeError, PerfectHashTable.deserialise, pickle.dumps(names))
+
+    @number("8.5")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_concurrent_table(self):
+        self.check_table_api(ConcurrentHashTable())
+        self.check_table_api(ConcurrentHashTable(segments=1))
+
+    @number("8.6")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_concurrent_table_threads(self):
+        import threading
+
+        table = ConcurrentHashTable(segments=4)
+        for i in range(100):
+            table[f"Stable {i}"] = i
+        errors = []
+
+        def writer(worker: int) -> None:
+            for i in range(300):
+                table.compute(f"Counter {i % 10}", lambda value: value + 1, 0)
+                table[f"Worker {worker} {i}"] = i
+                if i % 3 == 0:
+                    del table[f"Worker {worker} {i}"]
+
+        def reader() -> None:
+            # Stable keys share segments with the churning ones and must never go missing
+            for _ in range(20):
+                for i in range(100):
+                    if table.get(f"Stable {i}") != i:
+                        errors.append(i)
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)] + [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        for i in range(10):
+            self.assertEqual(table[f"Counter {i}"], 4 * 30, "compute lost an update")
+        self.assertEqual(len(table), 100 + 10 + 4 * 200)
+        self.assertEqual(len(table.keys()), len(table))
+
+    @number("8.7")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_mapped_table(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with MappedHashTable(os.path.join(directory, "registry")) as table:
+                self.check_table_api(table)
+
+    @number("8.8")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_mapped_table_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "registry")
+            with MappedHashTable(path) as table:
+                for i in range(100):
+                    table[f"Player {i}"] = {"goals": i}
+                table["Player 0"] = {"goals": -1}
+                del table["Player 1"]
+                self.assertRaises(ValueError, table.__setitem__, "x" * 100, 0)
+
+            # Any number of read-only tables can share the files
+            readers = [MappedHashTable(path, read_only=True) for _ in range(2)]
+            for reader in readers:
+                self.assertEqual(len(reader), 99)
+                self.assertEqual(reader["Player 0"], {"goals": -1})
+                self.assertEqual(reader["Player 99"], {"goals": 99})
+                self.assertNotIn("Player 1", reader)
+                self.assertRaises(PermissionError, reader.__setitem__, "Player 1", 1)
+                reader.close()
+
+            # Appending after reopening, then compacting away the overwritten values
+            with MappedHashTable(path) as table:
+                for i in range(100):
+                    table[f"Player {i}"] = {"goals": 2 * i}
+                self.assertGreater(table.garbage, 0)
+                data_path = table._data_path(table.generation)
+                size = os.path.getsize(data_path)
+                table.compact()
+                self.assertEqual(table.garbage, 0)
+                self.assertLess(os.path.getsize(table._data_path(table.generation)), size)
+                self.assertFalse(os.path.exists(data_path))
+            with MappedHashTable(path, read_only=True) as table:
+                self.assertEqual(len(table), 100)
+                for i in range(100):
+                    self.assertEqual(table[f"Player {i}"], {"goals": 2 * i})
+
+            # Readers see writes in place, and are only detached by a rebuild
+            with MappedHashTable(path) as table, MappedHashTable(path, read_only=True) as reader:
+                table["Player 100"] = {"goals": 100}
+                self.assertEqual(reader["Player 100"], {"goals": 100})
+                table.compact()
+                table["Player 101"] = {"goals": 101}
+                self.assertNotIn("Player 101", reader)
+                self.assertEqual(len(reader), 101)
+
+            self.assertRaises(FileNotFoundError, MappedHashTable, os.path.join(directory, "missing"), True)
+
+    @number("8.9")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_cuckoo_table(self):
+        table = CuckooHashTable()
+        self.check_table_api(table)
+        # Every key sits in one of its two slots or in the stash
+        for key in table.keys():
+            first, second = table._positions(table.hash(key), table.hash2(key))
+            stashed = [table.stash[i][0] for i in range(table.stash_count)]
+            self.assertTrue(table.key_array[first] == key or table.key_array[second] == key or key in stashed)
+        self.assertLessEqual(len(table), table.table_size * table.MAX_LOAD)
+
+        # Keys differing only in their last character do not share both slots
+        table = CuckooHashTable([53, 97, 193])
+        for i in range(8):
+            table["Player " + chr(0x100 + 53 * i)] = i
+        self.assertEqual(table.half_size, 53)
+        first, second = table.hash_function, table.alt_function
+        self.assertNotEqual((first("Player A") - first("Player B")) % first.HASH_MODULUS,
+                            (second("Player A") - second("Player B")) % second.HASH_MODULUS)
+
+    @number("8.10")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_cuckoo_stash(self):
+        from data_structures.hash_functions import HashFunction
+
+        class ModularHash(HashFunction[int]):
+            def __call__(self, key: int) -> int:
+                return key * self.seed % 1009
+
+        # Keys that are equal modulo 1009 share both of their slots, whatever the seeds
+        table = CuckooHashTable([97], ModularHash(3), ModularHash(5))
+        keys = [i * 1009 for i in range(6)]
+        for key in keys:
+            table[key] = key
+        self.assertEqual(table.stash_count, 4)
+        self.assertEqual(table.table_size, 2 * 97)
+        for key in keys:
+            self.assertEqual(table[key], key)
+
+        table[keys[5]] = -1
+        self.assertEqual(table[keys[5]], -1)
+        del table[keys[2]]
+        del table[keys[0]]
+        self.assertNotIn(keys[0], table)
+        self.assertEqual(sorted(table.keys()), [keys[1], keys[3], keys[4], keys[5]])
+
+        # Other keys still find free slots of their own
+        for key in range(1, 40):
+            table[key] = key
+        for key in range(1, 40):
+            self.assertEqual(table[key], key)
+
+    @number("8.11")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_cow_array(self):
+        array = CowArray(100)
+        for i in range(100):
+            array[i] = i
+        clone = array.clone()
+        self.assertIs(clone.segments, array.segments)
+        clone[5] = -5
+        array[99] = -99
+        self.assertEqual(array[5], 5)
+        self.assertEqual(clone[5], -5)
+        self.assertEqual(clone[99], 99)
+        self.assertEqual(array[-1], -99)
+        # Only the written segments were copied
+        shared = sum(clone.segments[i] is array.segments[i] for i in range(len(array.segments)))
+        self.assertEqual(shared, len(array.segments) - 2)
+        self.assertRaises(IndexError, lambda: array[100])
+        self.assertEqual([item for item in clone], [-5 if i == 5 else i for i in range(100)])
+
+    @number("8.12")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_table_clones(self):
+        from data_structures.hash_table import LinearProbeTable
+        from data_structures.linked_queue import LinkedQueue
+        from data_structures.linked_stack import LinkedStack
+        from hashy_step_table import HashyStepTable
+
+        for table in (LinearProbeTable(), HashyStepTable(), RobinHoodTable(), CuckooHashTable()):
+            name = type(table).__name__
+            for i in range(200):
+                table[f"Player {i}"] = i
+            if hasattr(table, "enable_stats"):
+                table.enable_stats()
+            report = str(table.stats()) if hasattr(table, "enable_stats") else None
+            branch = table.clone()
+            twig = branch.clone()
+            branch["Player 0"] = -1
+            del branch["Player 1"]
+            branch["Player 200"] = 200
+            twig["Player 2"] = -2
+            # The source keeps the CowArrays of its first clone, so cloning it again shares every segment
+            self.assertIsInstance(table.key_array, CowArray, name)
+            self.assertIsInstance(branch.key_array, CowArray, name)
+            again = table.clone()
+            self.assertTrue(all(again.key_array.segments[i] is table.key_array.segments[i]
+                                for i in range(len(table.key_array.segments))), name)
+            # Branches do not count into the source's stats
+            if report is not None:
+                self.assertEqual(str(table.stats()), report, name)
+
+            self.assertEqual((table["Player 0"], table["Player 2"], len(table)), (0, 2, 200), name)
+            self.assertNotIn("Player 200", table, name)
+            self.assertEqual((branch["Player 0"], branch["Player 2"], len(branch)), (-1, 2, 200), name)
+            self.assertNotIn("Player 1", branch, name)
+            self.assertEqual((twig["Player 0"], twig["Player 1"], twig["Player 2"]), (0, 1, -2), name)
+            if hasattr(table, "enable_stats"):
+                self.assertTrue(table.stats_enabled())
+                self.assertFalse(branch.stats_enabled(), name)
+
+            # Clones keep working through rebuilds
+            for i in range(200, 600):
+                branch[f"Player {i}"] = i
+            self.assertEqual(len(branch), 599)
+            self.assertEqual(len(table), 200)
+            for i in range(200):
+                self.assertEqual(table[f"Player {i}"], i)
+
+        queue = LinkedQueue()
+        stack = LinkedStack()
+        for i in range(5):
+            queue.append(i)
+            stack.push(i)
+        queue_clone, stack_clone = queue.clone(), stack.clone()
+        queue_clone.append(5)
+        self.assertEqual([queue_clone.serve() for _ in range(6)], [0, 1, 2, 3, 4, 5])
+        queue.append(6)
+        self.assertEqual([queue.serve() for _ in range(6)], [0, 1, 2, 3, 4, 6])
+        self.assertEqual([stack_clone.pop() for _ in range(5)], [4, 3, 2, 1, 0])
+        self.assertEqual(len(stack), 5)
+        self.assertEqual(stack.peek(), 4)
+
+    @number("8.13")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_ordered_table(self):
+        self.check_table_api(OrderedHashTable())
+
+        # Iteration follows insertion order, like a dict
+        table = OrderedHashTable()
+        expected = {}
+        for i in range(300):
+            key = f"Player {RandomGen.randint(0, 99)}"
+            if RandomGen.random_chance(0.3) and key in expected:
+                del table[key]
+                del expected[key]
+            else:
+                table[key] = i
+                expected[key] = i
+        self.assertEqual(list(table.items()), list(expected.items()))
+        self.assertEqual(table.keys().to_list(), list(expected.keys()))
+
+        # The dense arrays never hold more than MAX_LOAD entries per index slot
+        self.assertLessEqual(table.capacity, table.table_size * table.MAX_LOAD)
+        self.assertLessEqual(table.used, table.capacity)
+
+        branch = table.clone()
+        branch["Player 100"] = 100
+        self.assertEqual(list(branch.iter_keys())[-1], "Player 100")
+        self.assertNotIn("Player 100", table)
+
+    @number("8.14")
+    @visibility(visibility.VISIBILITY_SHOW)
+    def test_season_fork(self):
+        from season import Season
+        from tests.test_task5 import Roster
+
+        teams = Roster.generate_teams(4)
+        season = Season(teams)
+        team = teams[0]
+        player = team.get_players()[0]
+        team[TeamStats.WINS] += 1
+        player[PlayerStats.GOALS] = 3
+
+        # Branches play out the rest of the season without touching the baseline
+        branches = [season.fork() for _ in range(2)]
+        for branch in branches:
+            branch.simulate_season()
+            forked_team = [t for t in branch.get_teams() if t.get_number() == team.get_number()][0]
+            self.assertEqual(forked_team[TeamStats.GAMES_PLAYED], 7)
+            self.assertEqual(len(forked_team.get_last_five_results()), 5)
+            self.assertIsNot(forked_team.get_players()[0], player)
+        self.assertEqual(team[TeamStats.GAMES_PLAYED], 1)
+        self.assertEqual(len(team.get_last_five_results()), 1)
+        self.assertEqual(player[PlayerStats.GOALS], 3)
+        self.assertEqual(player[PlayerStats.GAMES_PLAYED], 0)
+
+        # Forks share stats copy-on-write until one of them writes
+        fork = player.fork()
+        self.assertIs(fork.statistics.segments, player.statistics.segments)
+        fork[PlayerStats.GOALS] = 4
+        self.assertEqual((fork[PlayerStats.GOALS], player[PlayerStats.GOALS]), (4, 3))
+
+        # Resetting a branch leaves the baseline alone, and the other way round
+        fork = season.fork()
+        fork.reset_stats()
+        self.assertEqual(team[TeamStats.WINS], 1)
+        fork = season.fork()
+        season.reset_stats()
+        forked_team = [t for t in fork.get_teams() if t.get_number() == team.get_number()][0]
+        self.assertEqual(forked_team[TeamStats.WINS], 1)
+        self.assertEqual(forked_team.get_players()[0][PlayerStats.GOALS], 3)